@@ -0,0 +1,155 @@
+"""
+Load test of GET /api/blogs/{id} while generations are running
+Starts the real app under uvicorn in this process (fake_llm.FakeChatModel in
+place of Ollama, SQLite unless DATABASE_URL is set), keeps --generations
+blogs generating in the background and reads blogs from --clients
+concurrent connections for --duration seconds. Reports requests/sec and
+latency percentiles of the reads.
+
+Usage:
+    python bench_api.py --clients 32 --duration 15 --generations 8
+    python bench_api.py --generations 0          # reads only, no generation load
+    python bench_api.py --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+
+from bench_pipeline import setup_environment, summarize
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int):
+    """Run the app under uvicorn on a background thread"""
+    import uvicorn
+    import main
+
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, name="uvicorn", daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def keep_generating(client, target: int, stop: asyncio.Event):
+    """Keep about `target` generations queued or running until stopped"""
+    submitted = 0
+    while not stop.is_set():
+        queue = (await client.get("/api/queue")).json()
+        for _ in range(max(0, target - queue["running"] - queue["queued"])):
+            await client.post("/api/generate", json={"topic": f"load test topic {submitted}"})
+            submitted += 1
+        await asyncio.sleep(0.2)
+    return submitted
+
+
+async def reader(client, blog_ids, stop: asyncio.Event, latencies: list, errors: list):
+    i = 0
+    while not stop.is_set():
+        blog_id = blog_ids[i % len(blog_ids)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(f"/api/blogs/{blog_id}")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+
+
+async def run(args, port: int) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.clients + 4, max_keepalive_connections=args.clients + 4)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        # Seed rows to read
+        blog_ids = []
+        for i in range(args.seed_blogs):
+            response = await client.post("/api/generate", json={"topic": f"seed topic {i}"})
+            blog_ids.append(response.json()["id"])
+        while (await client.get("/api/queue")).json()["running"]:
+            await asyncio.sleep(0.1)
+
+        stop = asyncio.Event()
+        latencies, errors = [], []
+        generator = asyncio.create_task(keep_generating(client, args.generations, stop)) if args.generations else None
+        # Let the generation load ramp up before measuring
+        await asyncio.sleep(args.warmup)
+        readers = [asyncio.create_task(reader(client, blog_ids, stop, latencies, errors))
+                   for _ in range(args.clients)]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*readers)
+        generated = await generator if generator else 0
+
+    return {
+        "clients": args.clients,
+        "generations_in_flight": args.generations,
+        "generations_submitted": generated,
+        "duration_seconds": args.duration,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / args.duration,
+        "latency": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent readers")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of measurement")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of generation load before measuring")
+    parser.add_argument("--generations", type=int, default=8, help="generations kept in flight")
+    parser.add_argument("--workers", type=int, default=8, help="MAX_CONCURRENT_GENERATIONS")
+    parser.add_argument("--seed-blogs", type=int, default=20, help="blogs created before the test")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="fake LLM generation speed")
+    parser.add_argument("--response-tokens", type=int, default=120, help="tokens per fake LLM response")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    setup_environment(tempfile.mkdtemp(prefix="blog_bench_api_"))
+    os.environ["MAX_CONCURRENT_GENERATIONS"] = str(args.workers)
+
+    import blog_agents
+    from fake_llm import FakeChatModel
+    blog_agents.llm = FakeChatModel(
+        first_token_latency=args.first_token_latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+    )
+
+    port = free_port()
+    server, thread = start_server(port)
+    try:
+        result = asyncio.run(run(args, port))
+    finally:
+        server.should_exit = True
+        thread.join(10)
+
+    lat = result["latency"]
+    print(f"\nGET /api/blogs/{{id}}: {result['requests_per_second']:.1f} req/s with {args.clients} clients, "
+          f"{args.generations} generations in flight ({result['generations_submitted']} submitted), "
+          f"{result['errors']} errors")
+    print(f"latency ms  mean {lat['mean'] * 1000:.1f}  p50 {lat['p50'] * 1000:.1f}  "
+          f"p95 {lat['p95'] * 1000:.1f}  p99 {lat['p99'] * 1000:.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "result": result}, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Checkpoint write throughput benchmark
+Runs N blog-shaped workflows at the same time (no LLM - nodes just write
+text of realistic size) against the old shared-connection SqliteSaver and
+the pooled WAL saver, and reports checkpoint writes per second.
+
+Usage:
+    python bench_checkpoints.py --workflows 1 4 16 --runs 20
+"""
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import StateGraph, START, END
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from checkpoint_store import PooledSqliteSaver
+
+
+class BenchState(TypedDict):
+    topic: str
+    title: str
+    outline: str
+    content: str
+    refined_content: str
+
+
+def build_graph(checkpointer, content_size: int):
+    """Same shape as the blog workflow: two parallel nodes, then write and edit"""
+    body = "x" * content_size
+
+    graph = StateGraph(BenchState)
+    graph.add_node("do_research", lambda s: {"outline": body[: content_size // 4]})
+    graph.add_node("generate_title", lambda s: {"title": "Benchmark title"})
+    graph.add_node("write_blog", lambda s: {"content": body})
+    graph.add_node("edit_blog", lambda s: {"refined_content": body})
+    graph.add_edge(START, "do_research")
+    graph.add_edge(START, "generate_title")
+    graph.add_edge(["do_research", "generate_title"], "write_blog")
+    graph.add_edge("write_blog", "edit_blog")
+    graph.add_edge("edit_blog", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def make_saver(kind: str, path: str):
+    if kind == "shared":
+        # Previous get_checkpointer(): one connection behind one lock
+        return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+    return PooledSqliteSaver(path)
+
+
+def run(kind: str, workflows: int, runs: int, content_size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        saver = make_saver(kind, path)
+        graph = build_graph(saver, content_size)
+
+        def one(i: int):
+            config = {"configurable": {"thread_id": f"bench_{i}"}}
+            graph.invoke({"topic": f"topic {i}", "title": "", "outline": "",
+                          "content": "", "refined_content": ""}, config)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workflows) as pool:
+            list(pool.map(one, range(runs)))
+        elapsed = time.perf_counter() - start
+
+        conn = sqlite3.connect(path)
+        checkpoints = conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        writes = conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+        conn.close()
+        if isinstance(saver, PooledSqliteSaver):
+            saver.close()
+        else:
+            saver.conn.close()
+
+    return {
+        "saver": kind,
+        "workflows": workflows,
+        "elapsed": elapsed,
+        "checkpoints_per_sec": checkpoints / elapsed,
+        "writes_per_sec": writes / elapsed,
+        "workflows_per_sec": runs / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflows", type=int, nargs="+", default=[1, 4, 16],
+                        help="simultaneous workflows to test")
+    parser.add_argument("--runs", type=int, default=40, help="workflows executed per measurement")
+    parser.add_argument("--content-size", type=int, default=4000, help="characters per blog body")
+    args = parser.parse_args()
+
+    print(f"{'saver':<8} {'workflows':>9} {'seconds':>8} {'ckpt/s':>9} {'writes/s':>9} {'wf/s':>7}")
+    print("-" * 56)
+    for workflows in args.workflows:
+        for kind in ("shared", "pooled"):
+            r = run(kind, workflows, max(args.runs, workflows), args.content_size)
+            print(f"{r['saver']:<8} {r['workflows']:>9} {r['elapsed']:>8.2f} "
+                  f"{r['checkpoints_per_sec']:>9.1f} {r['writes_per_sec']:>9.1f} {r['workflows_per_sec']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Offline benchmark of the full generation pipeline
+Runs the real FastAPI app in-process with:
+- fake_llm.FakeChatModel in place of Ollama (simulated latency / token rate)
+- SQLite in place of MySQL (DATABASE_URL) and a throwaway checkpoint file
+and reports per-node latency, end-to-end p50/p95/p99, checkpoint overhead
+and throughput for each worker-pool size. No network access is needed.
+
+Usage:
+    python bench_pipeline.py --concurrency 1 4 8 --blogs 24
+    python bench_pipeline.py --json results.json
+    python bench_pipeline.py --writer-mode sectioned --response-sections 4
+    python bench_pipeline.py --baseline results.json --tolerance 0.2   # exit 1 on regression
+    python bench_pipeline.py --failure-rate 0.1 --fault-seed 1   # inject LLM faults (retries)
+"""
+from collections import defaultdict
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values) -> dict:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+    }
+
+
+class Timings:
+    """Thread-safe collection of named duration samples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.samples[name].append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.samples = defaultdict(list)
+
+    def timed(self, name: str, func):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start)
+        wrapper.__name__ = getattr(func, "__name__", name)
+        return wrapper
+
+
+def setup_environment(workdir: str, writer_mode: str = "single", sections: int = 0,
+                      response_tokens: int = 0):
+    """Point every storage layer at throwaway local files"""
+    os.environ["WRITER_MODE"] = writer_mode
+    if sections:
+        # Same total post length in both modes
+        os.environ["WRITER_SECTION_WORDS"] = str(max(1, response_tokens // sections))
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'blog.db')}"
+    os.environ["CHECKPOINT_DB_PATH"] = os.path.join(workdir, "workflow.db")
+    os.environ["LLM_CACHE_ENABLED"] = "false"
+    # Benchmark topics differ by a number only; keep every blog a full generation
+    os.environ["TOPIC_INDEX_ENABLED"] = "false"
+    os.environ["CHECKPOINT_MAINTENANCE_INTERVAL_HOURS"] = "0"
+    os.environ["STATS_CACHE_SECONDS"] = "0"
+    # Injected faults are retried inside the node only; a job that still
+    # fails counts as an error instead of being re-queued behind the timer
+    os.environ.setdefault("NODE_RETRY_INITIAL_SECONDS", "0.05")
+    os.environ.setdefault("GENERATION_MAX_ATTEMPTS", "1")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Every request comes from one client here; don't throttle it
+    os.environ.setdefault("GENERATE_RATE_PER_MINUTE", "0")
+    os.environ.setdefault("GENERATION_CLIENT_QUEUE_SIZE", "0")
+
+
+def instrument(timings: Timings, llm):
+    """Swap in the fake LLM and wrap graph nodes and checkpoint I/O with timers"""
+    import blog_agents
+    from checkpoint_store import PooledSqliteSaver
+
+    blog_agents.llm = llm
+    # create_blog_workflow looks the node functions up by name when it
+    # builds the graph, so wrapping the module attributes is enough
+    for node, attr in (("do_research", "research_agent"), ("generate_title", "title_agent"),
+                       ("write_blog", "writer_agent"), ("edit_blog", "editor_agent")):
+        setattr(blog_agents, attr, timings.timed(f"node:{node}", getattr(blog_agents, attr)))
+    for method in ("get_tuple", "put", "put_writes"):
+        original = getattr(PooledSqliteSaver, method)
+        setattr(PooledSqliteSaver, method, timings.timed(f"checkpoint:{method}", original))
+
+
+def wait_for_jobs(queue, job_ids, timeout: float):
+    from job_queue import JobState
+    deadline = time.time() + timeout
+    pending = set(job_ids)
+    while pending and time.time() < deadline:
+        pending = {j for j in pending if queue.get(j).state in (JobState.QUEUED, JobState.RUNNING)}
+        time.sleep(0.02)
+    if pending:
+        raise TimeoutError(f"{len(pending)} generations did not finish within {timeout}s")
+
+
+def run_level(workers: int, blogs: int, timings: Timings, timeout: float) -> dict:
+    import main
+    from job_queue import JobQueue
+    from fastapi.testclient import TestClient
+
+    timings.reset()
+    main.generation_queue = JobQueue(name="generation", workers=workers, max_size=max(blogs, 1),
+                                     lanes=main.GENERATION_LANES)
+
+    with TestClient(main.app) as client:
+        start = time.perf_counter()
+        submitted = {}
+        for i in range(blogs):
+            t0 = time.time()
+            response = client.post("/api/generate", json={"topic": f"benchmark topic {workers}-{i}"})
+            timings.add("api:generate", time.time() - t0)
+            response.raise_for_status()
+            submitted[response.json()["thread_id"]] = (response.json()["id"], t0)
+
+        wait_for_jobs(main.generation_queue, submitted, timeout)
+        generation_elapsed = time.perf_counter() - start
+
+        errors = 0
+        for thread_id, (_, t0) in submitted.items():
+            job = main.generation_queue.get(thread_id)
+            if job.error:
+                errors += 1
+            timings.add("e2e:generate", job.finished_at - t0)
+            timings.add("queue:wait", job.started_at - job.submitted_at)
+
+        for blog_id, _ in submitted.values():
+            t0 = time.perf_counter()
+            client.post(f"/api/blogs/{blog_id}/review", json={"action": "approve"}).raise_for_status()
+            timings.add("api:review", time.perf_counter() - t0)
+
+    samples = dict(timings.samples)
+    checkpoint_total = sum(sum(v) for k, v in samples.items() if k.startswith("checkpoint:"))
+    return {
+        "workers": workers,
+        "blogs": blogs,
+        "errors": errors,
+        "elapsed_seconds": generation_elapsed,
+        "throughput_blogs_per_min": blogs / generation_elapsed * 60,
+        "checkpoint_seconds_per_blog": checkpoint_total / blogs,
+        "timings": {name: summarize(values) for name, values in sorted(samples.items())},
+    }
+
+
+def print_level(result: dict):
+    print(f"\n=== workers={result['workers']}  blogs={result['blogs']}  errors={result['errors']} ===")
+    print(f"throughput: {result['throughput_blogs_per_min']:.1f} blogs/min   "
+          f"checkpoint overhead: {result['checkpoint_seconds_per_blog'] * 1000:.1f} ms/blog")
+    print(f"{'metric':<26} {'count':>6} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, s in result["timings"].items():
+        print(f"{name:<26} {s['count']:>6} {s['mean'] * 1000:>9.1f} {s['p50'] * 1000:>9.1f} "
+              f"{s['p95'] * 1000:>9.1f} {s['p99'] * 1000:>9.1f}")
+
+
+def compare(results, baseline_path: str, tolerance: float) -> bool:
+    """True if no level regressed beyond tolerance versus the baseline file"""
+    with open(baseline_path) as f:
+        baseline = {r["workers"]: r for r in json.load(f)["results"]}
+    ok = True
+    print(f"\n=== comparison with {baseline_path} (tolerance {tolerance:.0%}) ===")
+    for r in results:
+        base = baseline.get(r["workers"])
+        if not base:
+            continue
+        p95, base_p95 = r["timings"]["e2e:generate"]["p95"], base["timings"]["e2e:generate"]["p95"]
+        tput, base_tput = r["throughput_blogs_per_min"], base["throughput_blogs_per_min"]
+        regressed = p95 > base_p95 * (1 + tolerance) or tput < base_tput * (1 - tolerance)
+        ok = ok and not regressed
+        print(f"workers={r['workers']}: e2e p95 {base_p95:.3f}s -> {p95:.3f}s, "
+              f"throughput {base_tput:.1f} -> {tput:.1f} blogs/min {'REGRESSION' if regressed else 'ok'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="generation worker counts")
+    parser.add_argument("--blogs", type=int, default=16, help="blogs generated per concurrency level")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="fake LLM generation speed")
+    parser.add_argument("--response-tokens", type=int, default=120, help="tokens per fake LLM response")
+    parser.add_argument("--response-sections", type=int, default=0,
+                        help="lay fake LLM responses out as this many numbered outline points")
+    parser.add_argument("--writer-mode", choices=["single", "sectioned"], default="single",
+                        help="WRITER_MODE used for the run")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="fraction of fake LLM calls that fail with a connection error")
+    parser.add_argument("--fault-seed", type=int, help="seed of the injected fault sequence")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for one level")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="blog_bench_")
+    setup_environment(workdir, args.writer_mode, args.response_sections, args.response_tokens)
+
+    from fake_llm import FakeChatModel
+    timings = Timings()
+    instrument(timings, FakeChatModel(
+        first_token_latency=args.first_token_latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        response_sections=args.response_sections,
+        failure_rate=args.failure_rate,
+        fault_seed=args.fault_seed,
+    ))
+
+    results = []
+    for workers in args.concurrency:
+        result = run_level(workers, args.blogs, timings, args.timeout)
+        print_level(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Throughput of the API with 1, 2, 4... uvicorn worker processes
+For each worker count it starts `uvicorn main:app --workers N` on fresh
+SQLite files (blog_posts, job_leases and the checkpoint database are shared
+by all workers, as they would be on one host) against ollama_stub.py, then:
+- submits --blogs generations and waits until every one has finished
+- approves every blog, each review going to whichever worker accepts the
+  connection, and waits until every workflow checkpoint shows the decision
+- checks each blog was generated exactly once (blog_daily_stats.generated)
+Reports completed blogs per second. Every worker process runs
+MAX_CONCURRENT_GENERATIONS generations at a time, so throughput should grow
+with the worker count until the LLM or the shared database saturates.
+
+Usage:
+    python bench_workers.py --workers 1 2 4 --blogs 24
+    python bench_workers.py --concurrency 1 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_api import free_port
+from bench_pipeline import setup_environment
+
+
+def wait_for(url: str, timeout: float, process: subprocess.Popen):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args[1:3])} exited with code {process.returncode}")
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def poll_until(check, timeout: float, interval: float = 0.25):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await check():
+            return True
+        await asyncio.sleep(interval)
+    return False
+
+
+async def drive(base_url: str, args) -> dict:
+    import httpx
+
+    # A fresh connection per write request, so submissions and reviews spread
+    # over the workers like requests from many clients would
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client, \
+            httpx.AsyncClient(base_url=base_url, timeout=60,
+                              limits=httpx.Limits(max_keepalive_connections=0)) as writer:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            writer.post("/api/generate", json={"topic": f"scaling topic {i}", "use_cache": False})
+            for i in range(args.blogs)
+        ))
+        blog_ids = []
+        for response in responses:
+            response.raise_for_status()
+            blog_ids.append(response.json()["id"])
+
+        pending = set(blog_ids)
+        failed = []
+
+        async def generated():
+            for blog_id in list(pending):
+                blog = (await client.get(f"/api/blogs/{blog_id}")).json()
+                if blog["title"] != "Generating...":
+                    pending.discard(blog_id)
+                    if blog["status"] != "pending":
+                        failed.append(blog_id)
+            return not pending
+
+        if not await poll_until(generated, args.timeout):
+            raise TimeoutError(f"{len(pending)} blog(s) still generating after {args.timeout:.0f}s")
+        generate_seconds = time.perf_counter() - start
+
+        for blog_id in blog_ids:
+            if blog_id not in failed:
+                (await writer.post(f"/api/blogs/{blog_id}/review", json={"action": "approve"})).raise_for_status()
+
+        unreviewed = {blog_id for blog_id in blog_ids if blog_id not in failed}
+
+        async def reviewed():
+            for blog_id in list(unreviewed):
+                state = (await client.get(f"/api/blogs/{blog_id}/state")).json()
+                if state.get("approval_status") == "approved" and not state.get("next_nodes"):
+                    unreviewed.discard(blog_id)
+            return not unreviewed
+
+        if not await poll_until(reviewed, args.timeout):
+            raise TimeoutError(f"{len(unreviewed)} review(s) not applied to the workflow after {args.timeout:.0f}s")
+        total_seconds = time.perf_counter() - start
+
+        stats = (await client.get("/api/stats", params={"days": 1})).json()
+        generated_count = sum(day["generated"] for day in stats["throughput"])
+    return {
+        "blogs": args.blogs,
+        "failed": len(failed),
+        "generated_count": generated_count,
+        "exactly_once": generated_count == args.blogs - len(failed),
+        "generate_seconds": round(generate_seconds, 2),
+        "total_seconds": round(total_seconds, 2),
+        "blogs_per_second": round(args.blogs / total_seconds, 3),
+    }
+
+
+def run_level(workers: int, stub_url: str, args) -> dict:
+    workdir = tempfile.mkdtemp(prefix=f"bench_workers_{workers}_")
+    setup_environment(workdir)
+    env = dict(os.environ)
+    env.update({
+        "OLLAMA_BASE_URL": stub_url,
+        "MAX_CONCURRENT_GENERATIONS": str(args.concurrency),
+        "GENERATION_QUEUE_SIZE": str(args.blogs + 10),
+        "PROMETHEUS_MULTIPROC_DIR": os.path.join(workdir, "metrics"),
+    })
+    os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"])
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    try:
+        wait_for(f"http://127.0.0.1:{port}/api/stats", 120, server)
+        result = asyncio.run(drive(f"http://127.0.0.1:{port}", args))
+    finally:
+        stop(server)
+    result["workers"] = workers
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker process counts to compare")
+    parser.add_argument("--blogs", type=int, default=24, help="generations per worker count")
+    parser.add_argument("--concurrency", type=int, default=2, help="MAX_CONCURRENT_GENERATIONS per worker")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for generations / reviews")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="stub LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="stub LLM generation speed")
+    parser.add_argument("--response-tokens", type=int, default=120, help="tokens per stub LLM response")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    stub = subprocess.Popen([
+        sys.executable, "ollama_stub.py", "--port", str(stub_port), "--load-seconds", "0",
+        "--models", os.getenv("OLLAMA_MODEL", "qwen2.5:0.5b"), "nomic-embed-text",
+        "--first-token-latency", str(args.first_token_latency),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--response-tokens", str(args.response_tokens),
+    ], cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL)
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    results = []
+    try:
+        wait_for(f"{stub_url}/api/version", 30, stub)
+        for workers in args.workers:
+            result = run_level(workers, stub_url, args)
+            results.append(result)
+            print(f"workers={workers}: {result['blogs']} blogs in {result['total_seconds']}s "
+                  f"({result['blogs_per_second']} blogs/s, generation {result['generate_seconds']}s), "
+                  f"failed={result['failed']}, exactly once={result['exactly_once']}", flush=True)
+    finally:
+        stop(stub)
+
+    base = results[0]["blogs_per_second"] if results else 0
+    for result in results:
+        result["speedup"] = round(result["blogs_per_second"] / base, 2) if base else None
+    print("\nworkers  blogs/s  speedup")
+    for result in results:
+        print(f"{result['workers']:>7}  {result['blogs_per_second']:>7}  {result['speedup']:>7}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
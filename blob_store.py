@@ -0,0 +1,284 @@
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+import os
+
+from metrics import BLOB_READS
+
+try:
+    import zstandard
+except ImportError:  # zlib fallback
+    zstandard = None
+
+# -----------------------------
+# Content-Addressed Blob Storage
+# -----------------------------
+# Every checkpoint of a workflow thread carries the full state, so the blog
+# body (content, refined_content, the sections) used to be stored again by
+# every node that ran after write_blog. Strings of BLOB_MIN_BYTES or more are
+# now moved out of checkpoints and pending writes into the content_blobs
+# table of the checkpoint database: compressed, keyed by their SHA-256 and
+# stored once however many checkpoints (or threads) reference them. The
+# serialized state keeps a {"__blob__": "<hash>"} marker in their place.
+#
+# Blobs are only fetched and decompressed when a checkpoint is loaded, and
+# decoded texts are kept in a small LRU cache.
+
+BLOB_CODEC = os.getenv("BLOB_CODEC") or ("zstd" if zstandard else "zlib")
+BLOB_COMPRESSION_LEVEL = int(os.getenv("BLOB_COMPRESSION_LEVEL", "3" if BLOB_CODEC == "zstd" else "6"))
+# Strings shorter than this stay inline in the checkpoint
+BLOB_MIN_BYTES = int(os.getenv("BLOB_MIN_BYTES", "1024"))
+# Decoded texts kept in memory (per process)
+BLOB_CACHE_ENTRIES = int(os.getenv("BLOB_CACHE_ENTRIES", "512"))
+
+CODECS = ("zstd", "zlib", "none")
+BLOB_KEY = "__blob__"
+# Prefix added to the serializer type of payloads that contain blob markers;
+# payloads without it are read exactly as before
+TYPE_PREFIX = "blob+"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS content_blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    touched_at REAL NOT NULL
+)
+"""
+
+if BLOB_CODEC not in CODECS:
+    raise ValueError(f"BLOB_CODEC must be one of {', '.join(CODECS)}, got {BLOB_CODEC!r}")
+if BLOB_CODEC == "zstd" and zstandard is None:
+    raise ValueError("BLOB_CODEC=zstd needs the zstandard package")
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def compress(data: bytes, codec: str = BLOB_CODEC, level: int = BLOB_COMPRESSION_LEVEL) -> Tuple[str, bytes]:
+    """(codec, payload); falls back to "none" when compression does not help"""
+    if codec == "zstd":
+        packed = zstandard.ZstdCompressor(level=level).compress(data)
+    elif codec == "zlib":
+        packed = zlib.compress(data, level)
+    else:
+        return "none", data
+    return (codec, packed) if len(packed) < len(data) else ("none", data)
+
+
+def decompress(codec: str, payload: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if codec == "zlib":
+        return zlib.decompress(payload)
+    return payload
+
+
+def _is_ref(value: Any) -> bool:
+    return type(value) is dict and len(value) == 1 and BLOB_KEY in value
+
+
+def collect_refs(value: Any, refs: Set[str]) -> Set[str]:
+    """Add the hash of every blob marker inside value to refs"""
+    if _is_ref(value):
+        refs.add(value[BLOB_KEY])
+    elif type(value) in (list, tuple):
+        for item in value:
+            collect_refs(item, refs)
+    elif type(value) is dict:
+        for item in value.values():
+            collect_refs(item, refs)
+    return refs
+
+
+class BlobStore:
+    """Compressed, hash-keyed strings in the content_blobs table of a SQLite database"""
+
+    def __init__(self, connection: Callable[[], sqlite3.Connection], codec: str = BLOB_CODEC,
+                 level: int = BLOB_COMPRESSION_LEVEL, min_bytes: int = BLOB_MIN_BYTES,
+                 cache_entries: int = BLOB_CACHE_ENTRIES):
+        # connection() -> the calling thread's connection; blob rows are
+        # written in the same transaction as the checkpoint that uses them
+        self._connection = connection
+        self.codec = codec
+        self.level = level
+        self.min_bytes = min_bytes
+        self.cache_entries = cache_entries
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def setup(self):
+        conn = self._connection()
+        conn.execute(SCHEMA)
+        conn.commit()
+
+    # Write path
+    def put(self, text: str) -> str:
+        """Store text (if not stored yet) and return its hash"""
+        data = text.encode("utf-8")
+        key = content_hash(data)
+        conn = self._connection()
+        # Refreshing touched_at on every reference keeps garbage collection
+        # from deleting a blob that a checkpoint being written points to
+        if conn.execute("UPDATE content_blobs SET touched_at = ? WHERE hash = ?",
+                        (time.time(), key)).rowcount == 0:
+            codec, payload = compress(data, self.codec, self.level)
+            conn.execute(
+                "INSERT OR IGNORE INTO content_blobs (hash, codec, size, data, touched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, codec, len(data), payload, time.time()),
+            )
+        self._remember(key, text)
+        return key
+
+    def externalize(self, value: Any) -> Tuple[Any, bool]:
+        """
+        Copy of value with every large string replaced by a blob marker, and
+        whether anything was replaced (value itself is never modified)
+        """
+        if isinstance(value, str):
+            # Character count is a lower bound of the UTF-8 size
+            if len(value) < self.min_bytes and len(value.encode("utf-8")) < self.min_bytes:
+                return value, False
+            return {BLOB_KEY: self.put(value)}, True
+        if type(value) in (list, tuple):
+            items = [self.externalize(item) for item in value]
+            if not any(changed for _, changed in items):
+                return value, False
+            return type(value)(item for item, _ in items), True
+        if type(value) is dict and not _is_ref(value):
+            items = {key: self.externalize(item) for key, item in value.items()}
+            if not any(changed for _, changed in items.values()):
+                return value, False
+            return {key: item for key, (item, _) in items.items()}, True
+        return value, False
+
+    # Read path
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """hash -> text, from the cache or the database; LookupError if one is missing"""
+        texts, missing = {}, []
+        with self._cache_lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    texts[key] = self._cache[key]
+                else:
+                    missing.append(key)
+        if texts:
+            BLOB_READS.labels("cache").inc(len(texts))
+        if missing:
+            placeholders = ", ".join("?" * len(missing))
+            rows = self._connection().execute(
+                f"SELECT hash, codec, data FROM content_blobs WHERE hash IN ({placeholders})", missing
+            ).fetchall()
+            for key, codec, payload in rows:
+                texts[key] = decompress(codec, payload).decode("utf-8")
+                self._remember(key, texts[key])
+            BLOB_READS.labels("db").inc(len(rows))
+            lost = set(missing) - texts.keys()
+            if lost:
+                raise LookupError(f"Content blob(s) missing from the checkpoint database: {', '.join(sorted(lost))}")
+        return texts
+
+    def resolve(self, value: Any) -> Any:
+        """value with every blob marker replaced by its text"""
+        refs = collect_refs(value, set())
+        return self._substitute(value, self.get_many(refs)) if refs else value
+
+    def _substitute(self, value: Any, texts: Dict[str, str]) -> Any:
+        if _is_ref(value):
+            return texts[value[BLOB_KEY]]
+        if type(value) in (list, tuple):
+            return type(value)(self._substitute(item, texts) for item in value)
+        if type(value) is dict:
+            return {key: self._substitute(item, texts) for key, item in value.items()}
+        return value
+
+    def _remember(self, key: str, text: str):
+        if self.cache_entries <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+
+
+class BlobSerializer:
+    """
+    Checkpoint serializer that moves large strings into a BlobStore
+    Wraps another serializer (JsonPlusSerializer by default): checkpoints have
+    their channel_values externalized, pending writes their value.
+    """
+
+    def __init__(self, store: BlobStore, serde: Optional[Any] = None):
+        self.store = store
+        self.serde = serde or JsonPlusSerializer()
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if type(obj) is dict and "channel_values" in obj:
+            values, changed = self.store.externalize(obj["channel_values"])
+            if changed:
+                obj = {**obj, "channel_values": values}
+        else:
+            obj, changed = self.store.externalize(obj)
+        type_, payload = self.serde.dumps_typed(obj)
+        return (TYPE_PREFIX + type_ if changed else type_), payload
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if not type_.startswith(TYPE_PREFIX):
+            return self.serde.loads_typed(data)
+        obj = self.serde.loads_typed((type_[len(TYPE_PREFIX):], payload))
+        if type(obj) is dict and "channel_values" in obj:
+            return {**obj, "channel_values": self.store.resolve(obj["channel_values"])}
+        return self.store.resolve(obj)
+
+
+# -----------------------------
+# Garbage Collection
+# -----------------------------
+# Seconds a blob must have gone unreferenced before it may be deleted - longer
+# than any checkpoint write transaction
+BLOB_GC_MARGIN_SECONDS = float(os.getenv("BLOB_GC_MARGIN_SECONDS", "300"))
+
+
+def referenced_blobs(conn: sqlite3.Connection, serde: Optional[Any] = None) -> Set[str]:
+    """Hashes referenced by any checkpoint or pending write"""
+    serde = serde or JsonPlusSerializer()
+    refs: Set[str] = set()
+    for table, column in (("checkpoints", "checkpoint"), ("writes", "value")):
+        rows = conn.execute(f"SELECT type, {column} FROM {table} WHERE type LIKE ?", (TYPE_PREFIX + "%",))
+        for type_, payload in rows:
+            collect_refs(serde.loads_typed((type_[len(TYPE_PREFIX):], payload)), refs)
+    return refs
+
+
+def collect_garbage(conn: sqlite3.Connection, dry_run: bool = False,
+                    margin_seconds: float = BLOB_GC_MARGIN_SECONDS) -> Tuple[int, int]:
+    """
+    Delete blobs no checkpoint references any more and that have not been
+    referenced for margin_seconds; returns (blobs, stored bytes) removed
+    """
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'content_blobs'").fetchone():
+        return 0, 0
+    cutoff = time.time() - margin_seconds
+    live = referenced_blobs(conn)
+    stale = [
+        (key, size) for key, size in
+        conn.execute("SELECT hash, length(data) FROM content_blobs WHERE touched_at < ?", (cutoff,))
+        if key not in live
+    ]
+    if stale and not dry_run:
+        conn.executemany("DELETE FROM content_blobs WHERE hash = ? AND touched_at < ?",
+                         [(key, cutoff) for key, _ in stale])
+        conn.commit()
+    return len(stale), sum(size for _, size in stale)
@@ -1,26 +1,58 @@
-from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.sqlite import SqliteSaver
-from typing import TypedDict
+from langgraph.graph import StateGraph, START, END
+from typing import List, Optional, TypedDict
 from dotenv import load_dotenv
-import sqlite3
+from llm_cache import create_llm_cache_from_env, cache_bypass
+from checkpoint_store import create_checkpointer, CHECKPOINT_BACKEND
+from metrics import instrument_node, LLM_METRICS
+from llm_resilience import node_timeout, node_retry_policy, LLM_RESILIENCE
+from ollama_client import create_chat_model, OLLAMA_MODEL
+from model_router import ModelRouter, load_config
 import os
+import logging
+import re
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # -----------------------------
 # LLM Configuration
 # -----------------------------
-# Get Ollama URL from environment variable (set in docker-compose.yml)
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# Ollama URL, model, timeouts and connection pool: see ollama_client.py
+
+# Persistent response cache (None when LLM_CACHE_ENABLED=false)
+llm_cache = create_llm_cache_from_env()
 
-llm = ChatOllama(
-    model="qwen2.5:0.5b",
-    temperature=0.7,
-    base_url=OLLAMA_BASE_URL,
+llm = create_chat_model(OLLAMA_MODEL, temperature=0.7, cache=llm_cache)
+
+# Per-node / per-tier models (model_router.py); unrouted nodes use `llm`
+router = ModelRouter(
+    load_config(),
+    lambda model, temperature: create_chat_model(
+        model, temperature=0.7 if temperature is None else temperature, cache=llm_cache
+    )
 )
 
+
+def model_for(node: str, state: dict):
+    """Chat model a node uses for this request's tier"""
+    return router.model_for(node, state.get("tier")) or llm
+
+# -----------------------------
+# Writer Configuration
+# -----------------------------
+# "single": one prompt writes the whole post and one prompt edits it
+# "sectioned": the outline is split into sections that are written and
+# edited concurrently, then stitched together
+WRITER_MODE = os.getenv("WRITER_MODE", "single").lower()
+# Section LLM calls in flight at once (match OLLAMA_NUM_PARALLEL)
+WRITER_MAX_CONCURRENCY = int(os.getenv("WRITER_MAX_CONCURRENCY", "4"))
+# Outlines with more top-level points are folded into this many sections
+WRITER_MAX_SECTIONS = int(os.getenv("WRITER_MAX_SECTIONS", "8"))
+# Target length of each written section
+WRITER_SECTION_WORDS = int(os.getenv("WRITER_SECTION_WORDS", "200"))
+
 # -----------------------------
 # State Definition
 # -----------------------------
@@ -32,39 +64,117 @@ class BlogState(TypedDict):
     refined_content: str
     approval_status: str
     rejection_reason: str
+    sections: List[str]  # written sections (sectioned writer mode only)
+    tier: str  # model routing tier ("quality", "fast", ...)
+
+
+# -----------------------------
+# Outline Sections
+# -----------------------------
+# Top-level outline entries come in a few shapes from small models:
+# markdown headings, roman / arabic / letter numbering or bold lines.
+_OUTLINE_HEADINGS = (
+    ("markdown", re.compile(r"^(#{1,6})\s+\S")),
+    ("roman", re.compile(r"^[IVX]+[.)]\s+\S")),
+    ("number", re.compile(r"^\d+[.)]\s+\S")),
+    ("letter", re.compile(r"^[A-Z][.)]\s+\S")),
+    ("bold", re.compile(r"^\*\*[^*]+\*\*:?\s*$")),
+)
+
+
+def _heading_kind(line: str):
+    for kind, pattern in _OUTLINE_HEADINGS:
+        match = pattern.match(line)
+        if match:
+            # Each markdown depth is its own level
+            return (kind, len(match.group(1))) if kind == "markdown" else (kind, 0)
+    return None
+
+
+def split_outline(outline: str, max_sections: int = WRITER_MAX_SECTIONS) -> List[str]:
+    """
+    Split an outline into its top-level sections (heading plus sub-points)
+    The top level is the first heading style that occurs at least twice, so
+    a lone "# Outline for ..." title does not count. Returns [] when the
+    outline has fewer than two sections.
+    """
+    lines = outline.strip().splitlines()
+    kinds = [_heading_kind(line) for line in lines]
+    counts = {}
+    for kind in kinds:
+        if kind:
+            counts[kind] = counts.get(kind, 0) + 1
+    top = next((kind for kind in kinds if kind and counts[kind] >= 2), None)
+    if top is None:
+        return []
+
+    sections = []
+    for line, kind in zip(lines, kinds):
+        if kind == top:
+            sections.append([line])
+        elif sections and line.strip():
+            sections[-1].append(line)
+    sections = ["\n".join(section) for section in sections]
+
+    if len(sections) > max_sections:
+        # Fold the tail into the last section rather than dropping it
+        sections = sections[:max_sections - 1] + ["\n".join(sections[max_sections - 1:])]
+    return sections if len(sections) >= 2 else []
+
+
+def _section_configs(count: int) -> List[dict]:
+    """Per-section batch config: bounded concurrency and the section index for streaming"""
+    return [{"max_concurrency": WRITER_MAX_CONCURRENCY, "metadata": {"section": i}} for i in range(count)]
 
 # -----------------------------
 # Agents (Nodes)
 # -----------------------------
-def research_agent(state: BlogState) -> BlogState:
+# Each node returns only the keys it writes. research_agent and title_agent
+# run in the same superstep, so returning the whole state from either of them
+# would make LangGraph see two concurrent writes to every key.
+@instrument_node("do_research")
+@node_timeout("do_research")
+def research_agent(state: BlogState) -> dict:
     """Research and create outline"""
-    print(f"[AGENT] Research Agent: Creating outline for '{state['topic']}'")
+    if state.get("outline"):
+        # Seeded from a near-duplicate topic's earlier generation
+        logger.info(f"[AGENT] Research skipped, outline was seeded")
+        return {}
+    logger.debug(f"[AGENT] Research Agent: Creating outline for '{state['topic']}'")
     prompt = ChatPromptTemplate.from_template(
         "You are a research assistant. Create a detailed outline for a blog post about: {topic}\n\n"
         "Provide a structured outline with main points and subpoints."
     )
-    result = (prompt | llm).invoke({"topic": state["topic"]})
-    state["outline"] = result.content
-    print(f"[AGENT] Research complete")
-    return state
+    result = (prompt | model_for("do_research", state)).invoke({"topic": state["topic"]})
+    logger.info(f"[AGENT] Research complete")
+    return {"outline": result.content}
 
 
-def title_agent(state: BlogState) -> BlogState:
+@instrument_node("generate_title")
+@node_timeout("generate_title")
+def title_agent(state: BlogState) -> dict:
     """Generate blog title"""
-    print(f"[AGENT] Title Agent: Generating title")
+    logger.debug(f"[AGENT] Title Agent: Generating title")
     prompt = ChatPromptTemplate.from_template(
         "Based on this topic: {topic}\n\n"
         "Create a catchy, SEO-friendly blog post title. Return ONLY the title."
     )
-    result = (prompt | llm).invoke({"topic": state["topic"]})
-    state["title"] = result.content.strip()
-    print(f"[AGENT] Title generated: {state['title']}")
-    return state
+    result = (prompt | model_for("generate_title", state)).invoke({"topic": state["topic"]})
+    title = result.content.strip()
+    logger.info(f"[AGENT] Title generated: {title}")
+    return {"title": title}
 
 
-def writer_agent(state: BlogState) -> BlogState:
+@instrument_node("write_blog")
+@node_timeout("write_blog")
+def writer_agent(state: BlogState) -> dict:
     """Write blog content"""
-    print(f"[AGENT] Writer Agent: Writing blog")
+    if WRITER_MODE == "sectioned":
+        sections = split_outline(state["outline"])
+        if sections:
+            return _write_sections(state, sections)
+        logger.debug(f"[AGENT] Outline has no usable sections, writing in one pass")
+    logger.debug(f"[AGENT] Writer Agent: Writing blog")
     prompt = ChatPromptTemplate.from_template(
         "You are a professional blog writer.\n\n"
         "Topic: {topic}\n"
@@ -73,60 +183,120 @@ def writer_agent(state: BlogState) -> BlogState:
         "Write a well-structured blog post with introduction, body, and conclusion. "
         "Minimum 500 words."
     )
-    result = (prompt | llm).invoke({
+    result = (prompt | model_for("write_blog", state)).invoke({
         "topic": state["topic"],
         "title": state["title"],
         "outline": state["outline"]
     })
-    state["content"] = result.content
-    print(f"[AGENT] Writing complete ({len(state['content'])} chars)")
-    return state
+    logger.info(f"[AGENT] Writing complete ({len(result.content)} chars)")
+    return {"content": result.content, "sections": []}
 
 
-def editor_agent(state: BlogState) -> BlogState:
+def _write_sections(state: BlogState, sections: List[str]) -> dict:
+    """Write every outline section concurrently and stitch them in order"""
+    logger.debug(f"[AGENT] Writer Agent: Writing {len(sections)} sections "
+                 f"({WRITER_MAX_CONCURRENCY} at a time)")
+    prompt = ChatPromptTemplate.from_template(
+        "You are a professional blog writer working on one section of a longer blog post.\n\n"
+        "Topic: {topic}\n"
+        "Title: {title}\n"
+        "Sections of the post:\n{headings}\n\n"
+        "Write ONLY section {number} of {count}, about {words} words. Start with its heading "
+        "as a markdown '## ' heading and do not repeat other sections.\n\n"
+        "Section {number}:\n{section}"
+    )
+    headings = "\n".join(section.splitlines()[0] for section in sections)
+    results = (prompt | model_for("write_blog", state)).batch(
+        [
+            {
+                "topic": state["topic"],
+                "title": state["title"],
+                "headings": headings,
+                "number": i + 1,
+                "count": len(sections),
+                "words": WRITER_SECTION_WORDS,
+                "section": section,
+            }
+            for i, section in enumerate(sections)
+        ],
+        config=_section_configs(len(sections)),
+    )
+    written = [result.content.strip() for result in results]
+    content = "\n\n".join(written)
+    logger.info(f"[AGENT] Writing complete ({len(sections)} sections, {len(content)} chars)")
+    return {"content": content, "sections": written}
+
+
+@instrument_node("edit_blog")
+@node_timeout("edit_blog")
+def editor_agent(state: BlogState) -> dict:
     """Edit and refine content"""
-    print(f"[AGENT] Editor Agent: Refining content")
+    skip_under = router.skip_edit_under_words(state.get("tier"))
+    if skip_under and len(state["content"].split()) < skip_under:
+        # Short drafts in this tier go to review unedited
+        logger.info(f"[AGENT] Editing skipped (under {skip_under} words) - READY FOR HUMAN REVIEW")
+        return {"refined_content": state["content"], "approval_status": "pending"}
+    if state.get("sections"):
+        return _edit_sections(state)
+    logger.debug(f"[AGENT] Editor Agent: Refining content")
     prompt = ChatPromptTemplate.from_template(
         "You are an editor. Improve the following blog post:\n\n"
         "Title: {title}\n\n"
         "{content}\n\n"
         "Fix grammar, improve clarity, and enhance readability."
     )
-    result = (prompt | llm).invoke({
+    result = (prompt | model_for("edit_blog", state)).invoke({
         "title": state["title"],
         "content": state["content"]
     })
-    state["refined_content"] = result.content
-    state["approval_status"] = "pending"
-    print(f"[AGENT] Editing complete - READY FOR HUMAN REVIEW")
-    return state
+    logger.info(f"[AGENT] Editing complete - READY FOR HUMAN REVIEW")
+    return {"refined_content": result.content, "approval_status": "pending"}
+
 
+def _edit_sections(state: BlogState) -> dict:
+    """Edit each written section independently and stitch them in order"""
+    sections = state["sections"]
+    logger.debug(f"[AGENT] Editor Agent: Refining {len(sections)} sections")
+    prompt = ChatPromptTemplate.from_template(
+        "You are an editor. Improve the following section of the blog post \"{title}\":\n\n"
+        "{section}\n\n"
+        "Fix grammar, improve clarity, and enhance readability. Keep it about {words} words "
+        "and return only the improved section, keeping its heading."
+    )
+    results = (prompt | model_for("edit_blog", state)).batch(
+        [{"title": state["title"], "section": section, "words": WRITER_SECTION_WORDS} for section in sections],
+        config=_section_configs(len(sections)),
+    )
+    refined = "\n\n".join(result.content.strip() for result in results)
+    logger.info(f"[AGENT] Editing complete ({len(sections)} sections) - READY FOR HUMAN REVIEW")
+    return {"refined_content": refined, "approval_status": "pending"}
 
-def human_approval_node(state: BlogState) -> BlogState:
+
+def human_approval_node(state: BlogState) -> dict:
     """
     CHECKPOINT NODE - Execution pauses here
     This node will be interrupted before execution
     Human will update the state externally
     """
-    print(f"[CHECKPOINT] Human approval node - this should not execute during initial run")
-    print(f"[CHECKPOINT] Current approval status: {state.get('approval_status', 'pending')}")
-    print(f"[CHECKPOINT] Blog: '{state.get('title', 'N/A')}'")
+    logger.debug(f"[CHECKPOINT] Human approval node - this should not execute during initial run")
+    logger.debug(f"[CHECKPOINT] Current approval status: {state.get('approval_status', 'pending')}")
+    logger.debug(f"[CHECKPOINT] Blog: '{state.get('title', 'N/A')}'")
     # This node just passes through - the actual update happens via update_state()
-    return state
+    return {}
 
 
-def finalize_approved(state: BlogState) -> BlogState:
+def finalize_approved(state: BlogState) -> dict:
     """Final node for approved blogs"""
-    print(f"[FINAL] Blog APPROVED: '{state['title']}'")
-    return state
+    logger.info(f"[FINAL] Blog APPROVED: '{state['title']}'")
+    return {}
 
 
-def handle_rejection(state: BlogState) -> BlogState:
+def handle_rejection(state: BlogState) -> dict:
     """Handle rejected blogs"""
     reason = state.get('rejection_reason', 'No reason provided')
-    print(f"[FINAL] Blog REJECTED: '{state['title']}'")
-    print(f"[FINAL] Rejection reason: {reason}")
-    return state
+    logger.info(f"[FINAL] Blog REJECTED: '{state['title']}'")
+    logger.debug(f"[FINAL] Rejection reason: {reason}")
+    return {}
 
 
 def route_approval(state: BlogState) -> str:
@@ -134,55 +304,59 @@ def route_approval(state: BlogState) -> str:
     Router function - decides next step based on approval_status
     """
     approval = state.get("approval_status", "pending")
-    print(f"[ROUTER] Checking approval status: {approval}")
+    logger.debug(f"[ROUTER] Checking approval status: {approval}")
     
     if approval == "approved":
-        print(f"[ROUTER] → Routing to APPROVED path")
+        logger.debug(f"[ROUTER] → Routing to APPROVED path")
         return "approved"
     elif approval == "rejected":
-        print(f"[ROUTER] → Routing to REJECTED path")
+        logger.debug(f"[ROUTER] → Routing to REJECTED path")
         return "rejected"
     else:
         # This shouldn't happen if workflow is properly paused
-        print(f"[ROUTER] Unexpected status '{approval}'")
+        logger.warning(f"[ROUTER] Unexpected status '{approval}'")
         return "approved"
 
 
 # -----------------------------
-# SQLite Checkpointer Setup
+# Checkpointer Setup
 # -----------------------------
 def get_checkpointer():
-    """Create SQLite checkpointer for persistent state"""
-    # Use real SQLite connection with check_same_thread=False for multi-process access
-    conn = sqlite3.connect("blog_workflow.db", check_same_thread=False)
-    return SqliteSaver(conn)
+    """Create the checkpointer for persistent state"""
+    # SQLite: one WAL-mode connection per worker thread instead of a single
+    # shared, lock-guarded connection. Postgres: a connection pool shared by
+    # every process and node (see checkpoint_store.py)
+    return create_checkpointer()
 
 
 # -----------------------------
 # Workflow Graph Builder
 # -----------------------------
 def create_blog_workflow():
-    """Create the workflow graph with SQLite checkpointing and HITL"""
-    print("[WORKFLOW] Creating workflow with SQLite checkpointer...")
+    """Create the workflow graph with checkpointing and HITL"""
+    logger.debug(f"[WORKFLOW] Creating workflow with {CHECKPOINT_BACKEND} checkpointer...")
     
-    # Create SQLite checkpointer
+    # Create checkpointer
     checkpointer = get_checkpointer()
     
     workflow = StateGraph(BlogState)
 
     # Add all nodes
-    workflow.add_node("do_research", research_agent)
-    workflow.add_node("generate_title", title_agent)
-    workflow.add_node("write_blog", writer_agent)
-    workflow.add_node("edit_blog", editor_agent)
+    # LLM nodes are retried with jittered backoff on transient errors (llm_resilience.py)
+    workflow.add_node("do_research", research_agent, retry_policy=node_retry_policy)
+    workflow.add_node("generate_title", title_agent, retry_policy=node_retry_policy)
+    workflow.add_node("write_blog", writer_agent, retry_policy=node_retry_policy)
+    workflow.add_node("edit_blog", editor_agent, retry_policy=node_retry_policy)
     workflow.add_node("human_approval", human_approval_node)
     workflow.add_node("finalize_approved", finalize_approved)
     workflow.add_node("handle_rejection", handle_rejection)
 
     # Set up the flow
-    workflow.set_entry_point("do_research")
-    workflow.add_edge("do_research", "generate_title")
-    workflow.add_edge("generate_title", "write_blog")
+    # Research and title only depend on the topic, so they fan out from START
+    # and run in parallel. write_blog waits for both branches to finish.
+    workflow.add_edge(START, "do_research")
+    workflow.add_edge(START, "generate_title")
+    workflow.add_edge(["do_research", "generate_title"], "write_blog")
     workflow.add_edge("write_blog", "edit_blog")
     workflow.add_edge("edit_blog", "human_approval")
     
@@ -206,7 +380,7 @@ def create_blog_workflow():
         interrupt_before=["human_approval"]
     )
     
-    print("[WORKFLOW] Workflow compiled with interrupt_before=['human_approval']")
+    logger.info("[WORKFLOW] Workflow compiled with interrupt_before=['human_approval']")
     return compiled
 
 
@@ -226,42 +400,88 @@ def get_workflow():
 # -----------------------------
 # Blog Generator Functions (HITL Pattern)
 # -----------------------------
-def generate_blog(topic: str, thread_id: str) -> dict:
+# Nodes whose LLM tokens are forwarded to stream listeners
+STREAM_TOKEN_NODES = ("write_blog", "edit_blog")
+
+
+def _stream_workflow(workflow, graph_input, config, on_event=None):
+    """
+    Run the workflow until it finishes or hits an interrupt, reporting
+    node transitions and writer/editor tokens to on_event as they happen
+    """
+    # LLM_METRICS records latency and token usage of every LLM call in the run;
+    # LLM_RESILIENCE enforces node deadlines and the circuit breaker
+    run_config = {**config, "callbacks": [LLM_METRICS, LLM_RESILIENCE]}
+    stream = workflow.stream(graph_input, run_config, stream_mode=["updates", "messages"])
+    for mode, chunk in stream:
+        if on_event is None:
+            continue
+        if mode == "updates":
+            for node, update in chunk.items():
+                if node.startswith("__"):
+                    # __interrupt__ marker, not a real node
+                    continue
+                event = {"type": "node", "node": node}
+                if isinstance(update, dict) and update.get("title"):
+                    event["title"] = update["title"]
+                on_event(event)
+        elif mode == "messages":
+            message, metadata = chunk
+            node = metadata.get("langgraph_node")
+            if node in STREAM_TOKEN_NODES and message.content:
+                event = {"type": "token", "node": node, "text": message.content}
+                if "section" in metadata:
+                    # Sectioned writer: tokens of concurrent sections interleave
+                    event["section"] = metadata["section"]
+                on_event(event)
+
+
+def generate_blog(topic: str, thread_id: str, on_event=None, use_cache: bool = True,
+                  outline: str = "", tier: Optional[str] = None) -> dict:
     """
     STEP 1: Start blog generation and STOP at human approval checkpoint
     This is the "before.py" equivalent - runs until interrupt
     Returns blog data in pending state
+
+    on_event, if given, is called with progress events while the graph runs:
+    {"type": "node", "node": ...} when a node finishes and
+    {"type": "token", "node": ..., "text": ...} for writer/editor tokens.
+    use_cache=False forces fresh LLM calls, bypassing the response cache.
+    A non-empty outline (e.g. from a near-duplicate topic) skips research.
+    tier selects the models of each node (model_router.py).
     """
-    print(f"\n{'='*60}")
-    print(f"[GENERATE] Starting blog generation (STEP 1: Before Human)")
-    print(f"[GENERATE] Topic: {topic}")
-    print(f"[GENERATE] Thread ID: {thread_id}")
-    print(f"{'='*60}\n")
+    logger.info(f"[GENERATE] Starting blog generation (STEP 1: Before Human)")
+    logger.debug(f"[GENERATE] Topic: {topic}")
+    logger.debug(f"[GENERATE] Thread ID: {thread_id}")
     
     workflow = get_workflow()
 
     initial_state: BlogState = {
         "topic": topic,
         "title": "",
-        "outline": "",
+        "outline": outline,
         "content": "",
         "refined_content": "",
         "approval_status": "pending",
-        "rejection_reason": ""
+        "rejection_reason": "",
+        "sections": [],
+        "tier": tier or router.default_tier
     }
 
     config = {"configurable": {"thread_id": thread_id}}
     
     # Run workflow - it will STOP at human_approval node (interrupt_before)
-    print(f"[GENERATE] Invoking workflow (will pause at human_approval)...")
-    result = workflow.invoke(initial_state, config)
+    logger.debug(f"[GENERATE] Streaming workflow (will pause at human_approval)...")
+    with cache_bypass(not use_cache):
+        _stream_workflow(workflow, initial_state, config, on_event)
     
     # Get current state to verify we're paused
     state = workflow.get_state(config)
-    print(f"\n[GENERATE] Workflow paused at checkpoint")
-    print(f"[GENERATE] Next node to execute: {state.next}")
-    print(f"[GENERATE] Current approval status: {result.get('approval_status', 'pending')}")
-    print(f"[GENERATE] Waiting for human decision via update_approval_status()...")
+    result = state.values
+    logger.info(f"[GENERATE] Workflow paused at checkpoint")
+    logger.debug(f"[GENERATE] Next node to execute: {state.next}")
+    logger.debug(f"[GENERATE] Current approval status: {result.get('approval_status', 'pending')}")
+    logger.debug(f"[GENERATE] Waiting for human decision via update_approval_status()...")
     
     return {
         "topic": result["topic"],
@@ -272,20 +492,54 @@ def generate_blog(topic: str, thread_id: str) -> dict:
     }
 
 
+def resume_blog(thread_id: str, on_event=None) -> dict:
+    """
+    Continue an interrupted STEP 1 from its last checkpoint
+    Nodes that already completed are not re-run. Returns blog data in
+    pending state, or None if the thread has no checkpoint at all.
+    """
+    logger.info(f"[RESUME] Recovering generation for thread: {thread_id}")
+    workflow = get_workflow()
+    config = {"configurable": {"thread_id": thread_id}}
+
+    state = workflow.get_state(config)
+    if not state.values:
+        logger.debug(f"[RESUME] No checkpoint found for {thread_id}")
+        return None
+
+    if "human_approval" in state.next:
+        logger.debug(f"[RESUME] Already paused at human_approval - nothing to run")
+    else:
+        logger.debug(f"[RESUME] Continuing from checkpoint, next nodes: {state.next}")
+        # None = continue from the saved checkpoint instead of starting over
+        _stream_workflow(workflow, None, config, on_event)
+        state = workflow.get_state(config)
+
+    result = state.values
+    return {
+        "topic": result["topic"],
+        "title": result["title"],
+        "content": result["refined_content"],
+        "approval_status": result.get("approval_status", "pending"),
+        "thread_id": thread_id
+    }
+
+
 def update_approval_status(thread_id: str, action: str, rejection_reason: str = None) -> dict:
     """
     STEP 2 & 3: Update approval status and RESUME workflow
     This combines "human.py" and "after.py":
     - Updates state as if human_approval node executed (human.py)
     - Resumes execution from that point (after.py)
+    Returns None without touching the checkpoint if the thread is not
+    paused at human_approval (e.g. it was already resumed), so a retried
+    review is harmless.
     """
-    print(f"\n{'='*60}")
-    print(f"[UPDATE] Human decision received (STEP 2: Human Input)")
-    print(f"[UPDATE] Thread ID: {thread_id}")
-    print(f"[UPDATE] Action: {action}")
+    logger.info(f"[UPDATE] Human decision received (STEP 2: Human Input)")
+    logger.debug(f"[UPDATE] Thread ID: {thread_id}")
+    logger.debug(f"[UPDATE] Action: {action}")
     if rejection_reason:
-        print(f"[UPDATE] Rejection reason: {rejection_reason}")
-    print(f"{'='*60}\n")
+        logger.debug(f"[UPDATE] Rejection reason: {rejection_reason}")
     
     workflow = get_workflow()
     config = {"configurable": {"thread_id": thread_id}}
@@ -296,48 +550,46 @@ def update_approval_status(thread_id: str, action: str, rejection_reason: str =
     if current_state is None:
         raise ValueError(f"No workflow found for thread_id: {thread_id}")
     
-    print(f"[UPDATE] Current state next nodes: {current_state.next}")
-    print(f"[UPDATE] Verifying we're at human_approval checkpoint...")
+    logger.debug(f"[UPDATE] Current state next nodes: {current_state.next}")
+    logger.debug(f"[UPDATE] Verifying we're at human_approval checkpoint...")
     
-    if current_state.next and "human_approval" not in str(current_state.next):
-        print(f"[UPDATE] Warning: Not at expected checkpoint. Next: {current_state.next}")
+    if "human_approval" not in current_state.next:
+        logger.warning(f"[UPDATE] Not paused at human_approval (next: {current_state.next}), skipping")
+        return None
     
     # Prepare the update values based on action
     if action == "approve":
         new_values = {"approval_status": "approved"}
-        print(f"[UPDATE] Setting approval_status = 'approved'")
+        logger.debug(f"[UPDATE] Setting approval_status = 'approved'")
     elif action == "reject":
         new_values = {
             "approval_status": "rejected",
             "rejection_reason": rejection_reason or "No reason provided"
         }
-        print(f"[UPDATE] Setting approval_status = 'rejected'")
+        logger.debug(f"[UPDATE] Setting approval_status = 'rejected'")
     else:
         raise ValueError(f"Invalid action: {action}. Must be 'approve' or 'reject'")
     
     # Update state AS IF we're at the human_approval node
     # This is the key HITL pattern from the documentation
-    print(f"[UPDATE] Calling update_state(as_node='human_approval')...")
+    logger.debug(f"[UPDATE] Calling update_state(as_node='human_approval')...")
     workflow.update_state(config, new_values, as_node="human_approval")
     
     # Verify the update
     updated_state = workflow.get_state(config)
-    print(f"[UPDATE] State updated successfully")
-    print(f"[UPDATE] Next nodes to execute: {updated_state.next}")
-    print(f"[UPDATE] Updated approval_status: {updated_state.values.get('approval_status')}")
+    logger.debug(f"[UPDATE] State updated successfully")
+    logger.debug(f"[UPDATE] Next nodes to execute: {updated_state.next}")
+    logger.debug(f"[UPDATE] Updated approval_status: {updated_state.values.get('approval_status')}")
     
     # STEP 3: Resume execution from the checkpoint (after.py equivalent)
-    print(f"\n{'='*60}")
-    print(f"[RESUME] Resuming workflow execution (STEP 3: After Human)")
-    print(f"{'='*60}\n")
+    logger.debug(f"[RESUME] Resuming workflow execution (STEP 3: After Human)")
     result = workflow.invoke(None, config)  # None = continue from checkpoint
     
     # Get final state
     final_state = workflow.get_state(config)
-    print(f"\n[RESUME] Workflow completed")
-    print(f"[RESUME] Final next nodes: {final_state.next}")
-    print(f"[RESUME] Final approval status: {result.get('approval_status')}")
-    print(f"{'='*60}\n")
+    logger.info(f"[RESUME] Workflow completed")
+    logger.debug(f"[RESUME] Final next nodes: {final_state.next}")
+    logger.debug(f"[RESUME] Final approval status: {result.get('approval_status')}")
     
     return {
         "topic": result["topic"],
@@ -349,6 +601,18 @@ def update_approval_status(thread_id: str, action: str, rejection_reason: str =
     }
 
 
+def delete_blog_checkpoints(thread_id: str):
+    """Remove every checkpoint of a thread (used when its blog is deleted)"""
+    get_workflow().checkpointer.delete_thread(thread_id)
+    logger.info(f"[CHECKPOINT] Deleted checkpoints for thread: {thread_id}")
+
+
+def get_blog_outline(thread_id: str) -> str:
+    """Outline from a workflow's latest checkpoint ("" if there is none)"""
+    state = get_workflow().get_state({"configurable": {"thread_id": thread_id}})
+    return state.values.get("outline", "") if state else ""
+
+
 def get_blog_state(thread_id: str) -> dict:
     """
     Get the current state of a blog workflow
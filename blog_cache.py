@@ -0,0 +1,97 @@
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import threading
+import time
+import os
+
+from metrics import BLOG_CACHE_LOOKUPS
+
+# -----------------------------
+# Blog Response Cache
+# -----------------------------
+# Approved blogs never change again (only deletion is left), and they are
+# the posts that get read over and over. GET /api/blogs/{id} keeps their
+# serialized response in a per-process LRU: a hit costs no query and no
+# serialization, and a matching If-None-Match costs nothing but the 304.
+# Entries are dropped when the blog is reviewed or deleted in this process;
+# BLOG_CACHE_TTL_SECONDS bounds how long another worker process can serve a
+# blog deleted elsewhere.
+
+BLOG_CACHE_ENTRIES = int(os.getenv("BLOG_CACHE_ENTRIES", "1024"))
+# 0 disables the cache
+BLOG_CACHE_TTL_SECONDS = float(os.getenv("BLOG_CACHE_TTL_SECONDS", "300"))
+
+
+def blog_etag(blog_id: int, revision: int) -> str:
+    """Strong ETag of a blog at a revision"""
+    return f'"blog-{blog_id}-r{revision}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, as RFC 9110 asks)"""
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class BlogCache:
+    """LRU of blog_id -> (etag, serialized response body) with a TTL"""
+
+    def __init__(self, max_entries: int = BLOG_CACHE_ENTRIES, ttl_seconds: float = BLOG_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, str, bytes]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, blog_id: int) -> Optional[Tuple[str, bytes]]:
+        """(etag, body) of a cached blog, or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(blog_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[blog_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(blog_id)
+                self.hits += 1
+        BLOG_CACHE_LOOKUPS.labels("miss" if entry is None else "hit").inc()
+        return None if entry is None else entry[1:]
+
+    def put(self, blog_id: int, etag: str, body: bytes):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[blog_id] = (time.monotonic() + self.ttl_seconds, etag, body)
+            self._entries.move_to_end(blog_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, blog_id: int):
+        with self._lock:
+            self._entries.pop(blog_id, None)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+blog_cache = BlogCache()
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from typing import Dict, List, Tuple
+
+# -----------------------------
+# Generation Event Broker
+# -----------------------------
+# Generation runs in a worker thread while SSE clients wait on the event loop,
+# so events are handed across with loop.call_soon_threadsafe().
+# Node transitions are kept per thread_id while the blog is generating, so a
+# client that connects late still sees which steps are already done. They are
+# dropped with the complete/error event, or by forget() when a job ends
+# without one (lease taken over, blog deleted). Tokens are not replayed.
+
+Subscriber = Tuple[asyncio.AbstractEventLoop, asyncio.Queue]
+
+_lock = threading.Lock()
+_subscribers: Dict[str, List[Subscriber]] = {}
+_history: Dict[str, List[dict]] = {}
+
+
+def publish(thread_id: str, event: dict):
+    """Send an event to every subscriber of a thread (safe from any thread)"""
+    with _lock:
+        if event["type"] == "node":
+            _history.setdefault(thread_id, []).append(event)
+        elif event["type"] in ("complete", "error"):
+            _history.pop(thread_id, None)
+        subscribers = list(_subscribers.get(thread_id, []))
+
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        except RuntimeError:
+            # Event loop already closed - client is gone
+            pass
+
+
+def forget(thread_id: str):
+    """Drop the replay history of a thread whose generation ended here"""
+    with _lock:
+        _history.pop(thread_id, None)
+
+
+def subscribe(thread_id: str) -> asyncio.Queue:
+    """Register the calling event loop for events of a thread"""
+    queue: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+    with _lock:
+        for event in _history.get(thread_id, []):
+            queue.put_nowait(event)
+        _subscribers.setdefault(thread_id, []).append((loop, queue))
+    return queue
+
+
+def unsubscribe(thread_id: str, queue: asyncio.Queue):
+    """Remove a subscriber queue"""
+    with _lock:
+        subscribers = _subscribers.get(thread_id, [])
+        _subscribers[thread_id] = [s for s in subscribers if s[1] is not queue]
+        if not _subscribers[thread_id]:
+            del _subscribers[thread_id]
@@ -0,0 +1,139 @@
+from sqlalchemy import column, literal_column, select, table, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+import logging
+import re
+
+from database import BlogPost, ApprovalStatus
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Full-Text Blog Search
+# -----------------------------
+# MySQL: FULLTEXT index ft_blog_search on (title, topic, content), queried
+# with MATCH ... AGAINST in natural language mode. SQLite: an FTS5 table
+# over the same columns, kept in step with blog_posts by triggers. Either
+# way ranking happens inside the database and only the requested page of
+# rows is read, so the cost does not grow with the size of blog_posts.
+
+FULLTEXT_INDEX = "ft_blog_search"
+FTS_TABLE = "blog_posts_fts"
+# Characters of content around the first match returned as a snippet
+SNIPPET_LENGTH = 200
+# Query words beyond this are ignored
+MAX_TERMS = 16
+
+# External-content FTS5 table: stores only the index, reads text from blog_posts.
+# Column weights for bm25() below: title, topic, content
+_FTS_WEIGHTS = (10.0, 5.0, 1.0)
+_SQLITE_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"title, topic, content, content='blog_posts', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON blog_posts BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, topic, content) VALUES (new.id, new.title, new.topic, new.content); "
+    f"END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON blog_posts BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, topic, content) "
+    f"VALUES ('delete', old.id, old.title, old.topic, old.content); "
+    f"END",
+    # Reviews only touch status columns and leave the index alone
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, topic, content ON blog_posts BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, topic, content) "
+    f"VALUES ('delete', old.id, old.title, old.topic, old.content); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, topic, content) VALUES (new.id, new.title, new.topic, new.content); "
+    f"END",
+)
+
+
+def create_search_index(engine: Engine):
+    """
+    Make sure the full-text index exists (startup)
+    Fresh MySQL databases get it from init.sql / create_all; older ones are
+    upgraded here. SQLite gets the FTS5 table, its triggers and a one-off
+    rebuild from the existing rows.
+    """
+    with engine.begin() as conn:
+        if engine.dialect.name == "mysql":
+            exists = conn.execute(
+                text("SHOW INDEX FROM blog_posts WHERE Key_name = :name"), {"name": FULLTEXT_INDEX}
+            ).first()
+            if not exists:
+                logger.info(f"[SEARCH] Creating FULLTEXT index {FULLTEXT_INDEX} (one-off, may take a while)")
+                conn.execute(text(f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON blog_posts (title, topic, content)"))
+        elif engine.dialect.name == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": FTS_TABLE}
+            ).first()
+            for ddl in _SQLITE_DDL:
+                conn.execute(text(ddl))
+            if not exists:
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+                logger.info(f"[SEARCH] Built {FTS_TABLE} from existing blog posts")
+        else:
+            logger.warning(f"[SEARCH] No full-text search support for {engine.dialect.name}")
+
+
+def query_terms(q: str) -> List[str]:
+    """Lower-cased words of a search query"""
+    return re.findall(r"\w+", q.lower())[:MAX_TERMS]
+
+
+def make_snippet(content: str, terms: List[str], length: int = SNIPPET_LENGTH) -> str:
+    """About `length` characters of content starting shortly before the first matching word"""
+    lowered = content.lower()
+    positions = []
+    for term in terms:
+        found = re.search(rf"\b{re.escape(term)}", lowered)
+        if found:
+            positions.append(found.start())
+    start = max(0, min(positions) - length // 4) if positions else 0
+    if start:
+        # Do not cut the first word in half
+        space = content.find(" ", start)
+        if 0 <= space < start + 20:
+            start = space + 1
+    end = start + length
+    snippet = content[start:end].strip()
+    return ("..." if start else "") + snippet + ("..." if end < len(content) else "")
+
+
+def search(db: Session, q: str, status: Optional[ApprovalStatus] = None,
+           exclude_title: Optional[str] = None, limit: int = 20,
+           offset: int = 0) -> Tuple[List[Tuple[BlogPost, float, str]], bool]:
+    """
+    Ranked (blog, score, snippet) matches for a query, best first, plus
+    whether more results follow. Higher scores are better on both backends.
+    """
+    terms = query_terms(q)
+    if not terms:
+        return [], False
+
+    if db.bind.dialect.name == "mysql":
+        score = match(BlogPost.title, BlogPost.topic, BlogPost.content, against=" ".join(terms))
+        score = score.in_natural_language_mode()
+        query = select(BlogPost, score.label("score")).where(score > 0)
+    else:
+        fts = table(FTS_TABLE, column("rowid"))
+        weights = ", ".join(str(w) for w in _FTS_WEIGHTS)
+        # bm25() is lower-is-better; quoting each word keeps FTS5 operators out
+        score = literal_column(f"-bm25({FTS_TABLE}, {weights})")
+        query = (
+            select(BlogPost, score.label("score"))
+            .join(fts, fts.c.rowid == BlogPost.id)
+            .where(text(f"{FTS_TABLE} MATCH :fts_query").bindparams(
+                fts_query=" OR ".join(f'"{term}"' for term in terms)
+            ))
+        )
+
+    if status is not None:
+        query = query.where(BlogPost.status == status)
+    if exclude_title is not None:
+        query = query.where(BlogPost.title != exclude_title)
+    rows = db.execute(
+        query.order_by(literal_column("score").desc(), BlogPost.id.desc()).offset(offset).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    return [(blog, float(score), make_snippet(blog.content, terms)) for blog, score in rows[:limit]], has_more
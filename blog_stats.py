@@ -0,0 +1,149 @@
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import threading
+import logging
+import time
+import os
+
+from database import BlogPost, BlogStatusCount, BlogDailyStats, ApprovalStatus
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Incrementally Maintained Blog Statistics
+# -----------------------------
+# /api/stats used to run four COUNT(*) scans of blog_posts on every call.
+# Instead, blog_status_counts and blog_daily_stats are adjusted in the same
+# transaction as the blog row change they describe, so reading them costs
+# the same no matter how large blog_posts grows. Callers add the adjustment
+# to their session and commit it together with their own change.
+
+# Seconds a computed /api/stats response is reused within this process
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "5"))
+
+_cache_lock = threading.Lock()
+_cache = {}
+
+
+def invalidate_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def adjust_status(db: Session, old: Optional[ApprovalStatus], new: Optional[ApprovalStatus],
+                  count: int = 1):
+    """Move `count` blogs between status counters (None = created / deleted)"""
+    if old == new or count == 0:
+        return
+    if old is not None:
+        db.execute(
+            update(BlogStatusCount)
+            .where(BlogStatusCount.status == old.value)
+            .values(count=BlogStatusCount.count - count)
+        )
+    if new is not None:
+        db.execute(
+            update(BlogStatusCount)
+            .where(BlogStatusCount.status == new.value)
+            .values(count=BlogStatusCount.count + count)
+        )
+    invalidate_cache()
+
+
+def _bump_day(db: Session, **increments):
+    """Add to today's throughput row, creating it on first use"""
+    day = _today()
+    values = {name: getattr(BlogDailyStats, name) + amount for name, amount in increments.items()}
+    result = db.execute(update(BlogDailyStats).where(BlogDailyStats.day == day).values(**values))
+    if result.rowcount:
+        return
+    try:
+        # Savepoint so a concurrent insert of the same day does not abort
+        # the caller's transaction
+        row = {"generated": 0, "approved": 0, "rejected": 0, "generation_seconds": 0.0}
+        row.update(increments)
+        with db.begin_nested():
+            db.add(BlogDailyStats(day=day, **row))
+    except IntegrityError:
+        db.execute(update(BlogDailyStats).where(BlogDailyStats.day == day).values(**values))
+
+
+def record_generated(db: Session, seconds: float):
+    """Count a finished generation and its wall time"""
+    _bump_day(db, generated=1, generation_seconds=seconds)
+    invalidate_cache()
+
+
+def record_review(db: Session, status: ApprovalStatus, count: int = 1):
+    """Count `count` approvals or rejections"""
+    if count == 0:
+        return
+    if status == ApprovalStatus.APPROVED:
+        _bump_day(db, approved=count)
+    elif status == ApprovalStatus.REJECTED:
+        _bump_day(db, rejected=count)
+    invalidate_cache()
+
+
+def rebuild_counters(db: Session, force: bool = False):
+    """
+    Seed blog_status_counts from a single GROUP BY over blog_posts
+    Runs at startup; a no-op once the counters exist unless force=True
+    """
+    if not force and db.query(BlogStatusCount).count() == len(ApprovalStatus):
+        return
+    counts = dict(db.query(BlogPost.status, func.count(BlogPost.id)).group_by(BlogPost.status).all())
+    db.query(BlogStatusCount).delete()
+    for status in ApprovalStatus:
+        db.add(BlogStatusCount(status=status.value, count=counts.get(status, 0)))
+    db.commit()
+    invalidate_cache()
+    logger.info(f"[STATS] Status counters rebuilt: { {s.value: counts.get(s, 0) for s in ApprovalStatus} }")
+
+
+def get_stats(db: Session, days: int = 7) -> dict:
+    """Status totals plus per-day throughput for the last `days` days"""
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(days)
+        if cached and now - cached[0] < STATS_CACHE_SECONDS:
+            return cached[1]
+
+    counts = {row.status: row.count for row in db.query(BlogStatusCount).all()}
+    since = _today() - timedelta(days=days - 1)
+    daily = (
+        db.query(BlogDailyStats)
+        .filter(BlogDailyStats.day >= since)
+        .order_by(BlogDailyStats.day)
+        .all()
+    )
+    generated = sum(d.generated for d in daily)
+    seconds = sum(d.generation_seconds for d in daily)
+
+    stats = {
+        "total": sum(counts.values()),
+        "pending": counts.get(ApprovalStatus.PENDING.value, 0),
+        "approved": counts.get(ApprovalStatus.APPROVED.value, 0),
+        "rejected": counts.get(ApprovalStatus.REJECTED.value, 0),
+        "avg_generation_seconds": round(seconds / generated, 2) if generated else None,
+        "throughput": [
+            {
+                "day": d.day.isoformat(),
+                "generated": d.generated,
+                "approved": d.approved,
+                "rejected": d.rejected,
+                "avg_generation_seconds": round(d.generation_seconds / d.generated, 2) if d.generated else None,
+            }
+            for d in daily
+        ],
+    }
+    with _cache_lock:
+        _cache[days] = (now, stats)
+    return stats
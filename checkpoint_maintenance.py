@@ -0,0 +1,166 @@
+"""
+Checkpoint retention and compaction for blog_workflow.db
+
+Retention policy:
+- Finished threads (blog approved or rejected): keep only the latest
+  checkpoint, which is all get_state() needs.
+- Threads whose blog row no longer exists (deleted blogs): delete everything.
+- Content blobs (blob_store.py) that no remaining checkpoint references:
+  delete them.
+- Afterwards VACUUM the file to hand the freed pages back to the OS.
+Threads that are still generating or waiting for review are never touched.
+
+Usage:
+    python checkpoint_maintenance.py --dry-run     # report only
+    python checkpoint_maintenance.py               # prune + VACUUM
+    python checkpoint_maintenance.py --no-vacuum   # prune only
+"""
+from typing import Dict, Iterable, Optional
+import argparse
+import logging
+import os
+import time
+
+from blob_store import collect_garbage
+from checkpoint_store import connect, CHECKPOINT_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+
+def _size_of(conn, table: str, where: str, params: tuple) -> tuple:
+    """(rows, payload bytes) matched by a WHERE clause"""
+    payload = "length(checkpoint) + length(metadata)" if table == "checkpoints" else "length(value)"
+    rows, size = conn.execute(
+        f"SELECT COUNT(*), COALESCE(SUM({payload}), 0) FROM {table} WHERE {where}", params
+    ).fetchone()
+    return rows, size
+
+
+def file_size(path: str) -> int:
+    """Database file plus its WAL, in bytes"""
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+def load_thread_statuses() -> Dict[str, str]:
+    """thread_id -> blog status for every row in blog_posts"""
+    from database import SessionLocal, BlogPost
+    db = SessionLocal()
+    try:
+        return {thread_id: status.value for thread_id, status in
+                db.query(BlogPost.thread_id, BlogPost.status).all()}
+    finally:
+        db.close()
+
+
+def prune_checkpoints(statuses: Optional[Dict[str, str]] = None, path: str = CHECKPOINT_DB_PATH,
+                      dry_run: bool = False, vacuum: bool = True) -> dict:
+    """
+    Apply the retention policy and return a report of what was (or, with
+    dry_run=True, would be) removed
+    Without `statuses` they are loaded after the threads are listed: a blog
+    created in between then has no thread in the list yet, rather than a
+    thread without a blog row (which would be wiped as deleted).
+    """
+    conn = connect(path)
+    report = {
+        "dry_run": dry_run,
+        "deleted_threads": 0,
+        "compacted_threads": 0,
+        "checkpoints_removed": 0,
+        "writes_removed": 0,
+        "payload_bytes_removed": 0,
+        "blobs_removed": 0,
+        "file_bytes_before": file_size(path),
+        "file_bytes_after": None,
+    }
+    try:
+        threads = [row[0] for row in conn.execute("SELECT DISTINCT thread_id FROM checkpoints")]
+        if statuses is None:
+            statuses = load_thread_statuses()
+        if threads and not statuses:
+            # An empty blog table next to a populated checkpoint file almost
+            # certainly means the wrong database - refuse to wipe everything
+            logger.warning("[MAINTENANCE] No blog rows found - skipping prune to be safe")
+            threads = []
+        for thread_id in threads:
+            status = statuses.get(thread_id)
+            if status is None:
+                # Blog deleted - drop the whole thread
+                where, params = "thread_id = ?", (thread_id,)
+                report["deleted_threads"] += 1
+            elif status in ("approved", "rejected"):
+                # Finished - keep only the newest checkpoint of each namespace
+                where = (
+                    "thread_id = ? AND checkpoint_id < ("
+                    "SELECT MAX(c.checkpoint_id) FROM checkpoints c "
+                    "WHERE c.thread_id = {t}.thread_id AND c.checkpoint_ns = {t}.checkpoint_ns)"
+                )
+                params = (thread_id,)
+            else:
+                continue
+
+            ckpt_where = where.format(t="checkpoints")
+            writes_where = where.format(t="writes")
+            ckpt_rows, ckpt_bytes = _size_of(conn, "checkpoints", ckpt_where, params)
+            write_rows, write_bytes = _size_of(conn, "writes", writes_where, params)
+            if status is not None and ckpt_rows:
+                report["compacted_threads"] += 1
+            report["checkpoints_removed"] += ckpt_rows
+            report["writes_removed"] += write_rows
+            report["payload_bytes_removed"] += ckpt_bytes + write_bytes
+
+            if not dry_run:
+                conn.execute(f"DELETE FROM writes WHERE {writes_where}", params)
+                conn.execute(f"DELETE FROM checkpoints WHERE {ckpt_where}", params)
+                conn.commit()
+
+        # In a dry run nothing was deleted, so this only finds blobs that are
+        # already orphaned
+        blobs, blob_bytes = collect_garbage(conn, dry_run=dry_run)
+        report["blobs_removed"] = blobs
+        report["payload_bytes_removed"] += blob_bytes
+
+        if not dry_run and vacuum:
+            conn.execute("VACUUM")
+            # In WAL mode VACUUM writes through the WAL - fold it back in
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+
+    report["file_bytes_after"] = report["file_bytes_before"] if dry_run else file_size(path)
+    return report
+
+
+def run_maintenance(dry_run: bool = False, vacuum: bool = True,
+                    statuses: Optional[Dict[str, str]] = None) -> dict:
+    """Prune the checkpoint file against the blog statuses in the database"""
+    start = time.perf_counter()
+    report = prune_checkpoints(statuses, dry_run=dry_run, vacuum=vacuum)
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"[MAINTENANCE] {format_report(report)}")
+    return report
+
+
+def format_report(report: dict) -> str:
+    mb = 1024 * 1024
+    verb = "would remove" if report["dry_run"] else "removed"
+    return (
+        f"{verb} {report['checkpoints_removed']} checkpoints and {report['writes_removed']} writes "
+        f"plus {report['blobs_removed']} content blobs "
+        f"({report['payload_bytes_removed'] / mb:.2f} MB payload) from "
+        f"{report['deleted_threads']} deleted and {report['compacted_threads']} finished threads; "
+        f"file {report['file_bytes_before'] / mb:.2f} MB -> {report['file_bytes_after'] / mb:.2f} MB"
+    )
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be removed without deleting")
+    parser.add_argument("--no-vacuum", action="store_true", help="skip VACUUM after pruning")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    run_maintenance(dry_run=args.dry_run, vacuum=not args.no_vacuum)
+
+
+if __name__ == "__main__":
+    main()
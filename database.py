@@ -1,15 +1,19 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Text, DateTime, Date, Float, Enum, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, object_session
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from datetime import datetime, timezone
 from urllib.parse import quote_plus
 import enum
 import os
+import logging
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Get database credentials from .env
 DB_NAME = os.getenv("DATABASE", "blog_db")
 DB_USER = os.getenv("DB_USER", "root")
@@ -21,11 +25,33 @@ DB_PASSWORD_ENCODED = quote_plus(DB_PASSWORD)
 
 # Database URL format
 # DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD_ENCODED}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-print(f"Connecting to database: {DB_NAME} at {DB_HOST}")
+# DATABASE_URL in the environment overrides the MySQL settings above, e.g.
+# sqlite:///bench.db for the offline benchmarks
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD_ENCODED}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Same database through an asyncio driver, for the API routes
+ASYNC_DRIVERS = {"mysql+pymysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+def async_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart"""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=10, max_overflow=20, pool_recycle=3600, echo=False)
+if DATABASE_URL.startswith("sqlite"):
+    logger.info(f"Connecting to database: {DATABASE_URL}")
+    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False, "timeout": 30}, echo=False)
+    async_engine = create_async_engine(async_url(DATABASE_URL), connect_args={"timeout": 30}, echo=False)
+else:
+    logger.info(f"Connecting to database: {DB_NAME} at {DB_HOST}")
+    engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=10, max_overflow=20, pool_recycle=3600, echo=False)
+    async_engine = create_async_engine(
+        async_url(DATABASE_URL), pool_pre_ping=True, pool_size=10, max_overflow=20, pool_recycle=3600, echo=False
+    )
+# Sync sessions: worker threads (generation, recovery, maintenance, startup)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async sessions: request handlers. expire_on_commit=False so rows stay
+# readable after commit without an implicit (and in asyncio illegal) refresh
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
 Base = declarative_base()
 
 class ApprovalStatus(enum.Enum):
@@ -33,6 +59,13 @@ class ApprovalStatus(enum.Enum):
     APPROVED = "approved"
     REJECTED = "rejected"
 
+# Characters of content shown in list excerpts
+EXCERPT_LENGTH = 200
+
+def make_excerpt(content: str) -> str:
+    """Stored excerpt - one extra character tells readers whether it was truncated"""
+    return content[:EXCERPT_LENGTH + 1]
+
 class BlogPost(Base):
     __tablename__ = "blog_posts"
     
@@ -41,19 +74,121 @@ class BlogPost(Base):
     topic = Column(String(255), nullable=False)
     title = Column(String(500), nullable=False)
     content = Column(Text, nullable=False)
+    # Start of content, written with it so list pages never read the body
+    excerpt = Column(String(EXCERPT_LENGTH + 1), nullable=True)
     status = Column(Enum(ApprovalStatus, native_enum=False, length=20), default=ApprovalStatus.PENDING, nullable=False)
-    created_at = Column(DateTime, default=datetime.now(timezone.utc))
+    # Callable default - a plain datetime would be frozen at import time
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     approved_at = Column(DateTime, nullable=True)
     rejection_reason = Column(Text, nullable=True)
+    # Set for blogs submitted through POST /api/generate/batch
+    batch_id = Column(String(32), nullable=True)
+    # Bumped on every change (see _bump_revision); GET responses use it as ETag
+    revision = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, nullable=True, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        # Keyset pagination of the blog list, with and without a status filter
+        Index("idx_created_at_id", "created_at", "id"),
+        Index("idx_status_created_at_id", "status", "created_at", "id"),
+        Index("idx_batch_id", "batch_id"),
+        # GET /api/blogs/search (SQLite uses an FTS5 table instead, see blog_search.py)
+        Index("ft_blog_search", "title", "topic", "content", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
+@event.listens_for(BlogPost, "before_update")
+def _bump_revision(mapper, connection, target):
+    """Every ORM update of a blog row moves it to a new revision"""
+    session = object_session(target)
+    if session is not None and not session.is_modified(target, include_collections=False):
+        return
+    target.revision = (target.revision or 0) + 1
+    target.updated_at = datetime.now(timezone.utc)
+
+class BlogBatch(Base):
+    """A group of blogs submitted together, scheduled with its own concurrency cap"""
+    __tablename__ = "blog_batches"
+
+    id = Column(String(32), primary_key=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    total = Column(Integer, nullable=False)
+    duplicates = Column(Integer, nullable=False, default=0)
+    concurrency = Column(Integer, nullable=False)
+
+class TopicEmbedding(Base):
+    """Embedding of a blog's topic, loaded into topic_index at startup"""
+    __tablename__ = "topic_embeddings"
+
+    blog_id = Column(Integer, primary_key=True)
+    # Vectors of different embedding models are not comparable
+    model = Column(String(100), nullable=False)
+    # float32 array bytes
+    vector = Column(LargeBinary, nullable=False)
+
+class JobLease(Base):
+    """Worker process that owns a generation job (or a singleton task) until expires_at"""
+    __tablename__ = "job_leases"
+
+    name = Column(String(255), primary_key=True)
+    owner = Column(String(128), nullable=False)
+    # Naive UTC
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("idx_job_leases_owner", "owner"),
+    )
+
+class BlogStatusCount(Base):
+    """Running number of blogs per status, kept in step with blog_posts"""
+    __tablename__ = "blog_status_counts"
+
+    status = Column(String(20), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class BlogDailyStats(Base):
+    """Per-day (UTC) generation and review throughput"""
+    __tablename__ = "blog_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    generated = Column(Integer, nullable=False, default=0)
+    approved = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    generation_seconds = Column(Float, nullable=False, default=0.0)
+
+# Columns models gained after their table was first released. create_all()
+# only creates missing tables, so init_db() adds these to existing ones.
+# An added excerpt stays NULL on old rows: the list query falls back to the
+# start of content, and migrate_blobs.py backfills it.
+ADDED_COLUMNS = {
+    "blog_posts": ["batch_id", "excerpt", "revision", "updated_at"],
+}
+
+def add_missing_columns():
+    """ALTER existing tables to add the ADDED_COLUMNS they lack"""
+    with engine.begin() as conn:
+        for table_name, names in ADDED_COLUMNS.items():
+            existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+            table = Base.metadata.tables[table_name]
+            for name in names:
+                if name in existing:
+                    continue
+                column = table.c[name]
+                ddl = f"ALTER TABLE {table_name} ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}"
+                if column.server_default is not None:
+                    # Existing rows take the default, so NOT NULL holds for them too
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                logger.info(f"Added column {table_name}.{name}")
 
 def init_db():
     Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully!")
+    add_missing_columns()
+    logger.info("Database tables created successfully!")
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    """FastAPI dependency: one AsyncSession per request"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
@@ -0,0 +1,201 @@
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.embeddings import Embeddings
+from pydantic import PrivateAttr
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import hashlib
+import random
+import re
+import threading
+import time
+
+# -----------------------------
+# Deterministic Fake Chat Model
+# -----------------------------
+# Stand-in for ChatOllama when benchmarking or developing offline. Output is
+# derived from a hash of the prompt, so the same prompt always yields the same
+# text, and timing follows a simple model: a fixed time to first token, then
+# tokens at a steady rate.
+# Faults can be injected to exercise retries, timeouts and the circuit
+# breaker: failed calls raise ConnectionError (what the Ollama client raises
+# when the server is unreachable), before the first token or part-way
+# through the stream, and stalled calls pause mid-stream.
+
+_WORDS = (
+    "remote work productivity teams async communication focus tools culture "
+    "balance trust results meetings documentation growth hiring flexibility "
+    "collaboration outcomes feedback onboarding autonomy clarity process"
+).split()
+
+
+_LENGTH_HINT = re.compile(r"about (\d+) words")
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with simulated latency and token rate, no network"""
+
+    model: str = "fake-model"
+    temperature: float = 0.0
+    # Seconds before the first token (prompt processing / model load)
+    first_token_latency: float = 0.2
+    # Generation speed once tokens start flowing
+    tokens_per_second: float = 200.0
+    # Number of whitespace-separated tokens in every response
+    response_tokens: int = 120
+    # When > 0, responses are laid out as this many numbered lines so they
+    # parse as an outline (sectioned writer benchmarks)
+    response_sections: int = 0
+    # Fault injection: every call fails while `down`, the first `fail_calls`
+    # calls fail, and after that each call fails with probability failure_rate
+    down: bool = False
+    fail_calls: int = 0
+    failure_rate: float = 0.0
+    # Probability that a call pauses for stall_seconds part-way through
+    stall_rate: float = 0.0
+    stall_seconds: float = 0.0
+    # Seed of the fault sequence (None = not reproducible)
+    fault_seed: Optional[int] = None
+
+    _fault_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _fault_rng: Optional[random.Random] = PrivateAttr(default=None)
+    _calls: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "temperature": self.temperature,
+            "first_token_latency": self.first_token_latency,
+            "tokens_per_second": self.tokens_per_second,
+            "response_tokens": self.response_tokens,
+            "response_sections": self.response_sections,
+        }
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(m.content) for m in messages)
+        seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+        rng = random.Random(seed)
+        # Honour "about N words" length hints (sectioned writer prompts)
+        hint = _LENGTH_HINT.search(prompt)
+        count = min(self.response_tokens, int(hint.group(1))) if hint else self.response_tokens
+        tokens = [rng.choice(_WORDS) for _ in range(count)]
+        if self.response_sections > 0:
+            per_section = max(1, len(tokens) // self.response_sections)
+            for number, i in enumerate(range(0, len(tokens), per_section)):
+                if number < self.response_sections:
+                    prefix = "\n" if i else ""
+                    tokens[i] = f"{prefix}{number + 1}. {tokens[i]}"
+        return tokens
+
+    def _faults(self, token_count: int) -> Tuple[Optional[int], Optional[int]]:
+        """Token index at which this call fails and at which it stalls (None = never)"""
+        with self._fault_lock:
+            if self._fault_rng is None:
+                self._fault_rng = random.Random(self.fault_seed)
+            rng = self._fault_rng
+            self._calls += 1
+            fail = self.down or self._calls <= self.fail_calls or rng.random() < self.failure_rate
+            stall = self.stall_seconds > 0 and rng.random() < self.stall_rate
+            fail_at = rng.choice((0, rng.randrange(max(1, token_count)))) if fail else None
+            stall_at = rng.randrange(max(1, token_count)) if stall else None
+        return fail_at, stall_at
+
+    def _usage(self, messages: List[BaseMessage], completion_tokens: int) -> dict:
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        tokens = self._tokens(messages)
+        fail_at, stall_at = self._faults(len(tokens))
+        time.sleep(self.first_token_latency)
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+        for i, token in enumerate(tokens):
+            if i == fail_at:
+                raise ConnectionError(f"Injected fault after {i} token(s)")
+            if i == stall_at:
+                time.sleep(self.stall_seconds)
+            text = token if i == 0 else f" {token}"
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text))
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+            if delay:
+                time.sleep(delay)
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", usage_metadata=self._usage(messages, len(tokens)), chunk_position="last"
+        ))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        tokens = self._tokens(messages)
+        fail_at, stall_at = self._faults(len(tokens))
+        if stall_at is not None:
+            time.sleep(self.stall_seconds)
+        if fail_at is not None:
+            time.sleep(self.first_token_latency)
+            raise ConnectionError("Injected fault")
+        if self.tokens_per_second > 0:
+            time.sleep(self.first_token_latency + len(tokens) / self.tokens_per_second)
+        else:
+            time.sleep(self.first_token_latency)
+        message = AIMessage(content=" ".join(tokens), usage_metadata=self._usage(messages, len(tokens)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+# -----------------------------
+# Deterministic Fake Embeddings
+# -----------------------------
+# Stand-in for OllamaEmbeddings. Each word is hashed into one of `size`
+# buckets (a bag-of-words "hashing trick" vector), so texts sharing words
+# score high on cosine similarity and paraphrases can be tested offline.
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in into is it of on or the to what "
+    "why with your you our we".split()
+)
+
+
+class FakeEmbeddings(Embeddings):
+    """Hashed bag-of-words embeddings, no network"""
+
+    def __init__(self, size: int = 256):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            if word in _STOPWORDS:
+                continue
+            # Crude stemming so "benefit" and "benefits" share a bucket
+            if len(word) > 3 and word.endswith("s"):
+                word = word[:-1]
+            bucket = int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16) % self.size
+            vector[bucket] += 1.0
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
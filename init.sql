@@ -16,13 +16,64 @@ CREATE TABLE IF NOT EXISTS blog_posts (
     topic VARCHAR(255) NOT NULL,
     title VARCHAR(500) NOT NULL,
     content TEXT NOT NULL,
+    excerpt VARCHAR(201) NULL,
     status VARCHAR(20) NOT NULL DEFAULT 'pending',
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     approved_at DATETIME NULL,
     rejection_reason TEXT NULL,
+    batch_id VARCHAR(32) NULL,
+    revision INT NOT NULL DEFAULT 1,
+    updated_at DATETIME NULL,
     INDEX idx_thread_id (thread_id),
     INDEX idx_status (status),
-    INDEX idx_created_at (created_at)
+    INDEX idx_created_at (created_at),
+    INDEX idx_created_at_id (created_at, id),
+    INDEX idx_status_created_at_id (status, created_at, id),
+    INDEX idx_batch_id (batch_id),
+    -- GET /api/blogs/search
+    FULLTEXT INDEX ft_blog_search (title, topic, content)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Running per-status totals, updated in the same transaction as blog_posts
+CREATE TABLE IF NOT EXISTS blog_status_counts (
+    status VARCHAR(20) PRIMARY KEY,
+    count INT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO blog_status_counts (status, count) VALUES
+    ('pending', 0), ('approved', 0), ('rejected', 0);
+
+-- Per-day (UTC) throughput and total generation time
+CREATE TABLE IF NOT EXISTS blog_daily_stats (
+    day DATE PRIMARY KEY,
+    generated INT NOT NULL DEFAULT 0,
+    approved INT NOT NULL DEFAULT 0,
+    rejected INT NOT NULL DEFAULT 0,
+    generation_seconds DOUBLE NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Topic lists submitted through POST /api/generate/batch
+CREATE TABLE IF NOT EXISTS blog_batches (
+    id VARCHAR(32) PRIMARY KEY,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    total INT NOT NULL,
+    duplicates INT NOT NULL DEFAULT 0,
+    concurrency INT NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Topic embeddings for near-duplicate detection (topic_index.py)
+CREATE TABLE IF NOT EXISTS topic_embeddings (
+    blog_id INT PRIMARY KEY,
+    model VARCHAR(100) NOT NULL,
+    vector BLOB NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Which worker process owns each generation job (job_leases.py)
+CREATE TABLE IF NOT EXISTS job_leases (
+    name VARCHAR(255) PRIMARY KEY,
+    owner VARCHAR(128) NOT NULL,
+    expires_at DATETIME NOT NULL,
+    INDEX idx_job_leases_owner (owner)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Insert sample data (optional, for testing)
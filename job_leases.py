@@ -0,0 +1,219 @@
+from sqlalchemy import delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Set
+import logging
+import os
+import socket
+import threading
+
+from database import engine, JobLease
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Job Leases
+# -----------------------------
+# With several worker processes (or nodes) each one has its own in-memory
+# generation queue, and a blog left at "Generating..." may be running in a
+# sibling process rather than orphaned. Every generation job is therefore
+# leased in the job_leases table (name = thread_id) by the process that
+# queued it:
+# - claim() takes a lease that is free or expired, never a live one
+# - a heartbeat thread renews all of a process's leases every
+#   JOB_LEASE_SECONDS / 3, so leases only expire when their owner is gone
+#   (a lease that lapsed while the heartbeat was late is renewed as long as
+#   nobody else took it)
+# - a job gives its lease up when the blog is finished or rejected
+# Recovery only re-queues blogs whose lease it managed to claim, so each
+# interrupted generation is resumed by exactly one process. If a running
+# job's lease was taken over all the same, the heartbeat notices and the
+# job stops at its next progress event (check() raises LeaseLostError).
+
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+
+
+class LeaseLostError(Exception):
+    """Another process took over a lease this process was working under"""
+
+
+# Leases this process holds, and the ones it found taken over by others
+_held: Set[str] = set()
+_lost: Set[str] = set()
+_state_lock = threading.Lock()
+
+
+def _holding(names: Iterable[str]):
+    with _state_lock:
+        for name in names:
+            _held.add(name)
+            _lost.discard(name)
+
+
+def _dropping(names: Iterable[str]):
+    with _state_lock:
+        for name in names:
+            _held.discard(name)
+            _lost.discard(name)
+
+
+def worker_id() -> str:
+    """This process's lease owner name (pid included - forked workers share the host)"""
+    return f"{os.getenv('WORKER_ID') or socket.gethostname()}:{os.getpid()}"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def claim(names: Iterable[str], seconds: float = JOB_LEASE_SECONDS, reclaim: bool = True) -> List[str]:
+    """
+    Lease every name that is free or expired, plus (reclaim=True) the ones
+    this process already holds; returns the names now held
+    """
+    owner, held = worker_id(), []
+    for name in names:
+        now = _now()
+        expires = now + timedelta(seconds=seconds)
+        takeable = JobLease.expires_at < now
+        if reclaim:
+            takeable = or_(takeable, JobLease.owner == owner)
+        with engine.begin() as conn:
+            taken = conn.execute(
+                update(JobLease).where(JobLease.name == name, takeable).values(owner=owner, expires_at=expires)
+            ).rowcount
+        if not taken:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(JobLease).values(name=name, owner=owner, expires_at=expires))
+                taken = 1
+            except IntegrityError:
+                # Held by a live process
+                taken = 0
+        if taken:
+            held.append(name)
+    _holding(held)
+    return held
+
+
+def claim_new(names: List[str], seconds: float = JOB_LEASE_SECONDS, reclaim: bool = True) -> List[str]:
+    """claim() for names nobody should hold yet (just created), in one insert"""
+    if not names:
+        return []
+    expires = _now() + timedelta(seconds=seconds)
+    try:
+        with engine.begin() as conn:
+            conn.execute(insert(JobLease), [{"name": name, "owner": worker_id(), "expires_at": expires}
+                                            for name in names])
+        _holding(names)
+        return list(names)
+    except IntegrityError:
+        # Recovery in another process got to one of them first
+        return claim(names, seconds, reclaim)
+
+
+def renew(seconds: float = JOB_LEASE_SECONDS) -> int:
+    """
+    Extend every lease this process still owns, expired or not; returns how
+    many. Leases another process has claimed meanwhile are marked lost.
+    """
+    owner = worker_id()
+    with engine.begin() as conn:
+        renewed = conn.execute(
+            update(JobLease).where(JobLease.owner == owner)
+            .values(expires_at=_now() + timedelta(seconds=seconds))
+        ).rowcount
+        owned = set(conn.execute(select(JobLease.name).where(JobLease.owner == owner)).scalars())
+    with _state_lock:
+        lost = _held - owned
+        _held.difference_update(lost)
+        _lost.update(lost)
+    for name in sorted(lost):
+        logger.warning(f"[LEASES] Lease {name} was taken over by another worker")
+    return renewed
+
+
+def check(name: str):
+    """Raise LeaseLostError if this process lost the lease on name"""
+    if name in _lost:
+        raise LeaseLostError(f"Lease {name} was taken over by another worker")
+
+
+def release(names: Iterable[str]):
+    names = list(names)
+    if names:
+        with engine.begin() as conn:
+            conn.execute(delete(JobLease).where(JobLease.name.in_(names), JobLease.owner == worker_id()))
+        _dropping(names)
+
+
+def abandon(names: Iterable[str]):
+    """
+    Give leases up but keep their rows, expired and ownerless, for jobs
+    whose unfinished work is only known by the lease (see expired())
+    """
+    names = list(names)
+    if names:
+        with engine.begin() as conn:
+            conn.execute(
+                update(JobLease).where(JobLease.name.in_(names), JobLease.owner == worker_id())
+                .values(owner="", expires_at=_now())
+            )
+        _dropping(names)
+
+
+def expired(prefix: str) -> List[str]:
+    """Names starting with prefix whose lease expired or was abandoned"""
+    with engine.connect() as conn:
+        return list(conn.execute(
+            select(JobLease.name).where(JobLease.name.startswith(prefix, autoescape=True),
+                                        JobLease.expires_at < _now())
+        ).scalars())
+
+
+def held(prefix: str = "") -> List[str]:
+    """Names starting with prefix that this process holds"""
+    with _state_lock:
+        return [name for name in _held if name.startswith(prefix)]
+
+
+def release_all():
+    """Give up every lease of this process (shutdown) so others can take over at once"""
+    with engine.begin() as conn:
+        conn.execute(delete(JobLease).where(JobLease.owner == worker_id()))
+    with _state_lock:
+        _held.clear()
+        _lost.clear()
+
+
+# -----------------------------
+# Heartbeat
+# -----------------------------
+_stop = threading.Event()
+_thread = None
+
+
+def _heartbeat():
+    while not _stop.wait(JOB_LEASE_SECONDS / 3):
+        try:
+            renew()
+        except Exception as e:
+            # Keep beating - a short database outage must not cost the leases
+            logger.warning(f"[LEASES] Renewal failed: {str(e)}")
+
+
+def start_heartbeat():
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _stop.clear()
+        _thread = threading.Thread(target=_heartbeat, name="lease-heartbeat", daemon=True)
+        _thread.start()
+
+
+def stop_heartbeat(release_leases: bool = True):
+    _stop.set()
+    if release_leases:
+        try:
+            release_all()
+        except Exception as e:
+            logger.warning(f"[LEASES] Could not release leases: {str(e)}")
@@ -0,0 +1,478 @@
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import enum
+import heapq
+import itertools
+import logging
+import queue
+import statistics
+import threading
+import time
+import uuid
+
+from metrics import QUEUE_DEPTH, QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Bounded Worker-Pool Job Queue
+# -----------------------------
+# Generation jobs run on a fixed number of worker threads. The queue in
+# front of them is bounded, and a full queue is reported back to the API
+# (QueueFullError) so it can answer 429 instead of accepting unbounded work.
+# An optional gate (e.g. the LLM circuit breaker) can hold workers back:
+# a worker that has taken a job waits until the gate lets it start.
+#
+# Jobs are not served first-in first-out but by lane and client (see
+# FairQueue), so one client submitting hundreds of jobs cannot make
+# everybody else wait behind them.
+
+# Client of jobs the application queues itself (recovery)
+SYSTEM_CLIENT = "system"
+
+
+class JobState(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted to a full queue"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ClientQueueFullError(QueueFullError):
+    """Raised when one client already has its maximum number of jobs queued"""
+
+    def __init__(self, retry_after: int, client: str, limit: int):
+        Exception.__init__(self, f"Client {client} already has {limit} jobs queued, retry after {retry_after}s")
+        self.retry_after = retry_after
+        self.client = client
+        self.limit = limit
+
+
+class Job:
+    """A unit of work plus its lifecycle timestamps"""
+
+    def __init__(self, job_id: str, kind: str, func: Callable, args: tuple, kwargs: dict,
+                 lane: str = "default", client: str = SYSTEM_CLIENT):
+        self.id = job_id
+        self.kind = kind
+        self.lane = lane
+        self.client = client
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.state = JobState.QUEUED
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Batch slot (submit_batch), released when the job's last attempt is over
+        self.slot: Optional[threading.Semaphore] = None
+        self.retry_pending = False
+
+    def to_dict(self) -> dict:
+        def iso(ts):
+            return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts else None
+
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "lane": self.lane,
+            "client": self.client,
+            "state": self.state.value,
+            "error": self.error,
+            "submitted_at": iso(self.submitted_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+        }
+
+
+# -----------------------------
+# Fair Scheduling
+# -----------------------------
+# Lanes are served in strict priority order, the first lane listed first.
+# Within a lane, clients share the workers by weighted fair queueing: every
+# job is tagged with a virtual finish time
+#     max(lane virtual time, client's previous tag) + 1 / client weight
+# and the smallest tag is dequeued next. A client with hundreds of queued
+# jobs then gets its weighted share of the workers, not all of them, and a
+# client that was idle starts at the current virtual time instead of
+# having built up credit.
+
+
+class FairQueue:
+    """Bounded multi-lane queue with weighted fair queueing between clients (queue.Queue-like)"""
+
+    def __init__(self, maxsize: int, lanes: Iterable[str] = ("default",),
+                 weight: Optional[Callable[[str], float]] = None):
+        self.maxsize = maxsize
+        self.lanes = tuple(lanes)
+        self._weight = weight or (lambda client: 1.0)
+        self._cond = threading.Condition()
+        self._heaps: Dict[str, list] = {lane: [] for lane in self.lanes}
+        self._virtual = {lane: 0.0 for lane in self.lanes}
+        # lane -> client -> (last tag, jobs queued); clients leave once drained
+        self._clients: Dict[str, Dict[str, list]] = {lane: {} for lane in self.lanes}
+        self._size = 0
+        # Tie-breaker keeping equal tags in submission order
+        self._seq = itertools.count()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= self._size
+
+    def put(self, job: Job, block: bool = True, timeout: Optional[float] = None):
+        """Queue a job in its lane; queue.Full if still full after waiting (block) or at once"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: not self.full(), timeout if block else 0):
+                raise queue.Full
+            clients = self._clients[job.lane]
+            entry = clients.setdefault(job.client, [0.0, 0])
+            tag = max(self._virtual[job.lane], entry[0]) + 1.0 / max(self._weight(job.client), 1e-6)
+            entry[0], entry[1] = tag, entry[1] + 1
+            heapq.heappush(self._heaps[job.lane], (tag, next(self._seq), job))
+            self._size += 1
+            self._cond.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Job:
+        """Next job of the highest-priority non-empty lane; queue.Empty after timeout"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size > 0, timeout):
+                raise queue.Empty
+            lane = next(lane for lane in self.lanes if self._heaps[lane])
+            tag, _, job = heapq.heappop(self._heaps[lane])
+            self._virtual[lane] = tag
+            entry = self._clients[lane][job.client]
+            entry[1] -= 1
+            if not entry[1]:
+                # Its last tag is behind the virtual time now - nothing to remember
+                del self._clients[lane][job.client]
+            self._size -= 1
+            self._cond.notify_all()
+            return job
+
+    def queued(self, client: str) -> int:
+        """Jobs of a client waiting in any lane"""
+        with self._cond:
+            return sum(clients[client][1] for clients in self._clients.values() if client in clients)
+
+    def lane_sizes(self) -> Dict[str, int]:
+        with self._cond:
+            return {lane: len(heap) for lane, heap in self._heaps.items()}
+
+
+class ClientWaits:
+    """Queue wait times of one client's recent jobs"""
+
+    # Jobs kept per client for percentiles
+    SAMPLES = 200
+
+    def __init__(self):
+        self.started = 0
+        self.total_wait = 0.0
+        self.recent = deque(maxlen=self.SAMPLES)
+
+    def record(self, wait: float):
+        self.started += 1
+        self.total_wait += wait
+        self.recent.append(wait)
+
+    def to_dict(self) -> dict:
+        recent = sorted(self.recent)
+        return {
+            "started": self.started,
+            "avg_wait_seconds": round(self.total_wait / self.started, 3) if self.started else None,
+            "p50_wait_seconds": round(statistics.median(recent), 3) if recent else None,
+            "p95_wait_seconds": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 3) if recent else None,
+        }
+
+
+class JobQueue:
+    """Fixed-size pool of worker threads fed by a bounded fair queue"""
+
+    # How many finished jobs are remembered for status lookups
+    HISTORY_SIZE = 1000
+    # How many clients' wait statistics are kept (least recently active dropped)
+    CLIENT_HISTORY_SIZE = 1000
+
+    # Seconds between gate checks while it is closed
+    GATE_POLL_SECONDS = 0.5
+
+    def __init__(self, name: str, workers: int, max_size: int,
+                 gate: Optional[Callable[[], bool]] = None, lanes: Iterable[str] = ("default",),
+                 weight: Optional[Callable[[str], float]] = None, client_max_queued: int = 0):
+        self.name = name
+        self.workers = workers
+        self.max_size = max_size
+        # gate() -> False holds dequeued jobs back until it returns True
+        self._gate = gate
+        self._held = 0
+        self._queue = FairQueue(max_size, lanes, weight)
+        self.lanes = self._queue.lanes
+        # Queued jobs one client may have (0 = only max_size applies)
+        self.client_max_queued = client_max_queued
+        self._client_waits: "OrderedDict[str, ClientWaits]" = OrderedDict()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopping = threading.Event()
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        # Exponential moving average of job run time, used for Retry-After
+        self._avg_runtime: Optional[float] = None
+        QUEUE_DEPTH.labels(name).set_function(self._queue.qsize)
+
+    # -------- lifecycle --------
+    def start(self):
+        """Start the worker threads"""
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"{self.name}-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"[QUEUE] '{self.name}' started with {self.workers} workers (capacity {self.max_size})")
+
+    def stop(self, timeout: float = 5.0, drain: bool = False):
+        """
+        Ask workers to exit once they finish their current job
+        drain=True first gives queued jobs up to `timeout` seconds to run
+        """
+        deadline = time.monotonic() + timeout
+        while drain and (self._queue.qsize() or self._running) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        logger.info(f"[QUEUE] '{self.name}' stopped")
+
+    # -------- submission --------
+    def is_full(self, client: Optional[str] = None) -> bool:
+        """Whether a job (of `client`, if given) would be turned away right now"""
+        return self._queue.full() or (client is not None and self._client_full(client))
+
+    def _client_full(self, client: str) -> bool:
+        return 0 < self.client_max_queued <= self._queue.queued(client)
+
+    def free_slots(self) -> int:
+        return max(0, self.max_size - self._queue.qsize())
+
+    def retry_after(self) -> int:
+        """Rough number of seconds until a queue slot frees up"""
+        avg = self._avg_runtime or 30.0
+        return max(1, int(avg * max(1, self._queue.qsize()) / max(1, self.workers)))
+
+    def submit(self, func: Callable, *args, job_id: Optional[str] = None,
+               kind: str = "job", block: bool = False, lane: Optional[str] = None,
+               client: str = SYSTEM_CLIENT, slot: Optional[threading.Semaphore] = None, **kwargs) -> Job:
+        """
+        Queue func(*args, **kwargs) in a lane (default: the lowest) on behalf
+        of a client; raises QueueFullError when at capacity, or
+        ClientQueueFullError when the client is at client_max_queued
+        block=True waits for a free slot instead and ignores the per-client
+        limit (for internal producers only, never from the event loop)
+        """
+        lane = lane or self.lanes[-1]
+        if lane not in self.lanes:
+            raise ValueError(f"Queue '{self.name}' has no lane {lane!r}")
+        if not block and self._client_full(client):
+            raise ClientQueueFullError(self.retry_after(), client, self.client_max_queued)
+        job = Job(job_id or uuid.uuid4().hex, kind, func, args, kwargs, lane=lane, client=client)
+        job.slot = slot
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put(job, block=block)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise QueueFullError(self.retry_after())
+        with self._lock:
+            self._trim_history()
+        return job
+
+    def submit_batch(self, jobs: List[Tuple[str, Callable, tuple, dict]], concurrency: int,
+                     kind: str = "batch", lane: Optional[str] = None,
+                     client: str = SYSTEM_CLIENT) -> threading.Thread:
+        """
+        Feed (job_id, func, args, kwargs) tuples into the queue from a
+        background thread, with at most `concurrency` of them queued or
+        running at a time, so one large batch cannot fill the whole queue
+        """
+        slots = threading.Semaphore(max(1, concurrency))
+
+        def feed():
+            for job_id, func, args, kwargs in jobs:
+                while not slots.acquire(timeout=0.5):
+                    if self._stopping.is_set():
+                        return
+                self.submit(func, *args, job_id=job_id, kind=kind, block=True,
+                            lane=lane, client=client, slot=slots, **kwargs)
+
+        thread = threading.Thread(target=feed, name=f"{self.name}-batch-feeder", daemon=True)
+        thread.start()
+        return thread
+
+    def retry_later(self, delay: float, func: Callable, *args, job_id: str, kind: str = "retry",
+                    **kwargs) -> threading.Timer:
+        """
+        Queue func(*args, **kwargs) as the next attempt of job `job_id` in
+        `delay` seconds, from within that job. The attempt keeps the job's
+        lane, client and batch slot, so retries stay under the batch cap.
+        """
+        job = self.get(job_id)
+        lane, client, slot = (job.lane, job.client, job.slot) if job else (None, SYSTEM_CLIENT, None)
+        if job:
+            job.retry_pending = True
+
+        def resubmit():
+            try:
+                self.submit(func, *args, job_id=job_id, kind=kind, block=True,
+                            lane=lane, client=client, slot=slot, **kwargs)
+            except Exception:
+                if slot is not None:
+                    slot.release()
+                raise
+
+        timer = threading.Timer(delay, resubmit)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _trim_history(self):
+        while len(self._jobs) > self.HISTORY_SIZE:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.state in (JobState.QUEUED, JobState.RUNNING):
+                # Never forget live jobs - the queue bound keeps this finite
+                self._jobs.move_to_end(oldest_id)
+                break
+            del self._jobs[oldest_id]
+
+    # -------- execution --------
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                job = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if self._wait_for_gate():
+                self._run(job)
+
+    def _wait_for_gate(self) -> bool:
+        """Block until the gate opens; False if the queue is stopping first"""
+        if self._gate is None or self._gate():
+            return True
+        with self._lock:
+            self._held += 1
+        try:
+            while not self._stopping.wait(self.GATE_POLL_SECONDS):
+                if self._gate():
+                    return True
+            return False
+        finally:
+            with self._lock:
+                self._held -= 1
+
+    def _run(self, job: Job):
+        with self._lock:
+            job.state = JobState.RUNNING
+            job.started_at = time.time()
+            self._running += 1
+            waits = self._client_waits.pop(job.client, None) or ClientWaits()
+            waits.record(job.started_at - job.submitted_at)
+            self._client_waits[job.client] = waits
+            while len(self._client_waits) > self.CLIENT_HISTORY_SIZE:
+                self._client_waits.popitem(last=False)
+        QUEUE_WAIT.labels(self.name, job.kind).observe(job.started_at - job.submitted_at)
+        try:
+            job.func(*job.args, **job.kwargs)
+            state, error = JobState.DONE, None
+        except Exception as e:
+            logger.exception(f"[QUEUE] Job {job.id} failed: {str(e)}")
+            state, error = JobState.FAILED, str(e)
+        with self._lock:
+            job.state = state
+            job.error = error
+            job.finished_at = time.time()
+            self._running -= 1
+            if state == JobState.DONE:
+                self._completed += 1
+            else:
+                self._failed += 1
+            runtime = job.finished_at - job.started_at
+            self._avg_runtime = runtime if self._avg_runtime is None else 0.8 * self._avg_runtime + 0.2 * runtime
+        if job.slot is not None and not job.retry_pending:
+            job.slot.release()
+
+    # -------- introspection --------
+    def client_status(self, limit: int = 50) -> List[Dict]:
+        """
+        Per client: jobs queued and running now, how long the oldest queued
+        job has waited so far, and the waits of recently started jobs
+        Busiest clients first, then the most recently active ones.
+        """
+        now = time.time()
+        with self._lock:
+            live: Dict[str, Dict] = {}
+            for job in self._jobs.values():
+                if job.state not in (JobState.QUEUED, JobState.RUNNING):
+                    continue
+                entry = live.setdefault(job.client, {"queued": 0, "running": 0, "oldest_queued_seconds": None})
+                if job.state == JobState.RUNNING:
+                    entry["running"] += 1
+                else:
+                    entry["queued"] += 1
+                    age = round(now - job.submitted_at, 3)
+                    entry["oldest_queued_seconds"] = max(entry["oldest_queued_seconds"] or 0.0, age)
+            clients = list(live) + [client for client in reversed(self._client_waits) if client not in live]
+            report = []
+            for client in clients[:limit]:
+                waits = self._client_waits.get(client)
+                report.append({
+                    "client": client,
+                    **live.get(client, {"queued": 0, "running": 0, "oldest_queued_seconds": None}),
+                    **(waits or ClientWaits()).to_dict(),
+                })
+        report.sort(key=lambda entry: -(entry["queued"] + entry["running"]))
+        return report
+
+    def status(self) -> Dict:
+        """Queue depth per lane, worker utilisation, counters, per-client waits and live jobs"""
+        clients = self.client_status()
+        lanes = self._queue.lane_sizes()
+        with self._lock:
+            live = [job.to_dict() for job in self._jobs.values()
+                    if job.state in (JobState.QUEUED, JobState.RUNNING)]
+            return {
+                "name": self.name,
+                "workers": self.workers,
+                "running": self._running,
+                "queued": self._queue.qsize() + self._held,
+                # Workers holding a job until the gate opens
+                "held": self._held,
+                "capacity": self.max_size,
+                "lanes": lanes,
+                "client_max_queued": self.client_max_queued,
+                "clients": clients,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_runtime_seconds": round(self._avg_runtime, 2) if self._avg_runtime else None,
+                "jobs": live,
+            }
@@ -0,0 +1,173 @@
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import os
+
+from metrics import LLM_CACHE_LOOKUPS
+
+# -----------------------------
+# Persistent LLM Response Cache
+# -----------------------------
+# Plugged into the chat model through LangChain's `cache=` hook, so every
+# `(prompt | llm).invoke(...)` in blog_agents.py is served from here when the
+# same rendered prompt was already answered by the same model configuration.
+# LangChain's llm_string carries the model name, temperature and the other
+# call parameters, so they are all part of the key.
+
+# Set while a request asked to skip the cache (see cache_bypass)
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def cache_bypass(enabled: bool = True):
+    """Skip cache reads and writes for LLM calls made inside this block"""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def _cache_key(prompt: str, llm_string: str) -> str:
+    """Hash the rendered prompt and model parameters into a cache key"""
+    # Collapse whitespace so trivially different renderings share an entry
+    normalized = " ".join(prompt.split())
+    return hashlib.sha256(f"{llm_string}\x00{normalized}".encode("utf-8")).hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    On-disk LLM response cache with TTL and size-based eviction
+    Works with any LangChain chat model, including the fake ones used offline
+    """
+
+    # Run eviction every N writes instead of on every write
+    EVICT_EVERY = 50
+
+    def __init__(self, path: str = "llm_cache.db", ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                llm_string TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used_at);
+            """
+        )
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Return cached generations for a prompt, or None on a miss"""
+        if _bypass.get():
+            return None
+        key = _cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                LLM_CACHE_LOOKUPS.labels("miss").inc()
+                return None
+            self.hits += 1
+            LLM_CACHE_LOOKUPS.labels("hit").inc()
+            self._conn.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store generations for a prompt"""
+        if _bypass.get():
+            return
+        key = _cache_key(prompt, llm_string)
+        now = time.time()
+        response = json.dumps([dumps(generation) for generation in return_val])
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_string, response, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, llm_string, response, now, now)
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def clear(self, **kwargs) -> None:
+        """Remove every cached response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Drop expired entries and trim to max_entries, returns rows removed"""
+        with self._lock:
+            removed = self._evict(time.time())
+            self._conn.commit()
+        return removed
+
+    def _evict(self, now: float) -> int:
+        removed = 0
+        if self.ttl_seconds:
+            removed += self._conn.execute(
+                "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        if self.max_entries:
+            # Least recently used entries go first
+            removed += self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                "SELECT key FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        return removed
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+def create_llm_cache_from_env() -> Optional[SQLiteLLMCache]:
+    """Build the cache from LLM_CACHE_* environment variables (None if disabled)"""
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    return SQLiteLLMCache(
+        path=os.getenv("LLM_CACHE_PATH", "llm_cache.db"),
+        ttl_seconds=ttl or None,
+        max_entries=max_entries or None,
+    )
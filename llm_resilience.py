@@ -0,0 +1,271 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.types import RetryPolicy
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Dict, Optional
+import httpx
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from metrics import LLM_ERRORS, CIRCUIT_STATE
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Retries, Timeouts and Circuit Breaker
+# -----------------------------
+# A dropped connection or a restarting Ollama used to fail the whole
+# generation. Now each workflow node:
+# - is retried by LangGraph with jittered exponential backoff when it fails
+#   with a transient error (connection refused, 5xx, read timeout)
+# - has a wall-clock budget, checked before every LLM call and every token
+# - refuses to call the LLM at all while the circuit breaker is open
+# The breaker opens after CIRCUIT_FAILURE_THRESHOLD transient LLM errors in
+# a row. While it is open the generation workers stop taking jobs (they wait
+# in the queue); after CIRCUIT_RESET_SECONDS one job is let through as a
+# probe and its first LLM call closes or re-opens the breaker.
+
+# Attempts per node (1 = no retries) and the backoff between them
+NODE_RETRY_ATTEMPTS = int(os.getenv("NODE_RETRY_ATTEMPTS", "3"))
+NODE_RETRY_INITIAL_SECONDS = float(os.getenv("NODE_RETRY_INITIAL_SECONDS", "1"))
+NODE_RETRY_MAX_SECONDS = float(os.getenv("NODE_RETRY_MAX_SECONDS", "30"))
+# Wall-clock budget of one node attempt (0 disables), with per-node
+# overrides as JSON, e.g. NODE_TIMEOUTS='{"write_blog": 900}'
+NODE_TIMEOUT_SECONDS = float(os.getenv("NODE_TIMEOUT_SECONDS", "600"))
+NODE_TIMEOUTS: Dict[str, float] = {
+    node: float(seconds) for node, seconds in json.loads(os.getenv("NODE_TIMEOUTS") or "{}").items()
+}
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+
+class NodeTimeoutError(TimeoutError):
+    """A workflow node ran past its time budget"""
+
+
+class CircuitOpenError(Exception):
+    """An LLM call was refused because the circuit breaker is open"""
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for failures that may succeed when tried again later"""
+    if isinstance(error, (CircuitOpenError, ConnectionError, TimeoutError, httpx.TransportError)):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    # ollama.ResponseError; status -1 is an error reported mid-stream
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and (status >= 500 or status in (429, -1))
+
+
+def _retry_on(error: Exception) -> bool:
+    # An open breaker is not retried in place: the job is re-queued instead
+    return is_transient(error) and not isinstance(error, CircuitOpenError)
+
+
+node_retry_policy = RetryPolicy(
+    max_attempts=max(1, NODE_RETRY_ATTEMPTS),
+    initial_interval=NODE_RETRY_INITIAL_SECONDS,
+    max_interval=NODE_RETRY_MAX_SECONDS,
+    jitter=True,
+    retry_on=_retry_on,
+)
+
+
+# -----------------------------
+# Node Deadlines
+# -----------------------------
+_deadline: ContextVar[Optional[tuple]] = ContextVar("node_deadline", default=None)
+
+
+def node_timeout(node: str):
+    """
+    Decorator giving each attempt of a workflow node a deadline
+    The deadline travels in a context variable, so section calls made by
+    Runnable.batch on executor threads see it too.
+    """
+    seconds = NODE_TIMEOUTS.get(node, NODE_TIMEOUT_SECONDS)
+
+    def decorator(func):
+        if seconds <= 0:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _deadline.set((node, seconds, time.monotonic() + seconds))
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _deadline.reset(token)
+        return wrapper
+    return decorator
+
+
+def check_deadline():
+    """Raise NodeTimeoutError if the running node is out of time"""
+    deadline = _deadline.get()
+    if deadline and time.monotonic() > deadline[2]:
+        raise NodeTimeoutError(f"{deadline[0]} exceeded its {deadline[1]:g}s timeout")
+
+
+# -----------------------------
+# Circuit Breaker
+# -----------------------------
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker: closed -> open -> half-open -> closed"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+    _GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._last_error: Optional[str] = None
+        # When the half-open probe was handed out (None = not yet)
+        self._probe_at: Optional[float] = None
+        CIRCUIT_STATE.set(0)
+
+    def _set_state(self, state: str):
+        if state != self._state:
+            logger.warning(f"[CIRCUIT] {self._state} -> {state}")
+        self._state = state
+        CIRCUIT_STATE.set(self._GAUGE[state])
+
+    def _current(self) -> str:
+        # Caller holds the lock
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._set_state(self.HALF_OPEN)
+            self._probe_at = None
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current()
+
+    def allow_call(self) -> bool:
+        """Whether an LLM call may go out (anything but open)"""
+        return self.state != self.OPEN
+
+    def allow_dispatch(self) -> bool:
+        """
+        Whether a worker may start a job: always when closed, never when
+        open, and for a single probe job at a time when half-open
+        """
+        with self._lock:
+            state = self._current()
+            if state == self.CLOSED:
+                return True
+            if state == self.OPEN:
+                return False
+            now = time.monotonic()
+            # A probe that never made an LLM call must not block forever
+            if self._probe_at is None or now - self._probe_at >= self.reset_seconds:
+                self._probe_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._set_state(self.CLOSED)
+
+    def record_failure(self, error: BaseException):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) or type(error).__name__
+            state = self._current()
+            if state == self.HALF_OPEN or (state == self.CLOSED and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+    def status(self) -> dict:
+        with self._lock:
+            state = self._current()
+            retry_in = self.reset_seconds - (time.monotonic() - self._opened_at) if state == self.OPEN else 0
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in_seconds": round(max(0.0, retry_in), 1),
+                "last_error": self._last_error,
+            }
+
+
+breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS)
+
+
+class ResilienceHandler(BaseCallbackHandler):
+    """
+    Callback handler enforcing node deadlines and the circuit breaker on
+    every chat model call, and feeding call outcomes to the breaker
+    raise_error makes LangChain propagate the exceptions raised here into
+    the LLM call instead of logging them.
+    """
+
+    raise_error = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # run_id -> node, for labelling errors
+        self._nodes: Dict[Any, str] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        with self._lock:
+            self._nodes[run_id] = (metadata or {}).get("langgraph_node", "none")
+        if not breaker.allow_call():
+            raise CircuitOpenError(f"LLM circuit breaker is open: {breaker.status()['last_error']}")
+        check_deadline()
+
+    def on_llm_new_token(self, token, **kwargs):
+        check_deadline()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            self._nodes.pop(run_id, None)
+        breaker.record_success()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            node = self._nodes.pop(run_id, "none")
+        if isinstance(error, CircuitOpenError):
+            LLM_ERRORS.labels(node, "circuit_open").inc()
+        elif isinstance(error, NodeTimeoutError):
+            # Slow, not down: retried, but does not count towards the breaker
+            LLM_ERRORS.labels(node, "timeout").inc()
+        elif is_transient(error):
+            LLM_ERRORS.labels(node, "transient").inc()
+            breaker.record_failure(error)
+        else:
+            LLM_ERRORS.labels(node, "other").inc()
+
+
+# Shared handler passed to every workflow run
+LLM_RESILIENCE = ResilienceHandler()
+
+
+# -----------------------------
+# Job-Level Retries
+# -----------------------------
+# When a node is still failing after its retries (or the breaker opened),
+# the generation job is re-queued and resumes from its last checkpoint.
+
+GENERATION_MAX_ATTEMPTS = int(os.getenv("GENERATION_MAX_ATTEMPTS", "5"))
+GENERATION_RETRY_SECONDS = float(os.getenv("GENERATION_RETRY_SECONDS", "15"))
+GENERATION_RETRY_MAX_SECONDS = float(os.getenv("GENERATION_RETRY_MAX_SECONDS", "300"))
+
+
+def generation_retry_delay(attempt: int) -> float:
+    """Jittered exponential delay before re-queueing a job that failed `attempt` times"""
+    delay = min(GENERATION_RETRY_MAX_SECONDS, GENERATION_RETRY_SECONDS * 2 ** (attempt - 1))
+    # Full jitter over the upper half spreads out jobs that failed together
+    return delay * random.uniform(0.5, 1.0)
+
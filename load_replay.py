@@ -0,0 +1,333 @@
+"""
+Replay recorded request streams against the API and measure saturation
+Each line of the input JSONL file is one user session:
+
+    {"topic": "Remote work", "review": "approve"}      generate -> poll -> review -> list
+    {"title": "Remote work"}                             same, topic taken from "title"
+    {"method": "GET", "path": "/api/blogs?limit=20"}     a single request
+    any of the above with "at": 12.5                     arrival offset for --arrival recorded
+
+Sessions arrive open-loop (Poisson or uniform at --rates sessions/sec, or at
+the recorded offsets scaled by --speed): arrivals never wait for earlier
+sessions to finish, so an overloaded server shows up as queueing delay and
+429s instead of silently slowing the offered load down. For every rate (and
+worker count) the tool reports per-endpoint latency percentiles, error and
+429 rates, generation end-to-end time and the peak generation queue depth.
+
+Without --url the app runs in this process under uvicorn with
+fake_llm.FakeChatModel in place of Ollama and SQLite unless --database-url
+is given (e.g. the MySQL container: mysql+pymysql://root:pw@localhost:3307/blog_db).
+
+Usage:
+    python load_replay.py --rates 0.5 1 2 4 --duration 30 --workers 2 4 8
+    python load_replay.py --input sessions.jsonl --arrival recorded --speed 2
+    python load_replay.py --url http://localhost:8000 --rates 0.2 0.5 --duration 120
+    python load_replay.py --json replay.json
+"""
+from collections import defaultdict
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+
+from bench_pipeline import setup_environment, summarize
+from bench_api import free_port, start_server
+
+GENERATING_TITLE = "Generating..."
+# Route template per request kind, so every blog id lands in one bucket
+ENDPOINTS = {
+    "generate": "POST /api/generate",
+    "poll": "GET /api/blogs/{id}",
+    "review": "POST /api/blogs/{id}/review",
+    "list": "GET /api/blogs",
+}
+
+
+def load_sessions(path: str, limit: int = 0) -> list:
+    """Sessions from a JSONL file; lines that are neither sessions nor requests are skipped"""
+    sessions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("path"):
+                sessions.append({"kind": "request", "method": record.get("method", "GET").upper(),
+                                 "path": record["path"], "json": record.get("json"), "at": record.get("at")})
+            elif record.get("topic") or record.get("title"):
+                sessions.append({"kind": "blog", "topic": record.get("topic") or record["title"],
+                                 "review": record.get("review"), "at": record.get("at")})
+            if limit and len(sessions) >= limit:
+                break
+    if not sessions:
+        raise SystemExit(f"{path}: no sessions found")
+    return sessions
+
+
+def arrival_times(sessions: list, arrival: str, rate: float, duration: float, speed: float, rng):
+    """Offsets (seconds from the start) at which each session of one level arrives"""
+    if arrival == "recorded":
+        offsets = [float(s["at"] or 0) / speed for s in sessions]
+        base = min(offsets)
+        return [(o - base, s) for o, s in sorted(zip(offsets, sessions), key=lambda p: p[0])
+                if o - base <= duration]
+    arrivals, t = [], 0.0
+    for session in itertools.cycle(sessions):
+        # Poisson: exponential gaps; uniform: fixed gaps
+        t += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+        if t > duration:
+            return arrivals
+        arrivals.append((t, session))
+
+
+class Recorder:
+    """Latency, status and error samples per endpoint"""
+
+    def __init__(self):
+        self.latency = defaultdict(list)
+        self.status = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.e2e = []
+        self.outcomes = defaultdict(int)
+
+    async def call(self, client, kind: str, method: str, path: str, body=None):
+        """Send one request; returns the response or None on a transport error"""
+        endpoint = ENDPOINTS.get(kind, f"{method} {path.split('?')[0]}")
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body)
+        except Exception as e:
+            self.errors[endpoint] += 1
+            self.status[endpoint][type(e).__name__] += 1
+            return None
+        self.latency[endpoint].append(time.perf_counter() - start)
+        self.status[endpoint][str(response.status_code)] += 1
+        if response.status_code >= 500:
+            self.errors[endpoint] += 1
+        return response
+
+    def report(self) -> dict:
+        endpoints = {}
+        for endpoint in sorted(set(self.latency) | set(self.errors)):
+            statuses = dict(self.status[endpoint])
+            total = sum(statuses.values())
+            endpoints[endpoint] = {
+                **summarize(self.latency[endpoint]),
+                "requests": total,
+                "error_rate": self.errors[endpoint] / total if total else 0.0,
+                "rejected_rate": statuses.get("429", 0) / total if total else 0.0,
+                "statuses": statuses,
+            }
+        return {"endpoints": endpoints, "generation_e2e": summarize(self.e2e), "outcomes": dict(self.outcomes)}
+
+
+async def blog_session(client, recorder: Recorder, session: dict, args, rng, deadline: float):
+    """generate -> poll until generated -> review -> list, as the dashboard does"""
+    submitted = time.perf_counter()
+    response = await recorder.call(client, "generate", "POST", "/api/generate",
+                                   {"topic": session["topic"], "use_cache": False, "on_duplicate": "ignore"})
+    if response is None or response.status_code >= 400:
+        recorder.outcomes["shed" if response is not None and response.status_code == 429 else "failed"] += 1
+        return
+    blog = response.json()
+    while blog.get("title") == GENERATING_TITLE:
+        if time.perf_counter() > deadline:
+            recorder.outcomes["timed_out"] += 1
+            return
+        await asyncio.sleep(args.poll_interval)
+        response = await recorder.call(client, "poll", "GET", f"/api/blogs/{blog['id']}")
+        if response is None or response.status_code != 200:
+            recorder.outcomes["failed"] += 1
+            return
+        blog = response.json()
+    recorder.e2e.append(time.perf_counter() - submitted)
+    if blog["status"] == "rejected":
+        # Generation error
+        recorder.outcomes["generation_failed"] += 1
+        return
+
+    action = session.get("review") or ("reject" if rng.random() < args.reject_rate else "approve")
+    body = {"action": action, "rejection_reason": "load test" if action == "reject" else None}
+    await recorder.call(client, "review", "POST", f"/api/blogs/{blog['id']}/review", body)
+    await recorder.call(client, "list", "GET", "/api/blogs?limit=20")
+    recorder.outcomes["completed"] += 1
+
+
+async def sample_queue(client, stop: asyncio.Event, peaks: dict):
+    """Track the deepest the generation queue got during a level"""
+    while not stop.is_set():
+        try:
+            queue = (await client.get("/api/queue")).json()
+            peaks["queued"] = max(peaks["queued"], queue["queued"])
+            peaks["running"] = max(peaks["running"], queue["running"])
+        except Exception:
+            pass
+        await asyncio.sleep(0.5)
+
+
+async def run_level(base_url: str, sessions: list, rate: float, args, seed: int) -> dict:
+    import httpx
+
+    rng = random.Random(seed)
+    arrivals = arrival_times(sessions, args.arrival, rate, args.duration, args.speed, rng)
+    recorder = Recorder()
+    peaks = {"queued": 0, "running": 0}
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.request_timeout) as client:
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_queue(client, stop, peaks))
+        start = time.perf_counter()
+        deadline = start + args.duration + args.drain_timeout
+        tasks = []
+        for offset, session in arrivals:
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if session["kind"] == "blog":
+                coro = blog_session(client, recorder, session, args, rng, deadline)
+            else:
+                coro = recorder.call(client, "request", session["method"], session["path"], session["json"])
+            tasks.append(asyncio.create_task(coro))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await sampler
+
+    report = recorder.report()
+    completed = report["outcomes"].get("completed", 0)
+    if args.arrival == "recorded" and arrivals:
+        # Offered rate of the recording itself
+        rate = len(arrivals) / max(arrivals[-1][0], 1.0)
+    return {
+        "rate": rate,
+        "sessions": len(arrivals),
+        "elapsed_seconds": elapsed,
+        "completed_per_minute": completed / elapsed * 60 if elapsed else 0.0,
+        "peak_queued": peaks["queued"],
+        "peak_running": peaks["running"],
+        **report,
+    }
+
+
+def use_workers(workers: int):
+    """Swap the in-process app's generation queue for one with `workers` threads"""
+    import main
+
+    main.generation_queue.stop()
+    main.generation_queue = main.create_generation_queue(workers)
+    main.generation_queue.start()
+
+
+def print_level(result: dict, workers):
+    label = f"workers={workers}  " if workers else ""
+    outcomes = ", ".join(f"{k} {v}" for k, v in sorted(result["outcomes"].items())) or "-"
+    print(f"\n=== {label}rate={result['rate']:.3g}/s  sessions={result['sessions']}  "
+          f"peak queued={result['peak_queued']} running={result['peak_running']} ===")
+    print(f"completed {result['completed_per_minute']:.1f}/min   outcomes: {outcomes}")
+    print(f"{'endpoint':<30} {'reqs':>6} {'err%':>6} {'429%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(result["endpoints"].items()) + [("generation end-to-end", {
+        **result["generation_e2e"], "requests": result["generation_e2e"]["count"], "error_rate": 0.0,
+        "rejected_rate": 0.0
+    })]
+    for endpoint, s in rows:
+        print(f"{endpoint:<30} {s['requests']:>6} {s['error_rate'] * 100:>6.1f} {s['rejected_rate'] * 100:>6.1f} "
+              f"{s['p50'] * 1000:>9.1f} {s['p95'] * 1000:>9.1f} {s['p99'] * 1000:>9.1f}")
+
+
+def print_curve(results: list):
+    """Offered rate vs completions, shedding and generate latency"""
+    print(f"\n=== saturation ===")
+    print(f"{'workers':>7} {'rate/s':>7} {'offered/min':>11} {'done/min':>9} {'429%':>6} "
+          f"{'peak queue':>10} {'e2e p95 s':>10} {'generate p95 ms':>16}")
+    for r in results:
+        generate = r["endpoints"].get(ENDPOINTS["generate"], {})
+        print(f"{str(r['workers'] or '-'):>7} {r['rate']:>7.3g} {r['rate'] * 60:>11.1f} {r['completed_per_minute']:>9.1f} "
+              f"{generate.get('rejected_rate', 0) * 100:>6.1f} {r['peak_queued']:>10} "
+              f"{r['generation_e2e']['p95']:>10.2f} {generate.get('p95', 0) * 1000:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default="requests.jsonl", help="JSONL file of sessions / requests")
+    parser.add_argument("--limit", type=int, default=0, help="use only the first N input lines")
+    parser.add_argument("--arrival", choices=["poisson", "uniform", "recorded"], default="poisson",
+                        help="open-loop arrival process")
+    parser.add_argument("--rates", type=float, nargs="+", default=[0.5, 1, 2],
+                        help="session arrivals per second, one level each (poisson / uniform)")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up of recorded offsets")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals per level")
+    parser.add_argument("--drain-timeout", type=float, default=120.0,
+                        help="seconds sessions may run after arrivals stop")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between status polls")
+    parser.add_argument("--reject-rate", type=float, default=0.2, help="share of reviews that reject")
+    parser.add_argument("--seed", type=int, default=1, help="seed of arrivals and review choices")
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--max-connections", type=int, default=200)
+    parser.add_argument("--url", help="replay against a running server instead of an in-process app")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        help="MAX_CONCURRENT_GENERATIONS values to test (in-process only)")
+    parser.add_argument("--queue-size", type=int, default=100, help="GENERATION_QUEUE_SIZE (in-process only)")
+    parser.add_argument("--database-url", help="database of the in-process app (default: throwaway SQLite)")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="fake LLM seconds to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="fake LLM generation speed")
+    parser.add_argument("--response-tokens", type=int, default=120, help="tokens per fake LLM response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of fake LLM calls that fail")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.input, args.limit)
+    rates = [1.0] if args.arrival == "recorded" else args.rates
+    server = thread = None
+    if args.url:
+        if args.workers:
+            parser.error("--workers needs the in-process app (no --url)")
+        base_url = args.url.rstrip("/")
+    else:
+        setup_environment(tempfile.mkdtemp(prefix="blog_replay_"))
+        if args.database_url:
+            os.environ["DATABASE_URL"] = args.database_url
+        os.environ["GENERATION_QUEUE_SIZE"] = str(args.queue_size)
+        os.environ["OLLAMA_WARMUP"] = "false"
+
+        import blog_agents
+        from fake_llm import FakeChatModel
+        blog_agents.llm = FakeChatModel(
+            first_token_latency=args.first_token_latency,
+            tokens_per_second=args.tokens_per_second,
+            response_tokens=args.response_tokens,
+            failure_rate=args.failure_rate,
+            fault_seed=args.seed,
+        )
+        port = free_port()
+        server, thread = start_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    results = []
+    try:
+        for workers in args.workers or [None]:
+            if workers:
+                use_workers(workers)
+            for level, rate in enumerate(rates):
+                result = asyncio.run(run_level(base_url, sessions, rate, args, args.seed + level))
+                result["workers"] = workers
+                print_level(result, workers)
+                results.append(result)
+    finally:
+        if server:
+            server.should_exit = True
+            thread.join(10)
+
+    print_curve(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
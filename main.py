@@ -1,33 +1,223 @@
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Query, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse, JSONResponse, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, and_, case, insert, select
 from pydantic import BaseModel, ConfigDict
-from typing import List, Optional
+from typing import List, Optional, Set, Tuple
 from contextlib import asynccontextmanager
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import threading
+import time
 import uvicorn
 import os
 import uuid
 from dotenv import load_dotenv
 
-from database import get_db, init_db, BlogPost, ApprovalStatus
-from blog_agents import generate_blog, update_approval_status, get_blog_state
+from database import get_db, init_db, engine, async_engine, AsyncSessionLocal, BlogPost, BlogBatch, ApprovalStatus, \
+    EXCERPT_LENGTH, make_excerpt
+import blog_stats
+import blog_search
+from blog_agents import (
+    generate_blog, resume_blog, update_approval_status, get_blog_state, get_blog_outline,
+    delete_blog_checkpoints, llm_cache
+)
+from checkpoint_maintenance import run_maintenance
+from checkpoint_store import CHECKPOINT_BACKEND
+from blog_cache import blog_cache, blog_etag, etag_matches
+from starlette.concurrency import run_in_threadpool
+from job_queue import JobQueue, QueueFullError, ClientQueueFullError, SYSTEM_CLIENT
+from metrics import (
+    HTTP_LATENCY, GENERATIONS_IN_FLIGHT, GENERATION_RETRIES, TOPIC_DEDUPE, NODE_LATENCY, LLM_LATENCY,
+    RATE_LIMITED, histogram_means
+)
+from llm_resilience import breaker, is_transient, generation_retry_delay, GENERATION_MAX_ATTEMPTS
+from prometheus_client import generate_latest, multiprocess, CollectorRegistry, CONTENT_TYPE_LATEST
+import blog_events
+import blog_agents
+import job_leases
+import rate_limit
+import ollama_client
+import topic_index
 
 # Load environment variables
 load_dotenv()
 
+# LOG_LEVEL=WARNING silences the per-request and per-node progress lines
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Generation queue lanes, served in this order
+GENERATION_LANES = ("interactive", "bulk")
+# Queued generations one client may have before it gets 429 (0 = no limit)
+GENERATION_CLIENT_QUEUE_SIZE = int(os.getenv("GENERATION_CLIENT_QUEUE_SIZE", "20"))
+
+def create_generation_queue(workers: int = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "5"))) -> JobQueue:
+    """
+    Generation jobs run on a fixed worker pool behind a bounded queue.
+    Single requests ("interactive") go ahead of batches and recovered jobs
+    ("bulk"); clients share each lane by weight. While the LLM circuit
+    breaker is open, workers leave jobs queued.
+    """
+    return JobQueue(
+        name="generation",
+        workers=workers,
+        max_size=int(os.getenv("GENERATION_QUEUE_SIZE", "100")),
+        gate=breaker.allow_dispatch,
+        lanes=GENERATION_LANES,
+        weight=rate_limit.client_weight,
+        client_max_queued=GENERATION_CLIENT_QUEUE_SIZE
+    )
+
+generation_queue = create_generation_queue()
+
+# Checkpoint update + graph resumption after a review runs here, off the
+# event loop and independent of the (slow) generation workers - a review
+# never waits behind generations. Single reviews go ahead of bulk ones.
+review_queue = JobQueue(
+    name="review",
+    workers=int(os.getenv("REVIEW_WORKERS", "2")),
+    max_size=int(os.getenv("REVIEW_QUEUE_SIZE", "1000")),
+    lanes=("review", "bulk"),
+    weight=rate_limit.client_weight
+)
+
+# Default number of blogs of one batch generating at once, and the largest
+# accepted batch (after de-duplication)
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "2"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+
+# Hours between checkpoint prune + VACUUM runs (0 disables)
+CHECKPOINT_MAINTENANCE_INTERVAL_HOURS = float(os.getenv("CHECKPOINT_MAINTENANCE_INTERVAL_HOURS", "24"))
+# Held by the one worker process that runs maintenance
+MAINTENANCE_LEASE = "checkpoint-maintenance"
+
+async def checkpoint_maintenance_loop():
+    """Periodically apply the checkpoint retention policy"""
+    while True:
+        await asyncio.sleep(CHECKPOINT_MAINTENANCE_INTERVAL_HOURS * 3600)
+        try:
+            # The first process to ask keeps the lease (renewed by its
+            # heartbeat) and runs maintenance for as long as it lives
+            if not await run_in_threadpool(job_leases.claim, [MAINTENANCE_LEASE]):
+                continue
+            await run_in_threadpool(run_maintenance)
+        except Exception as e:
+            logger.exception(f"[MAINTENANCE] Checkpoint maintenance failed: {str(e)}")
+
+def recovery_loop():
+    """
+    Re-queue orphaned generations and unresumed reviews at startup and
+    whenever a lease can have expired; also picks up topic embeddings
+    written by other workers
+    """
+    while True:
+        for recover in (recover_orphaned_blogs, recover_unresumed_reviews):
+            try:
+                recover()
+            except Exception as e:
+                logger.exception(f"[RECOVERY] Recovery pass failed: {str(e)}")
+        if topic_index.embedder is not None:
+            try:
+                load_topic_index()
+            except Exception as e:
+                logger.warning(f"[TOPICS] Refreshing the topic index failed: {str(e)}")
+        time.sleep(job_leases.JOB_LEASE_SECONDS)
+
+def setup_schema(attempts: int = 5):
+    """
+    Create missing tables, the search index and the status counters
+    Worker processes start together and race each other here; whoever loses
+    a CREATE or the counter seeding just tries again.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            init_db()
+            blog_search.create_search_index(engine)
+            rebuild_stats_counters()
+            return
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            logger.info(f"[STARTUP] Schema setup collided with another worker ({str(e)}), retrying")
+            time.sleep(0.2 * attempt)
+
+def load_topic_index():
+    """Sync the in-memory topic index with topic_embeddings (all worker processes write there)"""
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        added = topic_index.load(db)
+    finally:
+        db.close()
+    if added:
+        logger.info(f"[TOPICS] Indexed {added} topic embedding(s) ({topic_index.EMBEDDING_MODEL}), {len(topic_index.store)} in total")
+
+def rebuild_stats_counters():
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        blog_stats.rebuild_counters(db)
+    finally:
+        db.close()
+
+def ollama_models():
+    """(model, kind) pairs served by Ollama (fakes in benchmarks are skipped)"""
+    from langchain_ollama import ChatOllama, OllamaEmbeddings
+    models = []
+    if isinstance(blog_agents.llm, ChatOllama):
+        models.append((blog_agents.llm.model, "chat"))
+    models += [(model, "chat") for model in blog_agents.router.models() if (model, "chat") not in models]
+    if isinstance(topic_index.embedder, OllamaEmbeddings):
+        models.append((topic_index.embedder.model, "embed"))
+    return models
+
 # Lifespan context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    print("Starting Blog Generation API...")
-    init_db()
-    print("Application ready!")
+    logger.info(f"Starting Blog Generation API (worker {job_leases.worker_id()})...")
+    await run_in_threadpool(setup_schema)
+    if topic_index.embedder is not None:
+        await run_in_threadpool(load_topic_index)
+        # Embed blogs created while the index was off or the model unavailable
+        topic_index.schedule_backfill()
+    generation_queue.start()
+    review_queue.start()
+    job_leases.start_heartbeat()
+    # Load the models now so the first generation does not pay for it
+    ollama_client.start_warm_up(ollama_models())
+    # Re-queue generations interrupted by a crash/restart (here or in another
+    # worker process) without blocking startup
+    threading.Thread(target=recovery_loop, name="recovery", daemon=True).start()
+    maintenance_task = None
+    # Retention is implemented for the SQLite checkpoint file only
+    if CHECKPOINT_MAINTENANCE_INTERVAL_HOURS > 0 and CHECKPOINT_BACKEND == "sqlite":
+        maintenance_task = asyncio.create_task(checkpoint_maintenance_loop())
+    logger.info("Application ready!")
     yield
     # Shutdown
-    print("Shutting down...")
+    logger.info("Shutting down...")
+    if maintenance_task:
+        maintenance_task.cancel()
+    generation_queue.stop()
+    # Review jobs are short; let queued ones finish so checkpoints match blog_posts
+    review_queue.stop(drain=True)
+    # Resumes that did not get to run are left to another worker's recovery
+    await run_in_threadpool(job_leases.abandon, job_leases.held("review_"))
+    # Unfinished generations are picked up by the other workers right away
+    await run_in_threadpool(job_leases.stop_heartbeat)
+    await async_engine.dispose()
 
 app = FastAPI(
     title="Blog Generation API",
@@ -45,17 +235,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_latency(request, call_next):
+    """Observe API latency per route template (not per concrete URL)"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_LATENCY.labels(
+            request.method, route.path if route else "unmatched", str(status)
+        ).observe(time.perf_counter() - start)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Pydantic models
 class BlogRequest(BaseModel):
     topic: str
+    use_cache: bool = True  # False forces fresh LLM calls for this blog
+    # Near-duplicate handling: "reuse", "seed" or "ignore" (default
+    # TOPIC_DEDUPE_DEFAULT, or "ignore" when use_cache is false)
+    on_duplicate: Optional[str] = None
+    # Model routing tier, e.g. "fast" or "quality" (default: the tenant's
+    # tier from the routing config, else its default_tier)
+    tier: Optional[str] = None
+
+class BlogBatchRequest(BaseModel):
+    topics: List[str]
+    use_cache: bool = True
+    concurrency: Optional[int] = None  # defaults to BATCH_CONCURRENCY
+    tier: Optional[str] = None
 
 class ApprovalRequest(BaseModel):
     action: str  # "approve" or "reject"
     rejection_reason: Optional[str] = None
 
+class BulkReviewItem(ApprovalRequest):
+    id: int
+
+class BulkReviewRequest(BaseModel):
+    reviews: List[BulkReviewItem]
+
+class ReviewResult(BaseModel):
+    id: int
+    status: Optional[str] = None  # new status when the review was applied
+    error: Optional[str] = None   # why it was skipped otherwise
+
+class BulkReviewResponse(BaseModel):
+    reviewed: int
+    skipped: int
+    results: List[ReviewResult]
+
 class BlogResponse(BaseModel):
     id: int
     thread_id: str
@@ -66,9 +300,93 @@ class BlogResponse(BaseModel):
     created_at: str
     approved_at: Optional[str] = None
     rejection_reason: Optional[str] = None
+    revision: Optional[int] = None
+    updated_at: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
 
+class GenerateResponse(BlogResponse):
+    """The new blog, or the approved one reused instead of generating"""
+    dedupe: Optional[str] = None          # "reused" or "seeded"
+    duplicate_of: Optional[int] = None    # blog whose topic matched
+    similarity: Optional[float] = None    # cosine similarity of the topics
+
+class BlogSummary(BaseModel):
+    """List item - every field is optional so ?fields= can project"""
+    id: Optional[int] = None
+    thread_id: Optional[str] = None
+    topic: Optional[str] = None
+    title: Optional[str] = None
+    excerpt: Optional[str] = None
+    status: Optional[str] = None
+    created_at: Optional[str] = None
+    approved_at: Optional[str] = None
+    rejection_reason: Optional[str] = None
+
+class BlogPage(BaseModel):
+    items: List[BlogSummary]
+    next_cursor: Optional[str] = None
+
+class SearchHit(BaseModel):
+    id: int
+    thread_id: str
+    topic: str
+    title: str
+    status: str
+    created_at: str
+    approved_at: Optional[str] = None
+    snippet: str   # content around the first match
+    score: float   # relevance, higher is better
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_cursor: Optional[str] = None
+
+class BatchProgress(BaseModel):
+    batch_id: str
+    created_at: str
+    concurrency: int
+    total: int
+    generating: int
+    ready_for_review: int
+    approved: int
+    rejected: int
+    failed: int
+    done: int
+
+class BlogBatchResponse(BatchProgress):
+    duplicate_topics: List[str]
+    blog_ids: List[int]
+
+# Placeholder values written while a blog is still being generated
+GENERATING_TITLE = "Generating..."
+GENERATING_CONTENT = "Blog generation in progress..."
+# rejection_reason prefix of blogs whose generation failed
+GENERATION_ERROR = "Generation error"
+
+def blog_to_response(blog: BlogPost) -> BlogResponse:
+    """Build the API response model for a blog row"""
+    return BlogResponse(
+        id=blog.id,
+        thread_id=blog.thread_id,
+        topic=blog.topic,
+        title=blog.title,
+        content=blog.content,
+        status=blog.status.value,
+        created_at=blog.created_at.isoformat(),
+        approved_at=blog.approved_at.isoformat() if blog.approved_at else None,
+        rejection_reason=blog.rejection_reason,
+        revision=blog.revision,
+        updated_at=blog.updated_at.isoformat() if blog.updated_at else None
+    )
+
+# Blog reads carry an ETag; no-cache makes browsers revalidate it on every
+# request instead of reusing a stale copy, so an unchanged blog costs a 304
+REVALIDATE = "no-cache"
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE})
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
     """Serve the frontend"""
@@ -80,55 +398,390 @@ async def read_root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint
+    "degraded" while Ollama is unreachable, a model is not loaded or the LLM
+    circuit breaker is not closed; the response stays 200 so a cold model
+    does not get the container restarted
+    """
+    ollama = await run_in_threadpool(ollama_client.model_status)
+    circuit = breaker.status()
     return {
-        "status": "healthy",
+        "status": "healthy" if ollama["ready"] and circuit["state"] == breaker.CLOSED else "degraded",
+        "ollama": ollama,
+        "llm_circuit": circuit,
         "langchain_project": os.getenv("LANGCHAIN_PROJECT"),
-        "database": os.getenv("DATABASE")
+        "database": os.getenv("DATABASE"),
+        "llm_cache": await run_in_threadpool(llm_cache.stats) if llm_cache else None,
+        "blog_cache": blog_cache.stats(),
+        "rate_limit": rate_limit.generate_limiter.stats(),
+        "topic_index": topic_index.stats()
     }
 
-def generate_blog_async(topic: str, thread_id: str, blog_id: int):
-    """Background task to generate blog - uses separate DB session"""
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        # Several worker processes: sum up what each of them wrote to the directory
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+def generate_blog_async(topic: str, thread_id: str, blog_id: int, use_cache: bool = True,
+                        resume: bool = False, outline: str = "", tier: Optional[str] = None,
+                        attempt: int = 1):
+    """
+    Background task to generate blog - uses separate DB session
+    resume=True continues from the thread's last checkpoint (crash recovery)
+    outline, if given, replaces the research step (near-duplicate seeding)
+    tier picks the model routing tier (resumed runs keep their own)
+    A transient LLM failure re-queues the job (attempt + 1) to resume from
+    its last checkpoint; only the last attempt or other errors reject the blog.
+    """
     from database import SessionLocal
+    # The job was leased when it was queued; if the lease was lost (this
+    # process stalled past JOB_LEASE_SECONDS) another worker has taken over
+    if not job_leases.claim([thread_id]):
+        logger.info(f"[Background] {thread_id} is being generated by another worker, skipping")
+        blog_events.forget(thread_id)
+        return
     db = SessionLocal()
+
+    def on_event(event):
+        # Progress events double as lease checkpoints: stop once another
+        # worker has taken this generation over
+        job_leases.check(thread_id)
+        blog_events.publish(thread_id, event)
+
+    started = time.perf_counter()
+    GENERATIONS_IN_FLIGHT.inc()
+    # Released once the blog is finished, rejected or gone - but kept while a retry is pending
+    keep_lease = False
+    # Progress events stay replayable for the retry
+    retrying = False
     
     try:
-        print(f"\n[Background] Starting blog generation for thread: {thread_id}")
-        blog_data = generate_blog(topic, thread_id)
+        if attempt > 1 and not db.query(BlogPost.id).filter(
+            BlogPost.id == blog_id, BlogPost.title == GENERATING_TITLE
+        ).first():
+            logger.info(f"[Background] Blog {blog_id} was deleted before its retry, skipping")
+            return
+        blog_data = None
+        if resume:
+            blog_data = resume_blog(thread_id, on_event=on_event)
+        if blog_data is None:
+            logger.info(f"[Background] Starting blog generation for thread: {thread_id}")
+            blog_data = generate_blog(topic, thread_id, on_event=on_event, use_cache=use_cache,
+                                      outline=outline, tier=tier)
         
         # Update the blog post in database with generated content
+        job_leases.check(thread_id)
         blog_post = db.query(BlogPost).filter(BlogPost.id == blog_id).first()
         if blog_post:
             blog_post.title = blog_data["title"]
             blog_post.content = blog_data["content"]
+            blog_post.excerpt = make_excerpt(blog_data["content"])
             blog_post.status = ApprovalStatus.PENDING
+            blog_stats.record_generated(db, time.perf_counter() - started)
             db.commit()
-            print(f"[Background] Blog generated successfully: {thread_id}")
-            print(f"[Background] Status: PENDING (awaiting human approval)")
+            db.refresh(blog_post)
+            logger.info(f"[Background] Blog generated successfully: {thread_id}")
+            logger.debug(f"[Background] Status: PENDING (awaiting human approval)")
+            blog_events.publish(thread_id, {
+                "type": "complete",
+                "blog": blog_to_response(blog_post).model_dump()
+            })
+        else:
+            # Blog was deleted while generating
+            blog_events.publish(thread_id, {"type": "error", "detail": "Blog not found"})
+    except job_leases.LeaseLostError as e:
+        # The new owner finishes the blog; the lease is not ours to release
+        db.rollback()
+        logger.warning(f"[Background] Stopped generating {thread_id}: {str(e)}")
+        keep_lease = True
     except Exception as e:
-        print(f"[Background] Error generating blog: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        # The failure may have happened mid-transaction (e.g. the blog was
+        # deleted under us); start the error handling from a clean session
+        db.rollback()
+        if is_transient(e) and attempt < GENERATION_MAX_ATTEMPTS:
+            retry_generation(topic, thread_id, blog_id, use_cache, outline, tier, attempt, e)
+            keep_lease = retrying = True
+            return
+        # The traceback is logged by the queue when the error reaches it below
+        logger.error(f"[Background] Error generating blog: {str(e)}")
         
         # Update status to rejected on error
         blog_post = db.query(BlogPost).filter(BlogPost.id == blog_id).first()
         if blog_post:
+            blog_stats.adjust_status(db, blog_post.status, ApprovalStatus.REJECTED)
             blog_post.status = ApprovalStatus.REJECTED
-            blog_post.rejection_reason = f"Generation error: {str(e)}"
+            blog_post.rejection_reason = f"{GENERATION_ERROR}: {str(e)}"
             db.commit()
+        blog_events.publish(thread_id, {"type": "error", "detail": f"{GENERATION_ERROR}: {str(e)}"})
+        # Let the job queue record the job as failed (GET /api/queue)
+        raise
     finally:
+        GENERATIONS_IN_FLIGHT.dec()
         db.close()
+        if not retrying:
+            blog_events.forget(thread_id)
+        if not keep_lease:
+            try:
+                job_leases.release([thread_id])
+            except Exception as e:
+                # It expires on its own; recovery then finds the blog finished
+                logger.warning(f"[Background] Could not release lease of {thread_id}: {str(e)}")
 
-@app.post("/api/generate", response_model=BlogResponse)
-async def create_blog(
-    request: BlogRequest, 
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Start blog generation process (async with HITL checkpoint)"""
+def retry_generation(topic: str, thread_id: str, blog_id: int, use_cache: bool, outline: str,
+                     tier: Optional[str], attempt: int, error: Exception):
+    """
+    Re-queue a generation that failed transiently after a jittered delay
+    The blog stays "Generating..." meanwhile (a restart recovers it as usual)
+    and the new job resumes from the thread's last checkpoint.
+    """
+    delay = generation_retry_delay(attempt)
+    logger.warning(
+        f"[Background] Generation of {thread_id} failed (attempt {attempt}/{GENERATION_MAX_ATTEMPTS}): "
+        f"{str(error)} - resuming from its checkpoint in {delay:.0f}s"
+    )
+    GENERATION_RETRIES.inc()
+    blog_events.publish(thread_id, {
+        "type": "retry", "attempt": attempt, "retry_in": round(delay, 1), "detail": str(error)
+    })
+    # The retry keeps the lane, client and batch slot of the job that failed
+    generation_queue.retry_later(
+        delay, generate_blog_async, topic, thread_id, blog_id, use_cache, job_id=thread_id,
+        resume=True, outline=outline, tier=tier, attempt=attempt + 1
+    )
+
+# Age a generating blog must reach before recovery may take it over
+RECOVERY_GRACE_SECONDS = 10
+
+def recover_orphaned_blogs():
+    """
+    Find blogs left at "Generating..." by a dead process and re-queue them
+    Each one resumes from its last LangGraph checkpoint, so completed nodes
+    are not paid for twice. Runs in its own thread and waits for queue slots.
+    """
+    from database import SessionLocal
+    db = SessionLocal()
+    # Skip blogs created a moment ago: their creator may not have leased them yet
+    created_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=RECOVERY_GRACE_SECONDS)
     try:
-        print(f"\n[API] Received request to generate blog on topic: {request.topic}")
-        
+        orphans = (
+            db.query(BlogPost.id, BlogPost.topic, BlogPost.thread_id, BlogPost.batch_id)
+            .filter(BlogPost.status == ApprovalStatus.PENDING, BlogPost.title == GENERATING_TITLE,
+                    BlogPost.created_at < created_before)
+            .order_by(BlogPost.id)
+            .all()
+        )
+        batch_limits = dict(
+            db.query(BlogBatch.id, BlogBatch.concurrency)
+            .filter(BlogBatch.id.in_({o.batch_id for o in orphans if o.batch_id}))
+            .all()
+        ) if orphans else {}
+    finally:
+        db.close()
+
+    # Jobs queued, running or waiting for a retry anywhere hold a live lease;
+    # only blogs whose lease is free or expired are really orphaned
+    orphans = [o for o in orphans if not generation_queue.get(o.thread_id)]
+    claimed = set(job_leases.claim([o.thread_id for o in orphans], reclaim=False)) if orphans else set()
+    orphans = [o for o in orphans if o.thread_id in claimed]
+    if not orphans:
+        return
+    logger.info(f"[RECOVERY] Found {len(orphans)} interrupted generation(s), re-queueing")
+    batches = {}
+    for blog_id, topic, thread_id, batch_id in orphans:
+        if batch_id in batch_limits:
+            # Batch members go back through their batch's concurrency cap
+            batches.setdefault(batch_id, []).append((blog_id, topic, thread_id))
+            continue
+        generation_queue.submit(
+            generate_blog_async, topic, thread_id, blog_id,
+            job_id=thread_id, kind="recover", block=True, resume=True
+        )
+        logger.info(f"[RECOVERY] Re-queued blog {blog_id} ({thread_id})")
+    for batch_id, rows in batches.items():
+        schedule_batch(rows, batch_limits[batch_id], resume=True)
+        logger.info(f"[RECOVERY] Re-queued {len(rows)} blog(s) of batch {batch_id}")
+
+def schedule_batch(rows, concurrency: int, use_cache: bool = True, resume: bool = False,
+                   tier: Optional[str] = None, client: str = SYSTEM_CLIENT):
+    """Queue (blog_id, topic, thread_id) rows in the bulk lane, at most `concurrency` generating at once"""
+    generation_queue.submit_batch(
+        [
+            (thread_id, generate_blog_async, (topic, thread_id, blog_id, use_cache),
+             {"resume": resume, "tier": tier})
+            for blog_id, topic, thread_id in rows
+        ],
+        concurrency,
+        kind="recover" if resume else "batch",
+        lane="bulk",
+        client=client
+    )
+
+def dedupe_topics(topics: List[str]):
+    """Unique non-blank topics in submission order, plus the dropped duplicates"""
+    seen = set()
+    unique, duplicates = [], []
+    for topic in topics:
+        topic = " ".join(topic.split())
+        if not topic:
+            continue
+        key = topic.casefold()
+        if key in seen:
+            duplicates.append(topic)
+        else:
+            seen.add(key)
+            unique.append(topic)
+    return unique, duplicates
+
+async def batch_progress(db: AsyncSession, batch: BlogBatch) -> dict:
+    """Aggregate status of a batch's blogs in one query"""
+    is_generating = and_(BlogPost.status == ApprovalStatus.PENDING, BlogPost.title == GENERATING_TITLE)
+    is_failed = and_(
+        BlogPost.status == ApprovalStatus.REJECTED,
+        BlogPost.rejection_reason.like(f"{GENERATION_ERROR}%")
+    )
+
+    def count_where(condition):
+        return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+    result = await db.execute(
+        select(
+            func.count(BlogPost.id),
+            count_where(is_generating),
+            count_where(BlogPost.status == ApprovalStatus.PENDING),
+            count_where(BlogPost.status == ApprovalStatus.APPROVED),
+            count_where(BlogPost.status == ApprovalStatus.REJECTED),
+            count_where(is_failed),
+        ).where(BlogPost.batch_id == batch.id)
+    )
+    rows, generating, pending, approved, rejected, failed = result.one()
+    return {
+        "batch_id": batch.id,
+        "created_at": batch.created_at.isoformat(),
+        "concurrency": batch.concurrency,
+        "total": batch.total,
+        "generating": generating,
+        "ready_for_review": pending - generating,
+        "approved": approved,
+        "rejected": rejected - failed,
+        "failed": failed,
+        # Deleted blogs count as done
+        "done": batch.total - generating,
+    }
+
+def queue_full_response(error: QueueFullError) -> JSONResponse:
+    """429 response telling the client when to retry"""
+    if isinstance(error, ClientQueueFullError):
+        detail = f"You already have {error.limit} generations queued. Please retry later."
+    else:
+        detail = "Generation queue is full. Please retry later."
+    return JSONResponse(status_code=429, content={"detail": detail}, headers={"Retry-After": str(error.retry_after)})
+
+def request_client(request: Request, x_api_key: Optional[str]) -> str:
+    """Client id used for rate limiting and fair queueing"""
+    return rate_limit.client_id(x_api_key, request.client.host if request.client else None,
+                                request.headers.get("x-forwarded-for"))
+
+def rate_limited_response(endpoint: str, client: str) -> Optional[JSONResponse]:
+    """429 if the client's generate token bucket is empty, else None"""
+    retry_after = rate_limit.generate_limiter.acquire(client)
+    if not retry_after:
+        return None
+    RATE_LIMITED.labels(endpoint, "rate").inc()
+    logger.info(f"[API] Rate limit hit by {client} on {endpoint}, retry after {retry_after}s")
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Too many generation requests. Please retry in {retry_after}s."},
+        headers={"Retry-After": str(retry_after)}
+    )
+
+async def find_duplicate(db: AsyncSession, vector, mode: str):
+    """
+    Earlier blog to reuse or seed from, as (action, blog, similarity)
+    "reuse" returns an approved post at or above TOPIC_REUSE_THRESHOLD as-is;
+    failing that (and in "seed" mode) the closest finished, non-rejected blog
+    at or above TOPIC_SEED_THRESHOLD lends its outline.
+    """
+    matches = topic_index.find_similar(vector)
+    if not matches:
+        return None
+    result = await db.execute(select(BlogPost).where(BlogPost.id.in_([blog_id for blog_id, _ in matches])))
+    blogs = {blog.id: blog for blog in result.scalars()}
+    if mode == "reuse":
+        for blog_id, score in matches:
+            blog = blogs.get(blog_id)
+            if blog and blog.status == ApprovalStatus.APPROVED and score >= topic_index.TOPIC_REUSE_THRESHOLD:
+                return "reused", blog, score
+    for blog_id, score in matches:
+        blog = blogs.get(blog_id)
+        if blog and blog.status != ApprovalStatus.REJECTED and blog.title != GENERATING_TITLE:
+            return "seeded", blog, score
+    return None
+
+def resolve_tier(requested: Optional[str], tenant: Optional[str]) -> str:
+    """Model routing tier of a request (400 for an unknown one)"""
+    try:
+        return blog_agents.router.resolve_tier(requested, tenant)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/generate", response_model=GenerateResponse)
+async def create_blog(request: BlogRequest, http_request: Request, db: AsyncSession = Depends(get_db),
+                      x_tenant: Optional[str] = Header(None), x_api_key: Optional[str] = Header(None)):
+    """
+    Start blog generation process (queued, with HITL checkpoint)
+    The topic is first compared with earlier topics (topic_index): depending
+    on on_duplicate an approved near-duplicate is returned instead, or its
+    outline seeds the new generation so the research step is skipped.
+    The tier (or the X-Tenant header's tier) picks the model of each node.
+    Each client (a known X-API-Key, else IP) has a token bucket and a limit on queued
+    generations, and shares the workers with other clients by weight.
+    """
+    tier = resolve_tier(request.tier, x_tenant)
+    mode = (request.on_duplicate or (topic_index.TOPIC_DEDUPE_DEFAULT if request.use_cache else "ignore")).lower()
+    if mode not in topic_index.DEDUPE_MODES:
+        raise HTTPException(status_code=400, detail=f"on_duplicate must be one of {', '.join(topic_index.DEDUPE_MODES)}")
+    client = request_client(http_request, x_api_key)
+    limited = rate_limited_response("generate", client)
+    if limited:
+        return limited
+
+    try:
+        logger.info(f"[API] Received request to generate blog on topic: {request.topic}")
+
+        # Embedding is a (local) model call - keep it off the event loop
+        vector = await run_in_threadpool(topic_index.embed, [request.topic])
+        duplicate = await find_duplicate(db, vector[0], mode) if vector is not None and mode != "ignore" else None
+        outline = ""
+        if duplicate:
+            action, match, similarity = duplicate
+            if action == "reused":
+                TOPIC_DEDUPE.labels("reused").inc()
+                logger.info(f"[API] Topic matches approved blog {match.id} ({similarity:.3f}), reusing it")
+                return GenerateResponse(
+                    **blog_to_response(match).model_dump(),
+                    dedupe=action, duplicate_of=match.id, similarity=similarity
+                )
+            outline = await run_in_threadpool(get_blog_outline, match.thread_id)
+            if not outline:
+                # Checkpoints of the match are gone - nothing to seed from
+                duplicate = None
+        TOPIC_DEDUPE.labels("seeded" if duplicate else "none").inc()
+
+        # Fail fast before creating a row that could never be processed
+        if generation_queue.is_full(client):
+            if not generation_queue.is_full():
+                RATE_LIMITED.labels("generate", "queued").inc()
+                return queue_full_response(ClientQueueFullError(
+                    generation_queue.retry_after(), client, generation_queue.client_max_queued
+                ))
+            return queue_full_response(QueueFullError(generation_queue.retry_after()))
+
         # Generate unique thread ID for this workflow
         thread_id = f"blog_{uuid.uuid4().hex[:16]}"
         
@@ -136,206 +789,705 @@ async def create_blog(
         blog_post = BlogPost(
             thread_id=thread_id,
             topic=request.topic,
-            title="Generating...",
-            content="Blog generation in progress...",
+            title=GENERATING_TITLE,
+            content=GENERATING_CONTENT,
+            excerpt=make_excerpt(GENERATING_CONTENT),
             status=ApprovalStatus.PENDING
         )
         db.add(blog_post)
-        db.commit()
-        db.refresh(blog_post)
+        # blog_stats works on sync sessions; run_sync lends it this one
+        await db.run_sync(blog_stats.adjust_status, None, ApprovalStatus.PENDING)
+        if vector is not None:
+            await db.flush()
+            await db.run_sync(topic_index.remember, [blog_post.id], vector)
+        await db.commit()
+        await db.refresh(blog_post)
         
-        print(f"[API] Blog entry created with ID: {blog_post.id}, thread: {thread_id}")
-        print(f"[API] Initial status: PENDING")
+        logger.info(f"[API] Blog entry created with ID: {blog_post.id}, thread: {thread_id}")
+        logger.debug(f"[API] Initial status: PENDING")
+        if duplicate:
+            logger.info(f"[API] Outline seeded from blog {duplicate[1].id} ({duplicate[2]:.3f})")
         
-        # Start blog generation in background - pass blog_id instead of db session
-        background_tasks.add_task(generate_blog_async, request.topic, thread_id, blog_post.id)
+        # Queue blog generation - pass blog_id instead of db session. Without
+        # the lease, another worker's recovery pass already took the job over.
+        try:
+            if await run_in_threadpool(job_leases.claim_new, [thread_id]):
+                generation_queue.submit(
+                    generate_blog_async, request.topic, thread_id, blog_post.id, request.use_cache,
+                    job_id=thread_id, kind="generate", lane="interactive", client=client,
+                    outline=outline, tier=tier
+                )
+        except QueueFullError as e:
+            # Lost the race for the last slot - drop the row we just created
+            await run_in_threadpool(job_leases.release, [thread_id])
+            await db.delete(blog_post)
+            await db.run_sync(blog_stats.adjust_status, ApprovalStatus.PENDING, None)
+            await db.run_sync(topic_index.forget, blog_post.id)
+            await db.commit()
+            logger.warning(f"[API] Queue full, blog {blog_post.id} discarded")
+            return queue_full_response(e)
         
-        return BlogResponse(
-            id=blog_post.id,
-            thread_id=blog_post.thread_id,
-            topic=blog_post.topic,
-            title=blog_post.title,
-            content=blog_post.content,
-            status=blog_post.status.value,
-            created_at=blog_post.created_at.isoformat(),
-            approved_at=blog_post.approved_at.isoformat() if blog_post.approved_at else None,
-            rejection_reason=blog_post.rejection_reason
-        )
+        response = GenerateResponse(**blog_to_response(blog_post).model_dump())
+        if duplicate:
+            response.dedupe, response.duplicate_of, response.similarity = "seeded", duplicate[1].id, duplicate[2]
+        return response
     except Exception as e:
-        print(f"[API] Error creating blog: {str(e)}")
+        logger.exception(f"[API] Error creating blog: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating blog: {str(e)}")
 
-@app.get("/api/blogs", response_model=List[BlogResponse])
+@app.post("/api/generate/batch", response_model=BlogBatchResponse)
+async def create_blog_batch(request: BlogBatchRequest, http_request: Request, db: AsyncSession = Depends(get_db),
+                            x_tenant: Optional[str] = Header(None), x_api_key: Optional[str] = Header(None)):
+    """
+    Start generation of many topics as one tracked batch
+    Identical topics (ignoring case and whitespace) are generated once. All
+    rows are created in one bulk insert and the batch is fed to the
+    generation queue at most `concurrency` blogs at a time, so it never
+    answers 429 for a full queue and leaves room for single requests, which
+    are also served first. A batch costs one token of the client's bucket.
+    """
+    tier = resolve_tier(request.tier, x_tenant)
+    topics, duplicates = dedupe_topics(request.topics)
+    if not topics:
+        raise HTTPException(status_code=400, detail="No topics given")
+    if len(topics) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} topics per batch")
+    client = request_client(http_request, x_api_key)
+    limited = rate_limited_response("batch", client)
+    if limited:
+        return limited
+    concurrency = max(1, min(request.concurrency or BATCH_CONCURRENCY, generation_queue.workers))
+
+    batch = BlogBatch(
+        id=uuid.uuid4().hex, total=len(topics), duplicates=len(duplicates), concurrency=concurrency
+    )
+    try:
+        db.add(batch)
+        await db.flush()
+        await db.execute(insert(BlogPost), [
+            {
+                "thread_id": f"blog_{uuid.uuid4().hex[:16]}",
+                "topic": topic,
+                "title": GENERATING_TITLE,
+                "content": GENERATING_CONTENT,
+                "excerpt": make_excerpt(GENERATING_CONTENT),
+                "status": ApprovalStatus.PENDING,
+                "batch_id": batch.id,
+            }
+            for topic in topics
+        ])
+        await db.run_sync(blog_stats.adjust_status, None, ApprovalStatus.PENDING, len(topics))
+        await db.commit()
+        await db.refresh(batch)
+    except Exception as e:
+        await db.rollback()
+        logger.exception(f"[API] Error creating batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error creating batch: {str(e)}")
+
+    result = await db.execute(
+        select(BlogPost.id, BlogPost.topic, BlogPost.thread_id)
+        .where(BlogPost.batch_id == batch.id)
+        .order_by(BlogPost.id)
+    )
+    rows = result.all()
+    claimed = set(await run_in_threadpool(job_leases.claim_new, [row.thread_id for row in rows]))
+    schedule_batch([row for row in rows if row.thread_id in claimed], concurrency,
+                   use_cache=request.use_cache, tier=tier, client=client)
+    # Embedding hundreds of topics would hold up the response
+    topic_index.schedule_backfill()
+    logger.info(f"[API] Batch {batch.id} created: {len(rows)} blogs, "
+                f"{len(duplicates)} duplicates dropped, concurrency {concurrency}")
+
+    return BlogBatchResponse(
+        **(await batch_progress(db, batch)),
+        duplicate_topics=duplicates,
+        blog_ids=[row.id for row in rows]
+    )
+
+@app.get("/api/batches/{batch_id}", response_model=BatchProgress)
+async def get_batch(batch_id: str, db: AsyncSession = Depends(get_db)):
+    """Aggregate progress of a batch"""
+    batch = await db.get(BlogBatch, batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return await batch_progress(db, batch)
+
+MAX_PAGE_SIZE = 100
+
+# Columns a list request may project with ?fields=
+SUMMARY_COLUMNS = {
+    "id": BlogPost.id,
+    "thread_id": BlogPost.thread_id,
+    "topic": BlogPost.topic,
+    "title": BlogPost.title,
+    # The stored excerpt; rows written before it existed fall back to the
+    # start of content (python migrate_blobs.py backfills them)
+    "excerpt": func.coalesce(BlogPost.excerpt, func.substr(BlogPost.content, 1, EXCERPT_LENGTH + 1)).label("excerpt"),
+    "status": BlogPost.status,
+    "created_at": BlogPost.created_at,
+    "approved_at": BlogPost.approved_at,
+    "rejection_reason": BlogPost.rejection_reason,
+}
+
+def encode_cursor(created_at: datetime, blog_id: int) -> str:
+    """Opaque keyset cursor for the (created_at, id) position of a row"""
+    raw = f"{created_at.isoformat()}|{blog_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        created_at, blog_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(blog_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/api/blogs", response_model=BlogPage, response_model_exclude_unset=True)
 async def get_all_blogs(
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    response: Response = None,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all blog posts, optionally filtered by status"""
+    """
+    List blog summaries newest first, optionally filtered by status
+    Keyset-paginated: pass next_cursor from the previous page as ?cursor=.
+    Full content is never read here - only the stored excerpt.
+    ?fields=id,title,status limits each item to those fields.
+    The ETag covers the ids and revisions of the page's rows, so an
+    unchanged page is answered with a 304 before anything is serialized.
+    """
+    if fields:
+        wanted = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in wanted if f not in SUMMARY_COLUMNS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    else:
+        wanted = list(SUMMARY_COLUMNS)
+
     try:
-        query = db.query(BlogPost)
+        # created_at and id are always selected - they form the cursor
+        columns = [SUMMARY_COLUMNS[f] for f in wanted if f not in ("id", "created_at")]
+        query = select(BlogPost.id, BlogPost.created_at, BlogPost.revision, *columns)
         
         # Filter by status if provided
         if status:
             if status.lower() in ["pending", "approved", "rejected"]:
-                query = query.filter(BlogPost.status == ApprovalStatus[status.upper()])
-        
-        blogs = query.order_by(BlogPost.created_at.desc()).all()
+                query = query.where(BlogPost.status == ApprovalStatus[status.upper()])
+
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(or_(
+                BlogPost.created_at < cursor_created_at,
+                and_(BlogPost.created_at == cursor_created_at, BlogPost.id < cursor_id)
+            ))
         
-        return [
-            BlogResponse(
-                id=blog.id,
-                thread_id=blog.thread_id,
-                topic=blog.topic,
-                title=blog.title,
-                content=blog.content,
-                status=blog.status.value,
-                created_at=blog.created_at.isoformat(),
-                approved_at=blog.approved_at.isoformat() if blog.approved_at else None,
-                rejection_reason=blog.rejection_reason
-            )
-            for blog in blogs
-        ]
+        # Fetch one extra row to know whether another page exists
+        result = await db.execute(query.order_by(BlogPost.created_at.desc(), BlogPost.id.desc()).limit(limit + 1))
+        rows = result.all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        page_key = repr((status, limit, cursor, wanted, has_more, [(row.id, row.revision) for row in rows]))
+        etag = f'"page-{hashlib.sha1(page_key.encode()).hexdigest()}"'
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = REVALIDATE
+
+        items = []
+        for row in rows:
+            values = row._mapping
+            item = {}
+            for field in wanted:
+                value = values[field]
+                if field == "excerpt" and value is not None and len(value) > EXCERPT_LENGTH:
+                    value = value[:EXCERPT_LENGTH] + "..."
+                elif field == "status":
+                    value = value.value
+                elif field in ("created_at", "approved_at"):
+                    value = value.isoformat() if value else None
+                item[field] = value
+            items.append(BlogSummary(**item))
+
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+        return BlogPage(items=items, next_cursor=next_cursor)
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"[API] Error fetching blogs: {str(e)}")
+        logger.exception(f"[API] Error fetching blogs: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching blogs: {str(e)}")
 
+# Results reachable by paging through one search
+MAX_SEARCH_RESULTS = 1000
+
+@app.get("/api/blogs/search", response_model=SearchPage)
+async def search_blogs(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Full-text search over title, topic and content, most relevant first
+    Uses the FULLTEXT index on MySQL and an FTS5 table on SQLite. Blogs that
+    are still generating are left out. Pass next_cursor as ?cursor= for the
+    next page.
+    """
+    if status and status.lower() not in ("pending", "approved", "rejected"):
+        raise HTTPException(status_code=400, detail="Invalid status")
+    offset = 0
+    if cursor:
+        try:
+            offset = int(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (ValueError, UnicodeDecodeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    limit = max(0, min(limit, MAX_SEARCH_RESULTS - offset))
+
+    try:
+        hits, has_more = await db.run_sync(
+            blog_search.search, q,
+            status=ApprovalStatus[status.upper()] if status else None,
+            exclude_title=GENERATING_TITLE, limit=limit, offset=offset
+        ) if limit else ([], False)
+    except Exception as e:
+        logger.exception(f"[API] Error searching blogs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error searching blogs: {str(e)}")
+
+    items = [
+        SearchHit(
+            id=blog.id,
+            thread_id=blog.thread_id,
+            topic=blog.topic,
+            title=blog.title,
+            status=blog.status.value,
+            created_at=blog.created_at.isoformat(),
+            approved_at=blog.approved_at.isoformat() if blog.approved_at else None,
+            snippet=snippet,
+            score=round(score, 4),
+        )
+        for blog, score, snippet in hits
+    ]
+    next_offset = offset + len(items)
+    next_cursor = (
+        base64.urlsafe_b64encode(str(next_offset).encode()).decode()
+        if has_more and next_offset < MAX_SEARCH_RESULTS else None
+    )
+    return SearchPage(items=items, next_cursor=next_cursor)
+
 @app.get("/api/blogs/{blog_id}", response_model=BlogResponse)
-async def get_blog(blog_id: int, db: Session = Depends(get_db)):
-    """Get a specific blog post"""
-    blog = db.query(BlogPost).filter(BlogPost.id == blog_id).first()
-    if not blog:
-        raise HTTPException(status_code=404, detail="Blog not found")
-    
-    return BlogResponse(
-        id=blog.id,
-        thread_id=blog.thread_id,
-        topic=blog.topic,
-        title=blog.title,
-        content=blog.content,
-        status=blog.status.value,
-        created_at=blog.created_at.isoformat(),
-        approved_at=blog.approved_at.isoformat() if blog.approved_at else None,
-        rejection_reason=blog.rejection_reason
+async def get_blog(blog_id: int, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_db)):
+    """
+    Get a specific blog post
+    The ETag changes with the blog's revision; send it back as
+    If-None-Match to get a 304 while nothing changed. Approved blogs are
+    served from an in-process cache without touching the database.
+    """
+    cached = blog_cache.get(blog_id)
+    if cached:
+        etag, body = cached
+    else:
+        # Revision only - answering a 304 must not read the content
+        revision = await db.scalar(select(BlogPost.revision).where(BlogPost.id == blog_id))
+        if revision is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        etag, body = blog_etag(blog_id, revision), None
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    if body is None:
+        blog = await db.get(BlogPost, blog_id)
+        if not blog:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        # The row may have moved on since the revision was read
+        etag = blog_etag(blog.id, blog.revision)
+        body = blog_to_response(blog).model_dump_json().encode()
+        if blog.status == ApprovalStatus.APPROVED:
+            blog_cache.put(blog_id, etag, body)
+    return Response(content=body, media_type="application/json",
+                    headers={"ETag": etag, "Cache-Control": REVALIDATE})
+
+def _sse(event: dict) -> str:
+    """Format an event as a Server-Sent Events message"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT_SECONDS = 15
+# Progress events only reach streams in the worker process running the job;
+# other workers check the row this often to notice it finished
+STREAM_DB_POLL_SECONDS = float(os.getenv("STREAM_DB_POLL_SECONDS", "3"))
+
+async def finished_event(blog_id: int) -> Optional[dict]:
+    """The stream's final event if the blog is no longer generating, else None"""
+    async with AsyncSessionLocal() as db:
+        blog = await db.get(BlogPost, blog_id)
+        if blog is None:
+            return {"type": "error", "detail": "Blog was deleted"}
+        if blog.status == ApprovalStatus.PENDING and blog.title == GENERATING_TITLE:
+            return None
+        if blog.status == ApprovalStatus.REJECTED and (blog.rejection_reason or "").startswith(GENERATION_ERROR):
+            return {"type": "error", "detail": blog.rejection_reason}
+        return {"type": "complete", "blog": blog_to_response(blog).model_dump()}
+
+@app.get("/api/blogs/{blog_id}/stream")
+async def stream_blog(blog_id: int):
+    """
+    Stream generation progress for a blog as Server-Sent Events
+    Events: node (a workflow node finished), token (writer/editor output),
+    retry (transient failure, resuming shortly), complete (final blog data) and error
+    """
+    # Own session instead of Depends(get_db) so no DB connection is held
+    # for the lifetime of the stream
+    async with AsyncSessionLocal() as db:
+        blog = await db.get(BlogPost, blog_id)
+        if not blog:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        thread_id = blog.thread_id
+
+        # Subscribe BEFORE checking the row so a generation finishing in
+        # between cannot slip through unnoticed
+        queue = blog_events.subscribe(thread_id)
+        await db.refresh(blog)
+        generating = blog.status == ApprovalStatus.PENDING and blog.title == GENERATING_TITLE
+        finished = None if generating else {"type": "complete", "blog": blog_to_response(blog).model_dump()}
+
+    async def event_stream():
+        try:
+            if finished:
+                yield _sse(finished)
+                return
+            idle = 0.0
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=STREAM_DB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    event = await finished_event(blog_id)
+                    if event is None:
+                        idle += STREAM_DB_POLL_SECONDS
+                        if idle >= STREAM_HEARTBEAT_SECONDS:
+                            idle = 0.0
+                            yield ": keep-alive\n\n"
+                        continue
+                idle = 0.0
+                yield _sse(event)
+                if event["type"] in ("complete", "error"):
+                    return
+        finally:
+            blog_events.unsubscribe(thread_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+def resume_reviewed_workflow(thread_id: str, action: str, rejection_reason: Optional[str]):
+    """Review-queue job: record the decision in the checkpoint and run the graph to the end"""
+    try:
+        update_approval_status(thread_id=thread_id, action=action, rejection_reason=rejection_reason)
+    except Exception:
+        # Keep the lease row so recover_unresumed_reviews retries the resume
+        job_leases.abandon([f"review_{thread_id}"])
+        raise
+    job_leases.release([f"review_{thread_id}"])
+
+def review_error(blog: Optional[BlogPost], action: str) -> Optional[str]:
+    """Why a review cannot be applied, or None if it can"""
+    if not blog:
+        return "Blog not found"
+    if blog.status != ApprovalStatus.PENDING:
+        return f"Blog is already {blog.status.value}. Only pending blogs can be reviewed."
+    if blog.title == GENERATING_TITLE:
+        return "Blog is still generating"
+    if action not in ("approve", "reject"):
+        return "Invalid action. Use 'approve' or 'reject'"
+    return None
+
+def apply_reviews(db: Session, reviews: List[BulkReviewItem], leased: Set[str], lane: str = "review",
+                  client: str = SYSTEM_CLIENT) -> Tuple[List[ReviewResult], Set[str], Set[str]]:
+    """
+    Apply review decisions to blog_posts in one transaction and queue the
+    checkpoint updates. The database is the source of truth for status;
+    resuming the graph afterwards only runs the (side-effect free) final
+    nodes, so it is done in the background on the review queue.
+    Resumes are only queued for the review leases in `leased`; returns the
+    results, the leases now held by queued jobs and the leases of applied
+    reviews whose resume could not be queued.
+    """
+    if len(reviews) > review_queue.free_slots():
+        raise QueueFullError(review_queue.retry_after())
+    ids = [review.id for review in reviews]
+    # Row locks keep two reviewers from deciding the same blog twice
+    blogs = {
+        blog.id: blog
+        for blog in db.query(BlogPost).filter(BlogPost.id.in_(ids)).with_for_update().populate_existing().all()
+    }
+
+    results, jobs, seen = [], [], set()
+    reviewed_at = datetime.now(timezone.utc)
+    for review in reviews:
+        action = review.action.lower()
+        blog = blogs.get(review.id)
+        error = "Duplicate review in request" if review.id in seen else review_error(blog, action)
+        seen.add(review.id)
+        if error:
+            results.append(ReviewResult(id=review.id, error=error))
+            continue
+        if action == "approve":
+            blog.status = ApprovalStatus.APPROVED
+            blog.approved_at = reviewed_at
+            blog.rejection_reason = None
+        else:
+            blog.status = ApprovalStatus.REJECTED
+            blog.rejection_reason = review.rejection_reason or "No reason provided"
+        jobs.append((blog.thread_id, action, blog.rejection_reason))
+        results.append(ReviewResult(id=blog.id, status=blog.status.value))
+
+    for status in (ApprovalStatus.APPROVED, ApprovalStatus.REJECTED):
+        count = sum(1 for r in results if r.status == status.value)
+        blog_stats.adjust_status(db, ApprovalStatus.PENDING, status, count=count)
+        blog_stats.record_review(db, status, count=count)
+    db.commit()
+    for result in results:
+        if result.status:
+            blog_cache.invalidate(result.id)
+
+    queued, stranded = set(), set()
+    for thread_id, action, rejection_reason in jobs:
+        if f"review_{thread_id}" not in leased:
+            continue
+        try:
+            review_queue.submit(
+                resume_reviewed_workflow, thread_id, action, rejection_reason,
+                job_id=f"review_{thread_id}", kind="review", lane=lane, client=client
+            )
+            queued.add(f"review_{thread_id}")
+        except QueueFullError:
+            stranded.add(f"review_{thread_id}")
+            logger.warning(f"[API] Review queue full, workflow {thread_id} left for recovery")
+    return results, queued, stranded
+
+async def review_and_resume(db: AsyncSession, reviews: List[BulkReviewItem], lane: str,
+                            client: str) -> List[ReviewResult]:
+    """
+    apply_reviews() with the resumes leased like generations: a review_*
+    lease row stays until its resume succeeded, so if one never runs (queue
+    full, process gone) recover_unresumed_reviews finds it once the lease
+    has expired. The leases are claimed and released in the threadpool -
+    run_sync() code runs on the event loop thread.
+    """
+    pending = (await db.execute(
+        select(BlogPost.thread_id)
+        .where(BlogPost.id.in_([review.id for review in reviews]), BlogPost.status == ApprovalStatus.PENDING)
+    )).scalars().all()
+    # reclaim=False: a lease this process holds belongs to a concurrent review's job
+    leased = set(await run_in_threadpool(
+        job_leases.claim_new, [f"review_{thread_id}" for thread_id in pending], reclaim=False
+    ))
+    queued, stranded = set(), set()
+    try:
+        results, queued, stranded = await db.run_sync(apply_reviews, reviews, leased, lane, client)
+    finally:
+        if stranded:
+            await run_in_threadpool(job_leases.abandon, stranded)
+        if leased - queued - stranded:
+            # Reviews that were not applied
+            await run_in_threadpool(job_leases.release, leased - queued - stranded)
+    return results
+
+def recover_unresumed_reviews():
+    """
+    Re-queue the checkpoint update of reviews whose resume never succeeded
+    Their review_* lease expired (process gone) or was abandoned (queue
+    full, resume failed); each one is claimed first, so only one process
+    resumes it. Workflows no longer paused at human_approval just lose
+    their lease row.
+    """
+    names = job_leases.expired("review_")
+    names = job_leases.claim(names, reclaim=False) if names else []
+    if not names:
+        return
+    threads = {name[len("review_"):]: name for name in names}
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        reviewed = (
+            db.query(BlogPost.thread_id, BlogPost.status, BlogPost.rejection_reason)
+            .filter(BlogPost.thread_id.in_(list(threads)),
+                    BlogPost.status.in_([ApprovalStatus.APPROVED, ApprovalStatus.REJECTED]))
+            .all()
+        )
+    finally:
+        db.close()
+
+    requeued = set()
+    for thread_id, status, rejection_reason in reviewed:
+        state = get_blog_state(thread_id)
+        if not state or list(state["next_nodes"]) != ["human_approval"]:
+            continue
+        action = "approve" if status == ApprovalStatus.APPROVED else "reject"
+        review_queue.submit(
+            resume_reviewed_workflow, thread_id, action, rejection_reason,
+            job_id=f"review_{thread_id}", kind="recover", block=True, lane="bulk"
+        )
+        requeued.add(threads[thread_id])
+        logger.info(f"[RECOVERY] Re-queued review of {thread_id}")
+    # Blog deleted meanwhile, or the workflow was resumed after all
+    job_leases.release(set(names) - requeued)
+
+@app.post("/api/blogs/review", response_model=BulkReviewResponse)
+async def review_blogs(request: BulkReviewRequest, http_request: Request, db: AsyncSession = Depends(get_db),
+                       x_api_key: Optional[str] = Header(None)):
+    """
+    Approve or reject many blogs at once
+    All applicable decisions are committed in one transaction; blogs that
+    cannot be reviewed are reported per item and skipped. Workflow
+    resumption happens in the background.
+    """
+    if not request.reviews:
+        raise HTTPException(status_code=400, detail="No reviews given")
+    if len(request.reviews) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} reviews per request")
+    try:
+        results = await review_and_resume(db, request.reviews, "bulk", request_client(http_request, x_api_key))
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except Exception as e:
+        await db.rollback()
+        logger.exception(f"[API] Error in bulk review: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing reviews: {str(e)}")
+
+    reviewed = sum(1 for r in results if r.status)
+    logger.info(f"[API] Bulk review: {reviewed} applied, {len(results) - reviewed} skipped")
+    return BulkReviewResponse(reviewed=reviewed, skipped=len(results) - reviewed, results=results)
+
 @app.post("/api/blogs/{blog_id}/review", response_model=BlogResponse)
 async def review_blog(
     blog_id: int,
     request: ApprovalRequest,
-    db: Session = Depends(get_db)
+    http_request: Request,
+    db: AsyncSession = Depends(get_db),
+    x_api_key: Optional[str] = Header(None)
 ):
     """
     Approve or reject a blog post
-    This updates the workflow state and resumes execution
-    NO POLLING - direct state update with graph.update_state()
+    The status change is committed immediately; the workflow checkpoint is
+    updated and resumed in the background (review queue)
     """
-    blog = db.query(BlogPost).filter(BlogPost.id == blog_id).first()
+    blog = await db.get(BlogPost, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
-    
-    if blog.status != ApprovalStatus.PENDING:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Blog is already {blog.status.value}. Only pending blogs can be reviewed."
-        )
-    
-    # Validate action
-    if request.action.lower() not in ["approve", "reject"]:
-        raise HTTPException(
-            status_code=400,
-            detail="Invalid action. Use 'approve' or 'reject'"
-        )
-    
+    error = review_error(blog, request.action.lower())
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
     try:
-        print(f"[API] Review request for blog {blog_id}")
-        print(f"[API] Thread ID: {blog.thread_id}")
-        print(f"[API] Action: {request.action}")
-        
-        # Update workflow state and resume execution using graph.update_state()
-        # This will trigger the workflow to continue from the checkpoint
-        result = update_approval_status(
-            thread_id=blog.thread_id,
-            action=request.action.lower(),
-            rejection_reason=request.rejection_reason
-        )
-        
-        print(f"[API] Workflow resumed and completed")
-        print(f"[API] Final status: {result['approval_status']}")
-        
-        # Update database with workflow result
-        if result['approval_status'] == "approved":
-            blog.status = ApprovalStatus.APPROVED
-            blog.approved_at = datetime.now(timezone.utc)
-            blog.rejection_reason = None
-            print(f"[API] Blog {blog_id} approved")
-        elif result['approval_status'] == "rejected":
-            blog.status = ApprovalStatus.REJECTED
-            blog.rejection_reason = request.rejection_reason or "No reason provided"
-            print(f"[API] Blog {blog_id} rejected: {blog.rejection_reason}")
-        
-        db.commit()
-        db.refresh(blog)
-        
-    except ValueError as e:
-        print(f"[API] ValueError: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
+        review = BulkReviewItem(id=blog_id, **request.model_dump())
+        result = (await review_and_resume(db, [review], "review", request_client(http_request, x_api_key)))[0]
+    except QueueFullError as e:
+        return queue_full_response(e)
     except Exception as e:
-        print(f"[API] Error in workflow review: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        await db.rollback()
+        logger.exception(f"[API] Error in workflow review: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing review: {str(e)}")
-    
-    return BlogResponse(
-        id=blog.id,
-        thread_id=blog.thread_id,
-        topic=blog.topic,
-        title=blog.title,
-        content=blog.content,
-        status=blog.status.value,
-        created_at=blog.created_at.isoformat(),
-        approved_at=blog.approved_at.isoformat() if blog.approved_at else None,
-        rejection_reason=blog.rejection_reason
-    )
+    if result.error:
+        # Lost a race with another reviewer
+        raise HTTPException(status_code=409, detail=result.error)
+
+    if blog.status == ApprovalStatus.APPROVED:
+        logger.info(f"[API] Blog {blog_id} approved")
+    else:
+        logger.info(f"[API] Blog {blog_id} rejected: {blog.rejection_reason}")
+    return blog_to_response(blog)
 
 @app.delete("/api/blogs/{blog_id}")
-async def delete_blog(blog_id: int, db: Session = Depends(get_db)):
+async def delete_blog(blog_id: int, db: AsyncSession = Depends(get_db)):
     """Delete a blog post"""
-    blog = db.query(BlogPost).filter(BlogPost.id == blog_id).first()
+    blog = await db.get(BlogPost, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     
-    db.delete(blog)
-    db.commit()
-    print(f"[API] Blog {blog_id} deleted successfully")
+    thread_id = blog.thread_id
+    await db.run_sync(blog_stats.adjust_status, blog.status, None)
+    await db.run_sync(topic_index.forget, blog_id)
+    await db.delete(blog)
+    await db.commit()
+    blog_cache.invalidate(blog_id)
+    # Checkpoints of a deleted blog can never be resumed or reviewed
+    try:
+        await run_in_threadpool(delete_blog_checkpoints, thread_id)
+    except Exception as e:
+        logger.warning(f"[API] Could not delete checkpoints for {thread_id}: {str(e)}")
+    logger.info(f"[API] Blog {blog_id} deleted successfully")
     return {"message": "Blog deleted successfully"}
 
 @app.get("/api/stats")
-async def get_stats(db: Session = Depends(get_db)):
-    """Get statistics about blog posts"""
-    total = db.query(BlogPost).count()
-    pending = db.query(BlogPost).filter(BlogPost.status == ApprovalStatus.PENDING).count()
-    approved = db.query(BlogPost).filter(BlogPost.status == ApprovalStatus.APPROVED).count()
-    rejected = db.query(BlogPost).filter(BlogPost.status == ApprovalStatus.REJECTED).count()
-    
+async def get_stats(days: int = Query(7, ge=1, le=90), db: AsyncSession = Depends(get_db)):
+    """
+    Get statistics about blog posts
+    Status totals come from incrementally maintained counters; throughput and
+    average generation time are reported per day for the last `days` days
+    """
+    return await db.run_sync(blog_stats.get_stats, days)
+
+@app.get("/api/models")
+async def get_models():
+    """
+    Model routing table per tier plus observed latency
+    node_latency is per node and tier, llm_latency per node and model, both
+    since process start (the same data as GET /metrics)
+    """
+    router = blog_agents.router
+    default_model = getattr(blog_agents.llm, "model", type(blog_agents.llm).__name__)
     return {
-        "total": total,
-        "pending": pending,
-        "approved": approved,
-        "rejected": rejected
+        "default_model": default_model,
+        "default_tier": router.default_tier,
+        "tiers": router.table(default_model),
+        "tenants": router.config["tenants"],
+        "node_latency": histogram_means(NODE_LATENCY),
+        "llm_latency": histogram_means(LLM_LATENCY),
     }
 
+@app.get("/api/queue")
+async def get_queue_status(name: str = "generation"):
+    """
+    Depth per lane, worker utilisation and live jobs of the generation (or
+    review) queue, plus queue waits per client (busiest first)
+    """
+    queues = {"generation": generation_queue, "review": review_queue}
+    if name not in queues:
+        raise HTTPException(status_code=404, detail=f"Unknown queue: {name}")
+    return queues[name].status()
+
+@app.post("/api/maintenance/checkpoints")
+async def prune_checkpoints(dry_run: bool = True):
+    """
+    Apply the checkpoint retention policy now
+    Defaults to a dry run that only reports the space that would be reclaimed
+    """
+    if CHECKPOINT_BACKEND != "sqlite":
+        raise HTTPException(status_code=400, detail=f"No retention policy for the {CHECKPOINT_BACKEND} checkpointer")
+    return await run_in_threadpool(run_maintenance, dry_run=dry_run)
+
 @app.get("/api/blogs/{blog_id}/state")
-async def get_workflow_state(blog_id: int, db: Session = Depends(get_db)):
+async def get_workflow_state(blog_id: int, db: AsyncSession = Depends(get_db)):
     """Get the current workflow state for a blog"""
-    blog = db.query(BlogPost).filter(BlogPost.id == blog_id).first()
+    blog = await db.get(BlogPost, blog_id)
     if not blog:
         raise HTTPException(status_code=404, detail="Blog not found")
     
-    state = get_blog_state(blog.thread_id)
+    # Checkpoint reads are synchronous SQLite calls
+    state = await run_in_threadpool(get_blog_state, blog.thread_id)
     if state is None:
         return {"status": "no_workflow", "message": "No active workflow found"}
     
     return state
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # WEB_CONCURRENCY > 1 starts that many worker processes; they share
+    # blog_posts and the checkpointer and split jobs through job_leases
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run("main:app" if workers > 1 else app, host="0.0.0.0", port=8000, workers=workers)
@@ -0,0 +1,147 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import Counter, Gauge, Histogram
+from functools import wraps
+from typing import Any, Dict, List
+import threading
+import time
+
+# -----------------------------
+# Prometheus Metrics
+# -----------------------------
+# Everything is registered on the default prometheus_client registry and
+# exported by GET /metrics in main.py. With several worker processes, set
+# PROMETHEUS_MULTIPROC_DIR to an empty directory so /metrics reports the sum
+# over all of them (gauges are then reported per pid).
+
+# Generation nodes take seconds to minutes; API calls milliseconds
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+NODE_LATENCY = Histogram(
+    "blog_node_duration_seconds", "Wall time of a workflow node", ["node", "tier"], buckets=SLOW_BUCKETS
+)
+NODE_ERRORS = Counter("blog_node_errors_total", "Workflow node executions that raised", ["node"])
+
+LLM_LATENCY = Histogram(
+    "blog_llm_duration_seconds", "Wall time of one LLM call", ["node", "model"], buckets=SLOW_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "blog_llm_tokens_total", "Tokens processed by the LLM", ["node", "model", "kind"]
+)
+LLM_TOKENS_PER_SECOND = Histogram(
+    "blog_llm_tokens_per_second", "Completion tokens per second of one LLM call", ["node", "model"],
+    buckets=(1, 5, 10, 20, 40, 80, 160, 320, 640, 1280)
+)
+LLM_ERRORS = Counter(
+    "blog_llm_errors_total", "Failed LLM calls by kind (transient, timeout, circuit_open, other)", ["node", "reason"]
+)
+CIRCUIT_STATE = Gauge("blog_llm_circuit_state", "LLM circuit breaker state (0 closed, 1 half-open, 2 open)")
+LLM_CACHE_LOOKUPS = Counter("blog_llm_cache_lookups_total", "LLM response cache lookups", ["result"])
+BLOG_CACHE_LOOKUPS = Counter("blog_response_cache_lookups_total", "Approved blog response cache lookups", ["result"])
+
+CHECKPOINT_LATENCY = Histogram(
+    "blog_checkpoint_duration_seconds", "Checkpoint saver operation time", ["operation"], buckets=FAST_BUCKETS
+)
+
+BLOB_READS = Counter(
+    "blog_content_blob_reads_total", "Content blob lookups by where they were served from", ["source"]
+)
+
+HTTP_LATENCY = Histogram(
+    "blog_http_request_duration_seconds", "API request latency", ["method", "route", "status"],
+    buckets=FAST_BUCKETS
+)
+GENERATIONS_IN_FLIGHT = Gauge("blog_generations_in_flight", "Generations currently running")
+QUEUE_DEPTH = Gauge("blog_queue_depth", "Jobs waiting in a job queue", ["queue"])
+RATE_LIMITED = Counter(
+    "blog_rate_limited_total", "Requests turned away by a per-client limit (rate or queued jobs)", ["endpoint", "limit"]
+)
+QUEUE_WAIT = Histogram(
+    "blog_queue_wait_seconds", "Time a job spent queued before a worker picked it up", ["queue", "kind"],
+    buckets=SLOW_BUCKETS
+)
+GENERATION_RETRIES = Counter(
+    "blog_generation_retries_total", "Generation jobs re-queued to resume after a transient failure"
+)
+TOPIC_DEDUPE = Counter(
+    "blog_topic_dedupe_total", "POST /api/generate outcomes of the near-duplicate lookup", ["action"]
+)
+
+
+def instrument_node(node: str):
+    """Decorator recording wall time (per model routing tier) and failures of a workflow node"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(state, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(state, *args, **kwargs)
+            except Exception:
+                NODE_ERRORS.labels(node).inc()
+                raise
+            finally:
+                tier = state.get("tier") or "default"
+                NODE_LATENCY.labels(node, tier).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def histogram_means(histogram) -> List[dict]:
+    """Observation count and mean of every label combination of a histogram"""
+    sums, counts = {}, {}
+    for metric in histogram.collect():
+        for sample in metric.samples:
+            key = tuple(sorted((k, v) for k, v in sample.labels.items() if k != "le"))
+            if sample.name.endswith("_sum"):
+                sums[key] = sample.value
+            elif sample.name.endswith("_count"):
+                counts[key] = sample.value
+    return [
+        {**dict(key), "count": int(count), "mean_seconds": round(sums.get(key, 0.0) / count, 3)}
+        for key, count in sorted(counts.items()) if count
+    ]
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    Callback handler recording latency and token usage of every chat model call
+    Pass it in the graph's config callbacks; LangGraph tags each call with the
+    node it ran in (metadata["langgraph_node"]).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[Any, tuple] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name", "unknown")
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), metadata.get("langgraph_node", "none"), model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        start, node, model = run
+        elapsed = time.perf_counter() - start
+        LLM_LATENCY.labels(node, model).observe(elapsed)
+
+        usage = None
+        generations = response.generations[0] if response.generations else []
+        if generations and getattr(generations[0], "message", None) is not None:
+            usage = getattr(generations[0].message, "usage_metadata", None)
+        if usage:
+            LLM_TOKENS.labels(node, model, "prompt").inc(usage.get("input_tokens", 0))
+            LLM_TOKENS.labels(node, model, "completion").inc(usage.get("output_tokens", 0))
+            if elapsed > 0 and usage.get("output_tokens"):
+                LLM_TOKENS_PER_SECOND.labels(node, model).observe(usage["output_tokens"] / elapsed)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+
+# Shared handler passed to every workflow run
+LLM_METRICS = LLMMetricsHandler()
@@ -0,0 +1,231 @@
+"""
+Move existing data to blob storage and measure what it saves
+
+- blog_workflow.db: checkpoints and pending writes saved before blob
+  storage existed keep their bodies inline. They are rewritten so large
+  strings live once, compressed, in content_blobs (see blob_store.py).
+- blog_posts: adds the excerpt column if the table predates it and fills it
+  in, so the blog list stops reading content.
+Before and after, it reports the checkpoint file size and payload bytes,
+get_tuple latency (cold and warm blob cache) over a sample of threads, and
+the latency of a blog list page.
+
+Safe to run while the API is up; VACUUM briefly blocks checkpoint writes.
+
+Usage:
+    python migrate_blobs.py --dry-run     # measure and report only
+    python migrate_blobs.py               # migrate + VACUUM
+    python migrate_blobs.py --json        # machine-readable report
+"""
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from typing import Iterable, List, Optional
+import argparse
+import json
+import logging
+import statistics
+import time
+
+from blob_store import BlobStore, BlobSerializer, TYPE_PREFIX
+from checkpoint_maintenance import file_size
+from checkpoint_store import connect, PooledSqliteSaver, CHECKPOINT_DB_PATH
+
+# Rows rewritten per transaction
+BATCH_ROWS = 200
+
+
+def _percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None}
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3),
+    }
+
+
+def payload_bytes(conn) -> int:
+    """Serialized checkpoints, writes and blobs, in bytes"""
+    total = conn.execute(
+        "SELECT (SELECT COALESCE(SUM(length(checkpoint) + length(metadata)), 0) FROM checkpoints)"
+        " + (SELECT COALESCE(SUM(length(value)), 0) FROM writes)"
+    ).fetchone()[0]
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'content_blobs'").fetchone():
+        total += conn.execute("SELECT COALESCE(SUM(length(data)), 0) FROM content_blobs").fetchone()[0]
+    return total
+
+
+def measure_reads(path: str, threads: List[str]) -> dict:
+    """get_tuple latency of each thread's latest checkpoint, cold then warm"""
+    saver = PooledSqliteSaver(path)
+    try:
+        result = {}
+        for run in ("cold", "warm"):
+            samples = []
+            for thread_id in threads:
+                start = time.perf_counter()
+                saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+                samples.append(time.perf_counter() - start)
+            result[run] = _percentiles(samples)
+        return result
+    finally:
+        saver.close()
+
+
+def rewrite_checkpoints(conn, dry_run: bool = False) -> dict:
+    """
+    Re-serialize every inline checkpoint and write through BlobSerializer
+    With dry_run=True everything happens in one transaction that is rolled
+    back, so the payload numbers are exact but nothing is kept.
+    """
+    plain = JsonPlusSerializer()
+    store = BlobStore(lambda: conn)
+    serde = BlobSerializer(store, plain)
+    store.setup()
+    report = {"checkpoints_rewritten": 0, "writes_rewritten": 0}
+
+    tables = (
+        ("checkpoints", "checkpoint", ("thread_id", "checkpoint_ns", "checkpoint_id"), "checkpoints_rewritten"),
+        ("writes", "value", ("thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"), "writes_rewritten"),
+    )
+    for table, column, key, counter in tables:
+        keys = ", ".join(key)
+        match = " AND ".join(f"{k} = ?" for k in key)
+        rows = conn.execute(
+            f"SELECT {keys}, type, {column} FROM {table} WHERE type NOT LIKE ? AND type != 'null'",
+            (TYPE_PREFIX + "%",),
+        ).fetchall()
+        for n, row in enumerate(rows, 1):
+            row_key, type_, payload = row[:len(key)], row[-2], row[-1]
+            new_type, new_payload = serde.dumps_typed(plain.loads_typed((type_, payload)))
+            if new_type != type_:
+                conn.execute(f"UPDATE {table} SET type = ?, {column} = ? WHERE {match}",
+                             (new_type, new_payload, *row_key))
+                report[counter] += 1
+            if not dry_run and n % BATCH_ROWS == 0:
+                conn.commit()
+        if not dry_run:
+            conn.commit()
+    report["blobs"] = conn.execute("SELECT COUNT(*) FROM content_blobs").fetchone()[0]
+    report["blob_raw_bytes"], report["blob_stored_bytes"] = conn.execute(
+        "SELECT COALESCE(SUM(size), 0), COALESCE(SUM(length(data)), 0) FROM content_blobs"
+    ).fetchone()
+    return report
+
+
+def migrate_checkpoints(path: str = CHECKPOINT_DB_PATH, dry_run: bool = False, vacuum: bool = True,
+                        sample: int = 50) -> dict:
+    """Rewrite the checkpoint file and report size and read latency before and after"""
+    conn = connect(path)
+    try:
+        threads = [row[0] for row in conn.execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY MAX(checkpoint_id) DESC LIMIT ?",
+            (sample,),
+        )]
+        report = {
+            "dry_run": dry_run,
+            "file_bytes_before": file_size(path),
+            "payload_bytes_before": payload_bytes(conn),
+            "reads_before": measure_reads(path, threads),
+        }
+        report.update(rewrite_checkpoints(conn, dry_run=dry_run))
+        report["payload_bytes_after"] = payload_bytes(conn)
+        if dry_run:
+            conn.rollback()
+        elif vacuum:
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    report["file_bytes_after"] = None if dry_run else file_size(path)
+    report["reads_after"] = None if dry_run else measure_reads(path, threads)
+    report["sampled_threads"] = len(threads)
+    return report
+
+
+def migrate_blog_posts(dry_run: bool = False, pages: int = 20) -> dict:
+    """Add and backfill blog_posts.excerpt; time a list page with and without it"""
+    from sqlalchemy import inspect, text
+    from database import engine, EXCERPT_LENGTH
+
+    report = {"excerpt_column_added": False, "excerpts_backfilled": 0}
+    list_page = "SELECT id, created_at, {excerpt} FROM blog_posts ORDER BY created_at DESC, id DESC LIMIT 20"
+
+    def time_page(conn, excerpt: str) -> dict:
+        samples = []
+        for _ in range(pages):
+            start = time.perf_counter()
+            conn.execute(text(list_page.format(excerpt=excerpt))).all()
+            samples.append(time.perf_counter() - start)
+        return _percentiles(samples)
+
+    with engine.connect() as conn:
+        report["list_page_from_content"] = time_page(conn, f"substr(content, 1, {EXCERPT_LENGTH + 1})")
+        if "excerpt" not in {c["name"] for c in inspect(conn).get_columns("blog_posts")}:
+            report["excerpt_column_added"] = True
+            if dry_run:
+                return report
+            conn.execute(text(f"ALTER TABLE blog_posts ADD COLUMN excerpt VARCHAR({EXCERPT_LENGTH + 1}) NULL"))
+        report["excerpts_backfilled"] = conn.execute(text(
+            f"UPDATE blog_posts SET excerpt = substr(content, 1, {EXCERPT_LENGTH + 1}) WHERE excerpt IS NULL"
+        )).rowcount
+        if dry_run:
+            conn.rollback()
+            return report
+        conn.commit()
+        report["list_page_from_excerpt"] = time_page(conn, "excerpt")
+    return report
+
+
+def format_report(report: dict) -> str:
+    mb = 1024 * 1024
+    ckpt, blogs = report["checkpoints"], report["blog_posts"]
+    verb = "would rewrite" if ckpt["dry_run"] else "rewrote"
+    lines = [
+        f"checkpoints: {verb} {ckpt['checkpoints_rewritten']} checkpoints and {ckpt['writes_rewritten']} writes; "
+        f"{ckpt['blobs']} blobs hold {ckpt['blob_raw_bytes'] / mb:.2f} MB of text in "
+        f"{ckpt['blob_stored_bytes'] / mb:.2f} MB",
+        f"  payload {ckpt['payload_bytes_before'] / mb:.2f} MB -> {ckpt['payload_bytes_after'] / mb:.2f} MB",
+    ]
+    if ckpt["file_bytes_after"] is not None:
+        lines.append(f"  file {ckpt['file_bytes_before'] / mb:.2f} MB -> {ckpt['file_bytes_after'] / mb:.2f} MB")
+    for run in ("cold", "warm"):
+        before = ckpt["reads_before"][run]
+        after = (ckpt["reads_after"] or {}).get(run)
+        line = f"  get_tuple {run} p50/p95 {before['p50_ms']}/{before['p95_ms']} ms"
+        if after:
+            line += f" -> {after['p50_ms']}/{after['p95_ms']} ms"
+        lines.append(line + f" ({ckpt['sampled_threads']} threads)")
+    lines.append(
+        f"blog_posts: excerpt column {'added' if blogs['excerpt_column_added'] else 'present'}, "
+        f"{blogs['excerpts_backfilled']} excerpts backfilled"
+        + (" (dry run)" if ckpt["dry_run"] else "")
+    )
+    before = blogs["list_page_from_content"]
+    after = blogs.get("list_page_from_excerpt")
+    line = f"  list page p50/p95 {before['p50_ms']}/{before['p95_ms']} ms"
+    if after:
+        line += f" -> {after['p50_ms']}/{after['p95_ms']} ms"
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="measure and report without changing anything")
+    parser.add_argument("--no-vacuum", action="store_true", help="skip VACUUM after rewriting checkpoints")
+    parser.add_argument("--checkpoint-db", default=CHECKPOINT_DB_PATH)
+    parser.add_argument("--sample", type=int, default=50, help="threads timed with get_tuple")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    report = {
+        "checkpoints": migrate_checkpoints(args.checkpoint_db, dry_run=args.dry_run,
+                                           vacuum=not args.no_vacuum, sample=args.sample),
+        "blog_posts": migrate_blog_posts(dry_run=args.dry_run),
+    }
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+from typing import Dict, List, Optional, Tuple
+import threading
+import logging
+import json
+import os
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Per-Node Model Routing
+# -----------------------------
+# Titles and outlines do not need the model that writes the body. Each
+# request runs in a tier ("quality" by default, "fast" for throughput) and
+# each tier maps workflow nodes to Ollama models:
+#
+#   {
+#     "default_tier": "quality",
+#     "tiers": {
+#       "quality": {"models": {"write_blog": "llama3.2:3b", "edit_blog": "llama3.2:3b"}},
+#       "fast": {"models": {"*": "qwen2.5:0.5b"}, "skip_edit_under_words": 400}
+#     },
+#     "tenants": {"newsletter-team": "fast"}
+#   }
+#
+# A model is a name or {"model": ..., "temperature": ...}; "*" is the tier's
+# fallback and nodes without a route use blog_agents.llm (OLLAMA_MODEL).
+# skip_edit_under_words passes short drafts through edit_blog unchanged.
+# Tenants (X-Tenant header) are pinned to a tier unless the request names one.
+#
+# Read from MODEL_ROUTES (inline JSON) or MODEL_ROUTES_FILE.
+
+MODEL_ROUTES_FILE = os.getenv("MODEL_ROUTES_FILE", "model_routes.json")
+NODES = ("do_research", "generate_title", "write_blog", "edit_blog")
+
+_DEFAULT_CONFIG = {"default_tier": "quality", "tiers": {"quality": {}, "fast": {}}, "tenants": {}}
+
+
+def load_config() -> dict:
+    """Routing config from MODEL_ROUTES or MODEL_ROUTES_FILE (built-in default otherwise)"""
+    raw = os.getenv("MODEL_ROUTES")
+    source = "MODEL_ROUTES"
+    if not raw and os.path.exists(MODEL_ROUTES_FILE):
+        with open(MODEL_ROUTES_FILE, encoding="utf-8") as f:
+            raw = f.read()
+        source = MODEL_ROUTES_FILE
+    if not raw:
+        return _DEFAULT_CONFIG
+    config = json.loads(raw)
+    config.setdefault("tiers", {})
+    config.setdefault("tenants", {})
+    config.setdefault("default_tier", next(iter(config["tiers"]), "quality"))
+    config["tiers"].setdefault(config["default_tier"], {})
+    for tier, settings in config["tiers"].items():
+        unknown = set(settings.get("models", {})) - set(NODES) - {"*"}
+        if unknown:
+            raise ValueError(f"{source}: unknown node(s) in tier {tier!r}: {', '.join(sorted(unknown))}")
+    for tenant, tier in config["tenants"].items():
+        if tier not in config["tiers"]:
+            raise ValueError(f"{source}: tenant {tenant!r} uses unknown tier {tier!r}")
+    logger.info(f"[ROUTER] Model routes from {source}: tiers {', '.join(config['tiers'])}")
+    return config
+
+
+class ModelRouter:
+    """Picks the chat model for a node in a tier, building each model once"""
+
+    def __init__(self, config: dict, factory):
+        self.config = config
+        # factory(model, temperature) -> chat model
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, Optional[float]], object] = {}
+
+    @property
+    def tiers(self) -> List[str]:
+        return list(self.config["tiers"])
+
+    @property
+    def default_tier(self) -> str:
+        return self.config["default_tier"]
+
+    def resolve_tier(self, requested: Optional[str] = None, tenant: Optional[str] = None) -> str:
+        """Requested tier, else the tenant's, else the default; ValueError if unknown"""
+        tier = requested or self.config["tenants"].get(tenant) or self.default_tier
+        if tier not in self.config["tiers"]:
+            raise ValueError(f"Unknown tier {tier!r}. Use one of: {', '.join(self.tiers)}")
+        return tier
+
+    def route(self, node: str, tier: Optional[str]) -> Optional[dict]:
+        """{"model", "temperature"} configured for node in tier, or None for the default model"""
+        models = self.config["tiers"].get(tier or self.default_tier, {}).get("models", {})
+        spec = models.get(node) or models.get("*")
+        if spec is None:
+            return None
+        return {"model": spec, "temperature": None} if isinstance(spec, str) else {
+            "model": spec["model"], "temperature": spec.get("temperature")
+        }
+
+    def model_for(self, node: str, tier: Optional[str]):
+        """Chat model routed for node in tier, or None to use the default model"""
+        route = self.route(node, tier)
+        if route is None:
+            return None
+        key = (route["model"], route["temperature"])
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._factory(*key)
+            return self._models[key]
+
+    def skip_edit_under_words(self, tier: Optional[str]) -> int:
+        return int(self.config["tiers"].get(tier or self.default_tier, {}).get("skip_edit_under_words", 0))
+
+    def models(self) -> List[str]:
+        """Every model named in the routes"""
+        names = set()
+        for tier in self.tiers:
+            for node in NODES:
+                route = self.route(node, tier)
+                if route:
+                    names.add(route["model"])
+        return sorted(names)
+
+    def table(self, default_model: str) -> dict:
+        """Resolved model of every node in every tier (for GET /api/models)"""
+        return {
+            tier: {
+                "models": {
+                    node: (self.route(node, tier) or {"model": default_model})["model"] for node in NODES
+                },
+                "skip_edit_under_words": self.skip_edit_under_words(tier),
+            }
+            for tier in self.tiers
+        }
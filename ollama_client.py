@@ -0,0 +1,186 @@
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+import httpx
+import threading
+import logging
+import time
+import re
+import os
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Ollama Client Configuration
+# -----------------------------
+# Every Ollama client in the process (chat models, embeddings, warm-up and
+# health probes) sends its requests through one httpx transport, i.e. one
+# pool of keep-alive connections with bounded size and explicit timeouts.
+# Without this each client had its own unbounded pool and no read timeout,
+# so a stuck Ollama could hold a generation worker forever.
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:0.5b")
+# How long Ollama keeps a model loaded after a request: seconds or 30s/10m/1h,
+# negative = until the server stops (pinned)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "-1")
+OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+# Longest wait for the next chunk of a response (model load included)
+OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "300"))
+# Connections to Ollama in use at once; keep >= generation workers x
+# WRITER_MAX_CONCURRENCY so requests do not queue in the pool
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "32"))
+# Idle connections kept open for reuse, and for how long
+OLLAMA_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OLLAMA_MAX_KEEPALIVE_CONNECTIONS", "16"))
+OLLAMA_KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+# Load the models at startup, retrying until Ollama has them (the model may
+# still be downloading) or the timeout passes
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "true").lower() == "true"
+OLLAMA_WARMUP_TIMEOUT = float(os.getenv("OLLAMA_WARMUP_TIMEOUT", "600"))
+OLLAMA_WARMUP_RETRY_SECONDS = float(os.getenv("OLLAMA_WARMUP_RETRY_SECONDS", "10"))
+# /health waits at most this long for Ollama
+OLLAMA_HEALTH_TIMEOUT = float(os.getenv("OLLAMA_HEALTH_TIMEOUT", "2"))
+
+_DURATION = re.compile(r"^(-?\d+(?:\.\d+)?)\s*([smh]?)$")
+_UNIT_SECONDS = {"": 1, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_keep_alive(value: str) -> int:
+    """'-1', '300', '30s', '10m' or '1h' as whole seconds (Ollama's keep_alive)"""
+    match = _DURATION.match(value.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid OLLAMA_KEEP_ALIVE: {value!r}")
+    seconds = float(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+    return -1 if seconds < 0 else int(seconds)
+
+
+KEEP_ALIVE_SECONDS = parse_keep_alive(OLLAMA_KEEP_ALIVE)
+
+_limits = httpx.Limits(
+    max_connections=OLLAMA_MAX_CONNECTIONS,
+    max_keepalive_connections=OLLAMA_MAX_KEEPALIVE_CONNECTIONS,
+    keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+)
+_timeout = httpx.Timeout(OLLAMA_READ_TIMEOUT, connect=OLLAMA_CONNECT_TIMEOUT)
+# retries=1 only repeats failed connection attempts, never a sent request
+_transport = httpx.HTTPTransport(limits=_limits, retries=1)
+_async_transport = httpx.AsyncHTTPTransport(limits=_limits, retries=1)
+
+# Warm-up and health requests
+_admin = httpx.Client(base_url=OLLAMA_BASE_URL, transport=_transport, timeout=_timeout)
+
+
+def _client_kwargs() -> dict:
+    return {
+        "client_kwargs": {"timeout": _timeout},
+        "sync_client_kwargs": {"transport": _transport},
+        "async_client_kwargs": {"transport": _async_transport},
+    }
+
+
+def create_chat_model(model: str = OLLAMA_MODEL, **kwargs) -> ChatOllama:
+    """ChatOllama on the shared connection pool, keeping the model loaded"""
+    return ChatOllama(
+        model=model, base_url=OLLAMA_BASE_URL, keep_alive=KEEP_ALIVE_SECONDS, **_client_kwargs(), **kwargs
+    )
+
+
+def create_embeddings(model: str) -> OllamaEmbeddings:
+    """OllamaEmbeddings on the shared connection pool, keeping the model loaded"""
+    return OllamaEmbeddings(model=model, base_url=OLLAMA_BASE_URL, keep_alive=KEEP_ALIVE_SECONDS, **_client_kwargs())
+
+
+# -----------------------------
+# Warm-up and Readiness
+# -----------------------------
+_status_lock = threading.Lock()
+# model -> {"kind", "state", "attempts", "load_seconds", "warmed_at", "error"}
+_status: Dict[str, dict] = {}
+
+
+def _set_status(model: str, **fields):
+    with _status_lock:
+        _status.setdefault(model, {}).update(fields)
+
+
+def load_model(model: str, kind: str = "chat") -> float:
+    """
+    Ask Ollama to load a model and keep it loaded; returns the load time
+    Chat models load through an empty /api/generate prompt (no tokens are
+    generated), embedding models through a one-word /api/embed.
+    """
+    started = time.perf_counter()
+    if kind == "embed":
+        response = _admin.post("/api/embed", json={
+            "model": model, "input": "warm-up", "keep_alive": KEEP_ALIVE_SECONDS
+        })
+    else:
+        response = _admin.post("/api/generate", json={
+            "model": model, "prompt": "", "stream": False, "keep_alive": KEEP_ALIVE_SECONDS
+        })
+    response.raise_for_status()
+    # Ollama reports its own load time in nanoseconds
+    load_ns = response.json().get("load_duration")
+    return load_ns / 1e9 if load_ns else time.perf_counter() - started
+
+
+def warm_up(models: List[Tuple[str, str]]):
+    """Load (model, kind) pairs, retrying until they load or OLLAMA_WARMUP_TIMEOUT"""
+    deadline = time.monotonic() + OLLAMA_WARMUP_TIMEOUT
+    pending = list(models)
+    attempts = 0
+    while pending:
+        attempts += 1
+        for model, kind in list(pending):
+            _set_status(model, state="loading", attempts=attempts)
+            try:
+                seconds = load_model(model, kind)
+            except Exception as e:
+                _set_status(model, state="failed", error=str(e) or type(e).__name__)
+                continue
+            pending.remove((model, kind))
+            _set_status(
+                model, state="ready", load_seconds=round(seconds, 3), error=None,
+                warmed_at=datetime.now(timezone.utc).isoformat()
+            )
+            logger.info(f"[OLLAMA] {model} loaded in {seconds:.2f}s (keep_alive {KEEP_ALIVE_SECONDS}s)")
+        if pending and time.monotonic() + OLLAMA_WARMUP_RETRY_SECONDS < deadline:
+            time.sleep(OLLAMA_WARMUP_RETRY_SECONDS)
+        elif pending:
+            for model, _ in pending:
+                logger.warning(f"[OLLAMA] Could not load {model}: {_status[model].get('error')}")
+            return
+
+
+def start_warm_up(models: List[Tuple[str, str]]):
+    """Warm models up on a background thread so startup is not held up"""
+    for model, kind in models:
+        _set_status(model, kind=kind, state="pending", attempts=0, load_seconds=None,
+                    warmed_at=None, error=None)
+    if OLLAMA_WARMUP and models:
+        threading.Thread(target=warm_up, args=(models,), name="ollama-warmup", daemon=True).start()
+
+
+def model_status() -> dict:
+    """Warm-up outcome per model plus whether Ollama has it loaded right now"""
+    with _status_lock:
+        models = {name: dict(status) for name, status in _status.items()}
+    try:
+        response = _admin.get("/api/ps", timeout=OLLAMA_HEALTH_TIMEOUT)
+        response.raise_for_status()
+        running = {m["name"]: m for m in response.json().get("models", [])}
+        reachable, error = True, None
+    except Exception as e:
+        running, reachable, error = {}, False, str(e) or type(e).__name__
+    for name, status in models.items():
+        # Ollama reports untagged models as name:latest
+        entry = running.get(name) or running.get(f"{name}:latest")
+        status["loaded"] = entry is not None
+        status["expires_at"] = entry.get("expires_at") if entry else None
+    return {
+        "base_url": OLLAMA_BASE_URL,
+        "reachable": reachable,
+        "error": error,
+        "ready": reachable and all(status["loaded"] for status in models.values()),
+        "models": models,
+    }
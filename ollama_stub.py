@@ -0,0 +1,204 @@
+"""
+Minimal stand-in for the Ollama HTTP API
+Serves /api/chat, /api/generate, /api/embed, /api/ps, /api/tags and
+/api/version with fake_llm output, so the real ChatOllama / OllamaEmbeddings
+clients, model warm-up and the /health readiness probe can be exercised
+without Ollama. A model takes --load-seconds to load on first use and is
+unloaded again when its keep_alive runs out, like the real server.
+
+Usage:
+    python ollama_stub.py --port 11435 --load-seconds 3
+    OLLAMA_BASE_URL=http://localhost:11435 python main.py
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta, timezone
+from langchain_core.messages import HumanMessage
+import argparse
+import json
+import threading
+import time
+
+from fake_llm import FakeChatModel, FakeEmbeddings
+from ollama_client import parse_keep_alive
+
+# Ollama's own default when a request does not send keep_alive
+DEFAULT_KEEP_ALIVE = 300
+
+
+class ModelRegistry:
+    """Which models are loaded and until when (None = pinned)"""
+
+    def __init__(self, models, load_seconds: float):
+        self.models = set(models)
+        self.load_seconds = load_seconds
+        self._lock = threading.Lock()
+        self._loading = {}
+        self._expires = {}
+
+    def _expired(self, name: str) -> bool:
+        expires = self._expires.get(name, 0)
+        return expires is not None and expires <= time.time()
+
+    def use(self, name: str, keep_alive) -> float:
+        """Load a model if needed; returns the seconds spent loading it"""
+        if name not in self.models:
+            raise KeyError(name)
+        with self._lock:
+            lock = self._loading.setdefault(name, threading.Lock())
+        # Concurrent first requests wait for one load, like Ollama
+        with lock:
+            loaded = 0.0
+            if name not in self._expires or self._expired(name):
+                time.sleep(self.load_seconds)
+                loaded = self.load_seconds
+            seconds = DEFAULT_KEEP_ALIVE if keep_alive is None else parse_keep_alive(str(keep_alive))
+            self._expires[name] = None if seconds < 0 else time.time() + seconds
+            return loaded
+
+    def running(self):
+        with self._lock:
+            names = [name for name in self._expires if not self._expired(name)]
+        far_future = datetime.now(timezone.utc) + timedelta(days=365 * 100)
+        return [
+            {
+                "name": name,
+                "model": name,
+                "expires_at": (
+                    datetime.fromtimestamp(self._expires[name], timezone.utc) if self._expires[name] else far_future
+                ).isoformat(),
+            }
+            for name in names
+        ]
+
+
+def make_handler(registry: ModelRegistry, llm: FakeChatModel, embeddings: FakeEmbeddings):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _json(self, status: int, body: dict):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _chunk(self, body: dict):
+            data = (json.dumps(body) + "\n").encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path == "/api/ps":
+                self._json(200, {"models": registry.running()})
+            elif self.path == "/api/tags":
+                self._json(200, {"models": [{"name": name, "model": name} for name in sorted(registry.models)]})
+            elif self.path == "/api/version":
+                self._json(200, {"version": "0.0.0-stub"})
+            else:
+                self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            model = request.get("model", "")
+            try:
+                load_seconds = registry.use(model, request.get("keep_alive"))
+            except KeyError:
+                self._json(404, {"error": f"model '{model}' not found, try pulling it first"})
+                return
+            load_ns = int(load_seconds * 1e9)
+
+            if self.path == "/api/embed":
+                texts = request.get("input", [])
+                texts = [texts] if isinstance(texts, str) else texts
+                self._json(200, {"model": model, "embeddings": embeddings.embed_documents(texts),
+                                 "load_duration": load_ns})
+            elif self.path == "/api/generate" and not request.get("prompt"):
+                # Empty prompt: load the model only
+                self._json(200, {"model": model, "response": "", "done": True, "done_reason": "load",
+                                 "load_duration": load_ns})
+            elif self.path in ("/api/chat", "/api/generate"):
+                self._complete(request, model, load_ns)
+            else:
+                self._json(404, {"error": "not found"})
+
+        def _complete(self, request: dict, model: str, load_ns: int):
+            chat = self.path == "/api/chat"
+            prompt = "\n".join(m.get("content", "") for m in request.get("messages", [])) if chat \
+                else request.get("prompt", "")
+            tokens = llm._tokens([HumanMessage(content=prompt)])
+            texts = [token if i == 0 else f" {token}" for i, token in enumerate(tokens)]
+            final = {
+                "model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": True,
+                "done_reason": "stop", "load_duration": load_ns,
+                "prompt_eval_count": len(prompt.split()), "eval_count": len(tokens),
+            }
+
+            def part(text: str) -> dict:
+                body = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), "done": False}
+                if chat:
+                    body["message"] = {"role": "assistant", "content": text}
+                else:
+                    body["response"] = text
+                return body
+
+            time.sleep(llm.first_token_latency)
+            delay = 1.0 / llm.tokens_per_second if llm.tokens_per_second > 0 else 0.0
+            if not request.get("stream", True):
+                time.sleep(delay * len(tokens))
+                self._json(200, {**part("".join(texts)), **final})
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for text in texts:
+                self._chunk(part(text))
+                if delay:
+                    time.sleep(delay)
+            self._chunk({**part(""), **final})
+            self.wfile.write(b"0\r\n\r\n")
+
+    return Handler
+
+
+def serve(port: int, models, load_seconds: float, llm: FakeChatModel, host: str = "127.0.0.1"):
+    """Start the stub on a background thread; returns the server (call shutdown() to stop)"""
+    server = ThreadingHTTPServer((host, port), make_handler(ModelRegistry(models, load_seconds), llm, FakeEmbeddings()))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="ollama-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--models", nargs="+", default=["qwen2.5:0.5b", "nomic-embed-text"])
+    parser.add_argument("--load-seconds", type=float, default=2.0, help="time to load a model")
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--response-tokens", type=int, default=120)
+    args = parser.parse_args()
+
+    llm = FakeChatModel(
+        first_token_latency=args.first_token_latency,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+    )
+    server = serve(args.port, args.models, args.load_seconds, llm, args.host)
+    print(f"Ollama stub on http://{args.host}:{args.port} serving {', '.join(args.models)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from typing import Dict, Optional
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
+import os
+
+# -----------------------------
+# Per-Client Rate Limiting
+# -----------------------------
+# Generation requests are charged against a token bucket per client: it
+# holds up to GENERATE_BURST tokens and refills at GENERATE_RATE_PER_MINUTE.
+# A request finding the bucket empty gets 429 with the Retry-After of the
+# next token, before any row is created or the LLM is touched.
+#
+# A client is its X-API-Key if that key is one of API_KEYS (only a hash of
+# it is ever shown), else its IP address - an unknown key must not buy a
+# fresh bucket and queue share per request. X-Forwarded-For is only
+# believed behind a proxy that sets it (TRUST_FORWARDED_FOR). Buckets live
+# in each worker process.
+
+# Requests per minute per client (0 disables the limit) and the burst on top
+GENERATE_RATE_PER_MINUTE = float(os.getenv("GENERATE_RATE_PER_MINUTE", "30"))
+GENERATE_BURST = int(os.getenv("GENERATE_BURST", "10"))
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
+# Fair-queueing weight per client id as shown by GET /api/queue, e.g.
+# CLIENT_WEIGHTS='{"key:3f2a9c0d1b7e": 4, "ip:10.0.0.7": 0.5}' (default 1)
+CLIENT_WEIGHTS: Dict[str, float] = {
+    client: float(weight) for client, weight in json.loads(os.getenv("CLIENT_WEIGHTS") or "{}").items()
+}
+# Accepted API keys, comma-separated: the keys themselves or "sha256:<hex digest>"
+API_KEYS = [key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip()]
+# Buckets kept in memory (least recently used dropped - a dropped bucket is full)
+RATE_LIMIT_CLIENTS = int(os.getenv("RATE_LIMIT_CLIENTS", "10000"))
+
+
+def _key_digest(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+API_KEY_DIGESTS = frozenset(
+    key[len("sha256:"):].lower() if key.startswith("sha256:") else _key_digest(key) for key in API_KEYS
+)
+
+
+def known_key_digest(api_key: Optional[str]) -> Optional[str]:
+    """SHA-256 of api_key if it is one of API_KEYS, else None"""
+    if not api_key:
+        return None
+    digest = _key_digest(api_key)
+    # Constant-time comparison against every accepted key
+    known = False
+    for accepted in API_KEY_DIGESTS:
+        known |= hmac.compare_digest(digest, accepted)
+    return digest if known else None
+
+
+def client_id(api_key: Optional[str], host: Optional[str], forwarded_for: Optional[str] = None) -> str:
+    """Stable, printable id of the client behind a request (unknown API keys count as their IP)"""
+    digest = known_key_digest(api_key)
+    if digest:
+        return "key:" + digest[:12]
+    if TRUST_FORWARDED_FOR and forwarded_for:
+        # Left-most entry is the original client
+        return "ip:" + forwarded_for.split(",")[0].strip()
+    return f"ip:{host or 'unknown'}"
+
+
+def client_weight(client: str) -> float:
+    return CLIENT_WEIGHTS.get(client, 1.0)
+
+
+class TokenBucket:
+    """`burst` tokens, refilled continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, tokens: float = 1.0) -> float:
+        """Take tokens if there are enough; else seconds until there will be"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """One TokenBucket per client"""
+
+    def __init__(self, per_minute: float, burst: int, max_clients: int = RATE_LIMIT_CLIENTS):
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, client: str, tokens: float = 1.0) -> int:
+        """0 if the client may go ahead, else the whole seconds to wait (Retry-After)"""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            bucket = self._buckets.pop(client, None) or TokenBucket(self.rate, self.burst)
+            self._buckets[client] = bucket
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            wait = bucket.take(tokens)
+            if wait:
+                self._limited += 1
+        return max(1, math.ceil(wait)) if wait else 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "per_minute": round(self.rate * 60, 3),
+                "burst": self.burst,
+                "clients": len(self._buckets),
+                "limited": self._limited,
+            }
+
+
+generate_limiter = RateLimiter(GENERATE_RATE_PER_MINUTE, GENERATE_BURST)
@@ -1,9 +1,18 @@
 const API_BASE = '';
 let currentBlogId = null;
 let currentFilter = 'all';
-let pollInterval = null;
+let currentQuery = '';  // full-text search; empty lists blogs newest first
+let blogStream = null;
 let statsInterval = null;
 
+// Blog list pagination (keyset cursor from the API)
+const PAGE_SIZE = 20;
+let nextCursor = null;
+let hasMoreBlogs = true;
+let loadingBlogs = false;
+let loadedBlogCount = 0;
+let listVersion = 0;  // bumped on reset so stale page responses are dropped
+
 // DOM Elements
 const blogForm = document.getElementById('blogForm');
 const topicInput = document.getElementById('topic');
@@ -14,6 +23,8 @@ const blogsList = document.getElementById('blogsList');
 const refreshBtn = document.getElementById('refreshBtn');
 const rejectModal = document.getElementById('rejectModal');
 const rejectionReason = document.getElementById('rejectionReason');
+const blogsSentinel = document.getElementById('blogsSentinel');
+const blogSearch = document.getElementById('blogSearch');
 
 // Initialize
 document.addEventListener('DOMContentLoaded', () => {
@@ -29,6 +40,16 @@ document.addEventListener('DOMContentLoaded', () => {
     loadAllBlogs();
     loadStats();
     
+    // Fetch the next page when the end of the list scrolls into view
+    if (blogsSentinel && 'IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadMoreBlogs();
+            }
+        }, { rootMargin: '300px' });
+        observer.observe(blogsSentinel);
+    }
+    
     // Update stats every 30 seconds (reduced from 10 seconds)
     statsInterval = setInterval(loadStats, 30000);
     
@@ -40,6 +61,18 @@ if (blogForm) {
     blogForm.addEventListener('submit', handleGenerate);
 }
 
+if (blogSearch) {
+    // Debounced so typing does not fire a request per keystroke
+    let searchTimer = null;
+    blogSearch.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => {
+            currentQuery = blogSearch.value.trim();
+            loadAllBlogs();
+        }, 300);
+    });
+}
+
 if (refreshBtn) {
     refreshBtn.addEventListener('click', () => {
         loadAllBlogs();
@@ -82,13 +115,11 @@ async function handleGenerate(e) {
     generatedBlog.classList.add('hidden');
     
     // Reset progress steps
-    document.getElementById('step1').innerHTML = '✓ Researching topic...';
-    document.getElementById('step2').innerHTML = '⏳ Creating title...';
-    document.getElementById('step3').innerHTML = '⏳ Writing content...';
-    document.getElementById('step4').innerHTML = '⏳ Editing & refining...';
-    
-    // Simulate progress steps
-    simulateProgress();
+    Object.values(NODE_STEPS).forEach(step => {
+        const el = document.getElementById(step.id);
+        el.innerHTML = `⏳ ${step.label}...`;
+        el.style.color = '';
+    });
     
     try {
         const response = await fetch(`${API_BASE}/api/generate`, {
@@ -99,6 +130,13 @@ async function handleGenerate(e) {
             body: JSON.stringify({ topic })
         });
         
+        if (response.status === 429) {
+            // Full queue, or this client's rate / queued-jobs limit
+            const retryAfter = response.headers.get('Retry-After');
+            const error = await response.json().catch(() => ({}));
+            const reason = error.detail || 'The generation queue is full.';
+            throw new Error(`${reason} Please try again in ${retryAfter || 'a few'} seconds.`);
+        }
         if (!response.ok) {
             throw new Error('Failed to generate blog');
         }
@@ -106,8 +144,11 @@ async function handleGenerate(e) {
         const blog = await response.json();
         console.log('Blog creation started, ID:', blog.id, 'Status:', blog.status);
         
-        // Start polling for this specific blog
-        startPollingBlog(blog.id);
+        // Follow progress for this specific blog
+        currentBlogId = null;
+        document.getElementById('blogTitle').textContent = blog.title;
+        document.getElementById('blogTopic').textContent = blog.topic;
+        streamBlog(blog.id);
         
         loadAllBlogs();
         loadStats();
@@ -121,90 +162,109 @@ async function handleGenerate(e) {
     }
 }
 
-// Poll for blog updates - with completion detection
-function startPollingBlog(blogId) {
-    console.log('Starting to poll for blog:', blogId);
-    
-    // Clear any existing poll
-    if (pollInterval) {
-        clearInterval(pollInterval);
-        pollInterval = null;
+// Progress step for each workflow node
+const NODE_STEPS = {
+    do_research: { id: 'step1', label: 'Researching topic' },
+    generate_title: { id: 'step2', label: 'Creating title' },
+    write_blog: { id: 'step3', label: 'Writing content' },
+    edit_blog: { id: 'step4', label: 'Editing & refining' }
+};
+
+function markStep(node, done) {
+    const step = NODE_STEPS[node];
+    if (!step) return;
+    const el = document.getElementById(step.id);
+    if (!el) return;
+    el.innerHTML = `${done ? '✓' : '✍'} ${step.label}...`;
+    el.style.color = done ? '#27ae60' : '#667eea';
+}
+
+function stopStreaming() {
+    if (blogStream) {
+        blogStream.close();
+        blogStream = null;
     }
-    
-    let pollCount = 0;
-    const maxPolls = 150; // Maximum 5 minutes (150 * 2 seconds)
-    
-    // Poll every 2 seconds
-    pollInterval = setInterval(async () => {
-        pollCount++;
-        
-        // Timeout after max polls
-        if (pollCount > maxPolls) {
-            console.error('Polling timeout - blog generation took too long');
-            clearInterval(pollInterval);
-            pollInterval = null;
-            generateBtn.disabled = false;
-            loadingIndicator.classList.add('hidden');
-            alert('Blog generation is taking longer than expected. Please refresh the page.');
-            return;
+}
+
+function finishGeneration() {
+    stopStreaming();
+    generateBtn.disabled = false;
+    loadingIndicator.classList.add('hidden');
+}
+
+// Stream generation progress (Server-Sent Events) - replaces polling
+function streamBlog(blogId) {
+    console.log('Streaming progress for blog:', blogId);
+    stopStreaming();
+
+    let streamingNode = null;
+    // Sectioned writer streams several sections at once; keep one buffer per section
+    let sectionText = [];
+    const blogContent = document.getElementById('blogContent');
+
+    blogStream = new EventSource(`${API_BASE}/api/blogs/${blogId}/stream`);
+
+    blogStream.addEventListener('node', (e) => {
+        const event = JSON.parse(e.data);
+        markStep(event.node, true);
+        if (event.title) {
+            document.getElementById('blogTitle').textContent = event.title;
         }
-        
-        try {
-            const response = await fetch(`${API_BASE}/api/blogs/${blogId}`);
-            if (!response.ok) {
-                console.error('Failed to fetch blog status');
-                clearInterval(pollInterval);
-                pollInterval = null;
-                generateBtn.disabled = false;
-                loadingIndicator.classList.add('hidden');
-                return;
-            }
-            
-            const blog = await response.json();
-            
-            // Check if blog is still being generated
-            if (blog.title === "Generating..." || blog.content === "Blog generation in progress...") {
-                console.log(`Poll ${pollCount}: Still generating...`);
-                return; // Keep polling
-            }
-            
-            // Blog is ready!
-            console.log('Blog generation complete!');
-            console.log('Final status:', blog.status);
-            
-            // STOP polling immediately
-            clearInterval(pollInterval);
-            pollInterval = null;
-            
-            generateBtn.disabled = false;
-            loadingIndicator.classList.add('hidden');
-            
-            displayGeneratedBlog(blog);
+    });
+
+    blogStream.addEventListener('token', (e) => {
+        const event = JSON.parse(e.data);
+        if (event.node !== streamingNode) {
+            // Editor output replaces the writer draft
+            streamingNode = event.node;
+            sectionText = [];
+            markStep(event.node, false);
+            blogContent.textContent = '';
+            generatedBlog.classList.remove('hidden');
+            document.getElementById('reviewActions').classList.add('hidden');
+            const statusBadge = document.getElementById('generatedBlogStatus');
+            statusBadge.textContent = 'GENERATING';
+            statusBadge.className = 'status-badge status-pending';
+        }
+        const section = event.section || 0;
+        sectionText[section] = (sectionText[section] || '') + event.text;
+        blogContent.textContent = sectionText.filter(Boolean).join('\n\n');
+    });
+
+    blogStream.addEventListener('retry', (e) => {
+        // Transient LLM failure - the server resumes from the last finished step
+        const event = JSON.parse(e.data);
+        console.warn(`Generation attempt ${event.attempt} failed, retrying in ${event.retry_in}s:`, event.detail);
+        streamingNode = null;
+        const statusBadge = document.getElementById('generatedBlogStatus');
+        statusBadge.textContent = `RETRYING IN ${Math.ceil(event.retry_in)}s`;
+        statusBadge.className = 'status-badge status-pending';
+    });
+
+    blogStream.addEventListener('complete', (e) => {
+        const event = JSON.parse(e.data);
+        console.log('Blog generation complete! Final status:', event.blog.status);
+        finishGeneration();
+        displayGeneratedBlog(event.blog);
+        loadAllBlogs();
+        loadStats();
+    });
+
+    blogStream.addEventListener('error', (e) => {
+        // Server-sent error event carries data; a dropped connection does not
+        if (e.data) {
+            const event = JSON.parse(e.data);
+            console.error('Blog generation failed:', event.detail);
+            finishGeneration();
+            alert('Error generating blog: ' + event.detail);
             loadAllBlogs();
             loadStats();
-            
-        } catch (error) {
-            console.error('Error polling blog:', error);
+        } else if (blogStream && blogStream.readyState === EventSource.CLOSED) {
+            // Non-retryable failure (e.g. blog deleted) - browser gave up
+            console.error('Progress stream closed');
+            finishGeneration();
         }
-    }, 2000);
-}
-
-// Simulate progress animation
-function simulateProgress() {
-    const steps = ['step1', 'step2', 'step3', 'step4'];
-    steps.forEach((step, index) => {
-        setTimeout(() => {
-            const el = document.getElementById(step);
-            if (el) {
-                el.style.color = '#667eea';
-                if (index < steps.length - 1) {
-                    const nextEl = document.getElementById(steps[index + 1]);
-                    if (nextEl) {
-                        nextEl.innerHTML = nextEl.innerHTML.replace('⏳', '✓');
-                    }
-                }
-            }
-        }, index * 3000);
+        // Otherwise EventSource reconnects by itself and the server replays progress
     });
 }
 
@@ -389,42 +449,77 @@ function filterBlogs(status) {
     loadAllBlogs();
 }
 
-// Load all blogs
+// Load the first page of blogs (resets the list)
 async function loadAllBlogs() {
+    listVersion++;
+    loadingBlogs = false;
+    nextCursor = null;
+    hasMoreBlogs = true;
+    loadedBlogCount = 0;
+    if (blogsList) {
+        blogsList.innerHTML = '';
+    }
+    await loadMoreBlogs();
+}
+
+// Load the next page of blogs and append it (infinite scroll)
+async function loadMoreBlogs() {
+    if (loadingBlogs || !hasMoreBlogs) return;
+    loadingBlogs = true;
+    const version = listVersion;
+    
     try {
-        let url = `${API_BASE}/api/blogs`;
+        const params = new URLSearchParams({ limit: PAGE_SIZE });
+        if (currentQuery) {
+            params.set('q', currentQuery);
+        }
         if (currentFilter !== 'all') {
-            url += `?status=${currentFilter}`;
+            params.set('status', currentFilter);
+        }
+        if (nextCursor) {
+            params.set('cursor', nextCursor);
         }
         
-        const response = await fetch(url);
+        const path = currentQuery ? '/api/blogs/search' : '/api/blogs';
+        const response = await fetch(`${API_BASE}${path}?${params}`);
         if (!response.ok) {
             throw new Error('Failed to load blogs');
         }
         
-        const blogs = await response.json();
-        displayBlogs(blogs);
+        const page = await response.json();
+        if (version !== listVersion) return;  // list was reset meanwhile
+        nextCursor = page.next_cursor;
+        hasMoreBlogs = Boolean(page.next_cursor);
+        displayBlogs(page.items);
         
     } catch (error) {
+        if (version !== listVersion) return;
         console.error('Error loading blogs:', error);
-        if (blogsList) {
+        hasMoreBlogs = false;
+        if (blogsList && loadedBlogCount === 0) {
             blogsList.innerHTML = '<p class="empty-state">Error loading blogs</p>';
         }
+    } finally {
+        if (version === listVersion) {
+            loadingBlogs = false;
+        }
     }
 }
 
-// Display blogs list
+// Append a page of blogs to the list
 function displayBlogs(blogs) {
     if (!blogsList) return;
     
-    if (blogs.length === 0) {
+    if (blogs.length === 0 && loadedBlogCount === 0) {
         const filterText = currentFilter === 'all' ? '' : ` (${currentFilter})`;
-        blogsList.innerHTML = `<p class="empty-state">No blogs found${filterText}.</p>`;
+        const queryText = currentQuery ? ` matching "${escapeHtml(currentQuery)}"` : '';
+        blogsList.innerHTML = `<p class="empty-state">No blogs found${queryText}${filterText}.</p>`;
         return;
     }
     
-    blogsList.innerHTML = blogs.map(blog => {
-        const isGenerating = blog.title === 'Generating...' || blog.content === 'Blog generation in progress...';
+    loadedBlogCount += blogs.length;
+    blogsList.insertAdjacentHTML('beforeend', blogs.map(blog => {
+        const isGenerating = blog.title === 'Generating...';
         const canReview = blog.status === 'pending' && !isGenerating;
         
         return `
@@ -444,7 +539,7 @@ function displayBlogs(blogs) {
                     </div>
                 ` : ''}
                 <div class="preview">
-                    ${escapeHtml(blog.content.substring(0, 200))}${blog.content.length > 200 ? '...' : ''}
+                    ${blog.snippet !== undefined ? highlightTerms(escapeHtml(blog.snippet)) : escapeHtml(blog.excerpt)}
                 </div>
                 <div class="actions">
                     <button class="btn btn-secondary" onclick="viewBlog(${blog.id})">
@@ -464,7 +559,7 @@ function displayBlogs(blogs) {
                 </div>
             </div>
         `;
-    }).join('');
+    }).join(''));
 }
 
 // View full blog
@@ -522,10 +617,9 @@ async function deleteBlog(id) {
     }
     
     try {
-        // Stop polling if deleting current blog being generated
-        if (pollInterval) {
-            clearInterval(pollInterval);
-            pollInterval = null;
+        // Stop streaming if deleting current blog being generated
+        if (blogStream) {
+            finishGeneration();
         }
         
         const response = await fetch(`${API_BASE}/api/blogs/${id}`, {
@@ -554,6 +648,15 @@ async function deleteBlog(id) {
     }
 }
 
+// Wrap the search words in <mark> (input must already be escaped)
+function highlightTerms(html) {
+    const terms = currentQuery.toLowerCase().match(/\w+/g);
+    if (!terms) return html;
+    // Lookbehind keeps entities such as &amp; intact
+    const pattern = new RegExp(`(?<![&#])\\b(${terms.join('|')})`, 'gi');
+    return html.replace(pattern, '<mark>$1</mark>');
+}
+
 // Escape HTML to prevent XSS
 function escapeHtml(text) {
     const div = document.createElement('div');
@@ -580,10 +683,7 @@ document.addEventListener('keydown', function(event) {
 
 // Cleanup on page unload
 window.addEventListener('beforeunload', () => {
-    if (pollInterval) {
-        clearInterval(pollInterval);
-        pollInterval = null;
-    }
+    stopStreaming();
     if (statsInterval) {
         clearInterval(statsInterval);
         statsInterval = null;
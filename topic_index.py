@@ -0,0 +1,260 @@
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+import threading
+import logging
+import os
+
+from database import SessionLocal, BlogPost, TopicEmbedding
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# Semantic Topic Index
+# -----------------------------
+# Users resubmit the same topic in other words ("remote work benefits" /
+# "why working remotely pays off"), which the exact-match dedupe of the
+# batch endpoint cannot see. Every blog's topic is embedded once, stored in
+# topic_embeddings and kept in memory as rows of one normalized NumPy
+# matrix, so finding the nearest earlier topics is a single matrix product.
+# POST /api/generate uses the matches to return an approved post as-is or
+# to seed the new generation with the earlier blog's outline.
+
+TOPIC_INDEX_ENABLED = os.getenv("TOPIC_INDEX_ENABLED", "true").lower() == "true"
+# Ollama embedding model, or "fake" for fake_llm.FakeEmbeddings (offline)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+# Cosine similarity from which an approved post is returned instead of a new one
+TOPIC_REUSE_THRESHOLD = float(os.getenv("TOPIC_REUSE_THRESHOLD", "0.92"))
+# Cosine similarity from which the earlier blog's outline seeds the new one
+TOPIC_SEED_THRESHOLD = float(os.getenv("TOPIC_SEED_THRESHOLD", "0.85"))
+# What POST /api/generate does with a near-duplicate when the request does
+# not say: "reuse", "seed" or "ignore"
+TOPIC_DEDUPE_DEFAULT = os.getenv("TOPIC_DEDUPE_DEFAULT", "seed").lower()
+# Topics embedded per model call when backfilling
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+DEDUPE_MODES = ("reuse", "seed", "ignore")
+
+
+def create_embedder_from_env():
+    """Embedding model configured by the environment (None when disabled)"""
+    if not TOPIC_INDEX_ENABLED:
+        return None
+    if EMBEDDING_MODEL == "fake":
+        from fake_llm import FakeEmbeddings
+        return FakeEmbeddings()
+    from ollama_client import create_embeddings
+    return create_embeddings(EMBEDDING_MODEL)
+
+
+class VectorStore:
+    """
+    In-memory cosine similarity index of unit vectors keyed by blog id
+    Rows live in one preallocated float32 matrix that doubles when full;
+    removal moves the last row into the hole so the live rows stay packed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._ids: List[int] = []
+        self._rows: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def ids(self) -> Set[int]:
+        with self._lock:
+            return set(self._ids)
+
+    @staticmethod
+    def normalize(vectors) -> np.ndarray:
+        """Scale each row to unit length (zero rows stay zero)"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def add_many(self, blog_ids: Sequence[int], vectors):
+        """Insert or replace the vectors of `blog_ids`"""
+        vectors = self.normalize(vectors)
+        with self._lock:
+            if not self._ids:
+                # Empty index: (re)size for whatever dimension comes first
+                self._matrix = np.zeros((max(16, len(blog_ids)), vectors.shape[1]), dtype=np.float32)
+            elif vectors.shape[1] != self._matrix.shape[1]:
+                raise ValueError(f"Expected {self._matrix.shape[1]}-d vectors, got {vectors.shape[1]}-d")
+            for blog_id, vector in zip(blog_ids, vectors):
+                row = self._rows.get(blog_id)
+                if row is None:
+                    row = len(self._ids)
+                    if row == self._matrix.shape[0]:
+                        grown = np.zeros((row * 2, self._matrix.shape[1]), dtype=np.float32)
+                        grown[:row] = self._matrix
+                        self._matrix = grown
+                    self._ids.append(blog_id)
+                    self._rows[blog_id] = row
+                self._matrix[row] = vector
+
+    def remove(self, blog_id: int):
+        with self._lock:
+            row = self._rows.pop(blog_id, None)
+            if row is None:
+                return
+            last = len(self._ids) - 1
+            if row != last:
+                moved = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved
+                self._rows[moved] = row
+            self._ids.pop()
+
+    def search_many(self, vectors, k: int = 5, min_score: float = 0.0) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k (blog_id, cosine similarity) per query vector, best first
+        All queries are scored against the whole index in one matrix product.
+        """
+        queries = self.normalize(vectors)
+        with self._lock:
+            count = len(self._ids)
+            if count == 0 or queries.shape[1] != self._matrix.shape[1]:
+                return [[] for _ in queries]
+            scores = queries @ self._matrix[:count].T
+            k = min(k, count)
+            # argpartition finds the k best in O(n); only those get sorted
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            results = []
+            for q, candidates in enumerate(top):
+                ordered = candidates[np.argsort(-scores[q, candidates])]
+                results.append([
+                    (self._ids[i], float(scores[q, i])) for i in ordered if scores[q, i] >= min_score
+                ])
+            return results
+
+    def search(self, vector, k: int = 5, min_score: float = 0.0) -> List[Tuple[int, float]]:
+        return self.search_many([vector], k, min_score)[0]
+
+
+embedder = create_embedder_from_env()
+store = VectorStore()
+
+
+def embed(texts: List[str]) -> Optional[np.ndarray]:
+    """Embed texts, or None when the index is disabled or the model is unavailable"""
+    if embedder is None or not texts:
+        return None
+    try:
+        return np.asarray(embedder.embed_documents(texts), dtype=np.float32)
+    except Exception as e:
+        logger.warning(f"[TOPICS] Embedding with {EMBEDDING_MODEL} failed: {str(e)}")
+        return None
+
+
+def find_similar(vector, k: int = 5) -> List[Tuple[int, float]]:
+    """Earlier blogs at or above the seed threshold, most similar first"""
+    return store.search(vector, k, min_score=TOPIC_SEED_THRESHOLD)
+
+
+def remember(db: Session, blog_ids: Sequence[int], vectors):
+    """
+    Store topic embeddings in the caller's transaction and index them
+    An id whose transaction later rolls back is harmless: callers look
+    matches up in blog_posts and skip ids that are not there.
+    """
+    for blog_id, vector in zip(blog_ids, vectors):
+        db.merge(TopicEmbedding(
+            blog_id=blog_id, model=EMBEDDING_MODEL, vector=np.asarray(vector, dtype=np.float32).tobytes()
+        ))
+    store.add_many(blog_ids, vectors)
+
+
+def forget(db: Session, blog_id: int):
+    """Drop a deleted blog's embedding (caller commits)"""
+    db.execute(delete(TopicEmbedding).where(TopicEmbedding.blog_id == blog_id))
+    store.remove(blog_id)
+
+
+def load(db: Session) -> int:
+    """
+    Index the topic_embeddings rows that are not in memory yet
+    Called at startup and then periodically, since other worker processes
+    write embeddings to the shared table without touching this store. Rows
+    deleted elsewhere are dropped too (an id remember()ed by a transaction
+    that has not committed yet may drop out until the next call). Returns
+    the number of rows added.
+    """
+    stored = set(db.execute(
+        select(TopicEmbedding.blog_id).where(TopicEmbedding.model == EMBEDDING_MODEL)
+    ).scalars())
+    indexed = store.ids()
+    for blog_id in indexed - stored:
+        store.remove(blog_id)
+    missing = sorted(stored - indexed)
+    for start in range(0, len(missing), EMBEDDING_BATCH_SIZE * 16):
+        rows = db.execute(
+            select(TopicEmbedding.blog_id, TopicEmbedding.vector)
+            .where(TopicEmbedding.blog_id.in_(missing[start:start + EMBEDDING_BATCH_SIZE * 16]))
+        ).all()
+        if rows:
+            store.add_many(
+                [row.blog_id for row in rows],
+                np.stack([np.frombuffer(row.vector, dtype=np.float32) for row in rows])
+            )
+    return len(missing)
+
+
+def backfill():
+    """Embed every blog that has no embedding from the current model yet"""
+    db = SessionLocal()
+    try:
+        # Vectors of a previously configured model cannot be compared
+        db.execute(delete(TopicEmbedding).where(TopicEmbedding.model != EMBEDDING_MODEL))
+        db.commit()
+        missing = db.execute(
+            select(BlogPost.id, BlogPost.topic)
+            .outerjoin(TopicEmbedding, TopicEmbedding.blog_id == BlogPost.id)
+            .where(TopicEmbedding.blog_id.is_(None))
+            .order_by(BlogPost.id)
+        ).all()
+        done = 0
+        for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            chunk = missing[start:start + EMBEDDING_BATCH_SIZE]
+            vectors = embed([row.topic for row in chunk])
+            if vectors is None:
+                break
+            remember(db, [row.id for row in chunk], vectors)
+            db.commit()
+            done += len(chunk)
+        if missing:
+            logger.info(f"[TOPICS] Backfilled {done}/{len(missing)} topic embedding(s)")
+    except Exception as e:
+        db.rollback()
+        logger.exception(f"[TOPICS] Backfill failed: {str(e)}")
+    finally:
+        db.close()
+
+
+_backfill_running = threading.Lock()
+_backfill_requested = threading.Event()
+
+
+def _backfill_loop():
+    try:
+        while _backfill_requested.is_set():
+            _backfill_requested.clear()
+            backfill()
+    finally:
+        _backfill_running.release()
+
+
+def schedule_backfill():
+    """Run backfill() on a background thread (once more if one is already running)"""
+    if embedder is None:
+        return
+    _backfill_requested.set()
+    if _backfill_running.acquire(blocking=False):
+        threading.Thread(target=_backfill_loop, name="topic-backfill", daemon=True).start()
+
+
+def stats() -> dict:
+    return {"enabled": embedder is not None, "model": EMBEDDING_MODEL, "indexed": len(store)}